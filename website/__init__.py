@@ -5,16 +5,38 @@ from flask_login import LoginManager
 import os
 from dotenv import load_dotenv 
 
+from .sharding import ShardedSession
+
 load_dotenv()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': ShardedSession})
 DB_NAME = 'database.db'
 
 
 def create_app():
     app = Flask(__name__)
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_NAME}'
+
+    from .engine_options import database_uri_from_env, engine_options_from_env
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri_from_env(f'sqlite:///{DB_NAME}')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env()
+    app.config['ARCHIVE_AFTER_DAYS'] = int(os.getenv('ARCHIVE_AFTER_DAYS', 730))
+    app.config['REPORTS_PAGE_SIZE'] = int(os.getenv('REPORTS_PAGE_SIZE', 50))
+    app.config['REPORT_CACHE_SIZE'] = int(os.getenv('REPORT_CACHE_SIZE', 256))
+    app.config['COLUMN_CACHE_BYTES'] = int(os.getenv('COLUMN_CACHE_BYTES', 64 * 1024 * 1024))
+    app.config['PERIOD_INDEX_USERS'] = int(os.getenv('PERIOD_INDEX_USERS', 128))
+    app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 300))
+
+    from .sharding import shard_binds_from_env
+
+    app.config['SHARD_COUNT'] = int(os.getenv('SHARD_COUNT', 0))
+    app.config['SQLALCHEMY_BINDS'] = shard_binds_from_env(app.config['SHARD_COUNT'])
+
+    from .sqlite_profile import configure_sqlite, sqlite_pragmas_from_env
+
+    app.config['SQLITE_PRAGMAS'] = sqlite_pragmas_from_env()
     db.init_app(app)
+    configure_sqlite(app)
 
     from .views import views
     from .auth import auth
@@ -26,7 +48,10 @@ def create_app():
     app.register_blueprint(report, url_prefix='/')
     app.register_blueprint(ai, url_prefix='/')
 
-    from .models import User
+    from .identity import load_identity
+    from .commands import database
+
+    app.cli.add_command(database)
 
     login_manager = LoginManager()
     login_manager.login_view = 'auth.login'
@@ -34,7 +59,7 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(id):
-        return User.query.get(int(id))
+        return load_identity(int(id))
 
     create_database(app)
 
@@ -42,7 +67,12 @@ def create_app():
 
 
 def create_database(app):
+    from .sharding import create_sharded_tables
+
     if not path.exists('website/' + DB_NAME):
         with app.app_context():
-            db.create_all()
+            if app.config['SHARD_COUNT']:
+                create_sharded_tables()
+            else:
+                db.create_all()
         print('Created Database!')
\ No newline at end of file
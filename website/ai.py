@@ -1,5 +1,8 @@
-from flask import Blueprint, flash, render_template, request, redirect, url_for
+from flask import (
+    Blueprint, flash, render_template, request, redirect, session, url_for
+)
 from flask_login import login_required, current_user
+from sqlalchemy import func
 
 from . import db
 from .models import ChatAI
@@ -10,9 +13,41 @@ from .ai_models.hug_client import get_huggingface_client
 ai = Blueprint('ai', __name__)
 
 
+def _latest_conversation_id(user_id):
+    return (
+        db.session.query(func.max(ChatAI.conversation_id))
+        .filter(ChatAI.user_id == user_id)
+        .scalar()
+    )
+
+
+def _current_conversation_id(user_id):
+    stored = session.get('chat_conversation')
+    if stored and stored[0] == user_id:
+        return stored[1]
+    conversation_id = _latest_conversation_id(user_id) or 1
+    session['chat_conversation'] = [user_id, conversation_id]
+    return conversation_id
+
+
+def _load_chats(user_id):
+    return (
+        ChatAI.query.filter_by(
+            user_id=user_id, conversation_id=_current_conversation_id(user_id)
+        )
+        .order_by(ChatAI.created_at, ChatAI.id)
+        .all()
+    )
+
+
 def _save_chat_message(user_id, message, response):
     try:
-        new_chat = ChatAI(user_id=user_id, message=message, response=response)
+        new_chat = ChatAI(
+            user_id=user_id,
+            conversation_id=_current_conversation_id(user_id),
+            message=message,
+            response=response,
+        )
         db.session.add(new_chat)
         db.session.commit()
         return True, None
@@ -31,14 +66,9 @@ def home():
         submit_action = request.form.get('submit')
 
         if submit_action == 'new_chat':
-            try:
-                ChatAI.query.filter_by(user_id=user_id).delete()
-                db.session.commit()
-                flash('New chat started! Previous messages cleared.', 'success')
-            except Exception as e:
-                db.session.rollback()
-                print(f"ERROR: Failed deleting chat history for user {user_id}: {e}")
-                flash('Error clearing chat history.', 'danger')
+            latest = _latest_conversation_id(user_id) or 0
+            session['chat_conversation'] = [user_id, latest + 1]
+            flash('New conversation started! Earlier chats are kept.', 'success')
             return redirect(url_for('ai.home'))  # Redirect after POST
 
         financial_context = get_user_financial_context(user_id)
@@ -65,7 +95,7 @@ def home():
             custom_text = request.form.get('customRequestText', '').strip()
             if not custom_text:
                 flash('Please enter your custom request message.', 'warning')
-                chats = ChatAI.query.filter_by(user_id=user_id).all()
+                chats = _load_chats(user_id)
                 return render_template('ai.html', chats=chats, user=current_user)
             else:
                 prompt = build_prompt(financial_context, 'custom', custom_message=custom_text)
@@ -73,7 +103,7 @@ def home():
                 success_flash_message = "Response to your custom request generated!"
         else:
             flash('Invalid action selected.', 'danger')
-            chats = ChatAI.query.filter_by(user_id=user_id).all()
+            chats = _load_chats(user_id)
             return render_template('ai.html', chats=chats, user=current_user)
 
         if prompt:
@@ -91,5 +121,5 @@ def home():
 
         return redirect(url_for('ai.home'))
 
-    chats = ChatAI.query.filter_by(user_id=user_id).all()
+    chats = _load_chats(user_id)
     return render_template('ai.html', chats=chats, user=current_user)
\ No newline at end of file
@@ -14,6 +14,9 @@ def build_prompt(context, prompt_type, custom_message=None):
 --- PLANNED EXPENSES ---
 {context['planning_str']}
 
+--- MONTHLY TOTALS ---
+{context['monthly_str']}
+
 --- SUMMARY ---
 Total Income: €{context['total_income']}
 Total Expenses: €{context['total_expenses']}
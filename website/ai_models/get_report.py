@@ -1,18 +1,13 @@
-from ..models import Income as IncomeModel, Expenses as ExpensesModel, Planning as PlanningModel, Savings as SavingsModel
+from ..finances.user_balance import get_user_balance
 
 
-def get_report_data():
-    income = IncomeModel.query.all()
-    expenses = ExpensesModel.query.all()
-    planning = PlanningModel.query.all()
+def get_report_data(user_id):
+    user_balance = get_user_balance(user_id)
 
-    total_income = sum(i.amount for i in income)
-    total_expenses = sum(e.amount for e in expenses)
-    total_planning = sum(p.amount for p in planning)
-
-    savings = SavingsModel.query.all()
-
-    total_savings = sum(s.amount for s in savings)
+    total_income = user_balance.income
+    total_expenses = user_balance.expenses
+    total_planning = user_balance.planning
+    total_savings = user_balance.savings
 
     balance = total_income - total_expenses - total_savings
 
@@ -25,4 +20,4 @@ def get_report_data():
         'balance': balance,
         'total_savings': total_savings,
         'amount_to_cover_planning': cover
-    }
\ No newline at end of file
+    }
@@ -12,6 +12,7 @@ class TestAIFunctionality(unittest.TestCase):
             'income_str': 'Salary: €3000',
             'expense_str': 'Rent: €1000, Food: €500',
             'planning_str': 'Vacation: €1000',
+            'monthly_str': '- 2025-05: income €3000.00, expenses €1500.00',
             'total_income': '3000.00',
             'total_expenses': '1500.00',
             'total_planning': '1000.00',
@@ -28,6 +29,8 @@ class TestAIFunctionality(unittest.TestCase):
             "Rent: €1000, Food: €500\n\n"
             "--- PLANNED EXPENSES ---\n"
             "Vacation: €1000\n\n"
+            "--- MONTHLY TOTALS ---\n"
+            "- 2025-05: income €3000.00, expenses €1500.00\n\n"
             "--- SUMMARY ---\n"
             "Total Income: €3000.00\n"
             "Total Expenses: €1500.00\n"
@@ -1,25 +1,60 @@
 from flask import flash
 
-from ..models import Income, Expenses, Planning
+from ..cache import request_cached
+from ..models import Ledger, INCOME, EXPENSES, PLANNING
+from ..money import from_cents, to_cents
+from ..projections import report_columns, to_report_rows
+from ..finances.ledger_columns import build_ledger_columns, monthly_totals
 from .get_report import get_report_data
 
+SUMMARY_MONTHS = 12
+
+
+def _load_ledger_rows(user_id):
+    return request_cached(
+        user_id,
+        "ledger_rows",
+        lambda: to_report_rows(
+            Ledger.query.filter_by(user_id=user_id)
+            .order_by(Ledger.id)
+            .with_entities(*report_columns(Ledger))
+        ),
+    )
+
+
+def _monthly_summary(rows):
+    columns = build_ledger_columns(
+        [(row.date, to_cents(row.amount or 0), row.kind) for row in rows]
+    )
+    income = dict(monthly_totals(columns, INCOME))
+    expenses = dict(monthly_totals(columns, EXPENSES))
+    months = sorted(set(income) | set(expenses))[-SUMMARY_MONTHS:]
+    return "\n".join(
+        f"- {month:%Y-%m}: income €{income.get(month, from_cents(0))}, "
+        f"expenses €{expenses.get(month, from_cents(0))}"
+        for month in months
+    )
+
 
 def get_user_financial_context(user_id):
     try:
-        incomes = Income.query.filter_by(user_id=user_id).all()
-        expenses = Expenses.query.filter_by(user_id=user_id).all()
-        planning_expenses = Planning.query.filter_by(user_id=user_id).all()
+        rows = _load_ledger_rows(user_id)
+        incomes = [row for row in rows if row.kind == INCOME]
+        expenses = [row for row in rows if row.kind == EXPENSES]
+        planning_expenses = [row for row in rows if row.kind == PLANNING]
 
         income_str = "\n".join([f"- {i.name}: €{i.amount} on {i.date} ({i.type})" for i in incomes])
         expense_str = "\n".join([f"- {e.name}: €{e.amount} on {e.date} ({e.type})" for e in expenses])
         planning_str = "\n".join([f"- {p.name}: €{p.amount} planned on {p.date}" for p in planning_expenses])
 
-        report_data = get_report_data()
+        monthly_str = _monthly_summary(rows)
+        report_data = get_report_data(user_id)
 
         return {
             "income_str": income_str,
             "expense_str": expense_str,
             "planning_str": planning_str,
+            "monthly_str": monthly_str,
             "total_income": report_data.get('total_income', 0),
             "total_expenses": report_data.get('total_expenses', 0),
             "total_planning": report_data.get('total_planning', 0),
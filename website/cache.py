@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app, g, has_app_context
+
+CACHE_SIZE = 256
+COLUMN_CACHE_BYTES = 64 * 1024 * 1024
+
+_entries = OrderedDict()
+_columns = OrderedDict()
+_lock = Lock()
+
+
+def _max_entries():
+    return current_app.config.get("REPORT_CACHE_SIZE", CACHE_SIZE)
+
+
+def _max_column_bytes():
+    return current_app.config.get("COLUMN_CACHE_BYTES", COLUMN_CACHE_BYTES)
+
+
+def cached_result(user_id, version, key, compute):
+    max_entries = _max_entries()
+    if max_entries <= 0:
+        return compute()
+
+    cache_key = (user_id, version, key)
+    with _lock:
+        if cache_key in _entries:
+            _entries.move_to_end(cache_key)
+            return _entries[cache_key]
+
+    result = compute()
+    with _lock:
+        _entries[cache_key] = result
+        _entries.move_to_end(cache_key)
+        while len(_entries) > max_entries:
+            _entries.popitem(last=False)
+    return result
+
+
+def cached_columns(user_id, version, compute, sizeof):
+    max_bytes = _max_column_bytes()
+    if max_bytes <= 0:
+        return compute()
+
+    with _lock:
+        entry = _columns.get(user_id)
+        if entry is not None and entry[0] == version:
+            _columns.move_to_end(user_id)
+            return entry[1]
+
+    result = compute()
+    size = sizeof(result)
+    with _lock:
+        _columns.pop(user_id, None)
+        if size <= max_bytes:
+            _columns[user_id] = (version, result, size)
+            total = sum(entry[2] for entry in _columns.values())
+            while total > max_bytes:
+                total -= _columns.popitem(last=False)[1][2]
+    return result
+
+
+def clear_cache():
+    with _lock:
+        _entries.clear()
+        _columns.clear()
+
+
+def request_cached(user_id, key, compute):
+    if not has_app_context():
+        return compute()
+    memo = g.setdefault("user_data", {})
+    cache_key = (user_id, key)
+    if cache_key not in memo:
+        memo[cache_key] = compute()
+    return memo[cache_key]
+
+
+def forget_request_cache(user_id):
+    if not has_app_context():
+        return
+    memo = g.get("user_data", {})
+    for cache_key in [cache_key for cache_key in memo if cache_key[0] == user_id]:
+        del memo[cache_key]
@@ -0,0 +1,523 @@
+from os import path
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import Integer
+
+from . import db
+from .compression import compress_text
+from .models import (
+    Money, Ledger, LedgerArchive, MonthlyRollup, TransactionType,
+    INCOME, EXPENSES, PLANNING,
+)
+from .finances.ledger_archive import ARCHIVE_AFTER_DAYS, archive_old_rows
+from .finances.monthly_rollup import rebuild_monthly_rollups
+from .finances.user_balance import rebuild_user_balances
+from .search import create_name_index, ensure_name_index
+from .sharding import (
+    SHARDED_TABLES, database_tables, for_each_shard, selected_shard,
+    shard_for_user, shard_keys, use_shard, without_sharding,
+)
+
+database = AppGroup("database", help="Database maintenance commands.")
+
+LEGACY_LEDGER_TABLES = {
+    "income": INCOME,
+    "expenses": EXPENSES,
+    "planning": PLANNING,
+}
+
+
+def _engine():
+    key = selected_shard()
+    return db.engines[key] if key else db.engine
+
+
+def _tables():
+    return database_tables(db.metadata.sorted_tables)
+
+
+def create_tables():
+    db.metadata.create_all(_engine(), tables=_tables())
+
+
+def create_missing_indexes():
+    inspector = inspect(_engine())
+    created = []
+    for table in _tables():
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(_engine())
+                created.append(index.name)
+    return created
+
+
+def add_missing_columns():
+    inspector = inspect(_engine())
+    added = []
+    for table in _tables():
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=_engine().dialect)
+            if column.server_default is not None:
+                column_type += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    column_type += " NOT NULL"
+            with _engine().begin() as conn:
+                conn.execute(
+                    text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                )
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def _legacy_money_columns():
+    inspector = inspect(_engine())
+    for table in _tables():
+        if not inspector.has_table(table.name):
+            continue
+        existing = {
+            column["name"]: column["type"]
+            for column in inspector.get_columns(table.name)
+        }
+        for column in table.columns:
+            if not isinstance(column.type, Money) or column.name not in existing:
+                continue
+            if not isinstance(existing[column.name], Integer):
+                yield table.name, column.name, f"{column.name}_cents" in existing
+
+
+def convert_amounts_to_cents(batch_size=1000):
+    converted = []
+    for table, column, resuming in list(_legacy_money_columns()):
+        cents = f"{column}_cents"
+        with _engine().begin() as conn:
+            if not resuming:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {cents} INTEGER"))
+            max_id = conn.execute(text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+
+        for low in range(0, max_id, batch_size):
+            with _engine().begin() as conn:
+                conn.execute(
+                    text(
+                        f"UPDATE {table} "
+                        f"SET {cents} = CAST(ROUND({column} * 100) AS INTEGER) "
+                        f"WHERE id > :low AND id <= :high AND {cents} IS NULL"
+                    ),
+                    {"low": low, "high": low + batch_size},
+                )
+
+        with _engine().begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+            conn.execute(text(f"ALTER TABLE {table} RENAME COLUMN {cents} TO {column}"))
+        converted.append(f"{table}.{column}")
+    return converted
+
+
+def _intern_type_labels(conn, table):
+    conn.execute(
+        text(
+            "INSERT INTO transaction_type (label) "
+            f"SELECT DISTINCT type FROM {table} WHERE type IS NOT NULL "
+            "AND type NOT IN (SELECT label FROM transaction_type)"
+        )
+    )
+
+
+def intern_ledger_types(batch_size=1000):
+    inspector = inspect(_engine())
+    if not inspector.has_table("ledger"):
+        return False
+    columns = {column["name"] for column in inspector.get_columns("ledger")}
+    if "type" not in columns:
+        return False
+    TransactionType.__table__.create(_engine(), checkfirst=True)
+    with _engine().begin() as conn:
+        if "type_id" not in columns:
+            conn.execute(
+                text(
+                    "ALTER TABLE ledger ADD COLUMN type_id SMALLINT "
+                    "REFERENCES transaction_type (id)"
+                )
+            )
+        _intern_type_labels(conn, "ledger")
+        max_id = conn.execute(text("SELECT MAX(id) FROM ledger")).scalar() or 0
+
+    for low in range(0, max_id, batch_size):
+        with _engine().begin() as conn:
+            conn.execute(
+                text(
+                    "UPDATE ledger SET type_id = ("
+                    "SELECT id FROM transaction_type "
+                    "WHERE transaction_type.label = ledger.type) "
+                    "WHERE id > :low AND id <= :high AND type_id IS NULL"
+                ),
+                {"low": low, "high": low + batch_size},
+            )
+
+    with _engine().begin() as conn:
+        conn.execute(text("ALTER TABLE ledger DROP COLUMN type"))
+    return True
+
+
+def merge_legacy_ledger_tables(batch_size=1000):
+    inspector = inspect(_engine())
+    merged = []
+    for table, kind in LEGACY_LEDGER_TABLES.items():
+        if not inspector.has_table(table):
+            continue
+        TransactionType.__table__.create(_engine(), checkfirst=True)
+        Ledger.__table__.create(_engine(), checkfirst=True)
+        amount_type = next(
+            column["type"]
+            for column in inspector.get_columns(table)
+            if column["name"] == "amount"
+        )
+        amount = (
+            "amount"
+            if isinstance(amount_type, Integer)
+            else "CAST(ROUND(amount * 100) AS INTEGER)"
+        )
+        with _engine().begin() as conn:
+            _intern_type_labels(conn, table)
+            max_id = conn.execute(text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+
+        for low in range(0, max_id, batch_size):
+            batch = {"low": low, "high": low + batch_size, "kind": kind}
+            with _engine().begin() as conn:
+                conn.execute(
+                    text(
+                        "INSERT INTO ledger (kind, amount, name, date, type_id, user_id) "
+                        f"SELECT :kind, {amount}, name, date, "
+                        "(SELECT id FROM transaction_type "
+                        f"WHERE transaction_type.label = {table}.type), "
+                        f"user_id FROM {table} "
+                        "WHERE id > :low AND id <= :high ORDER BY id"
+                    ),
+                    batch,
+                )
+                conn.execute(
+                    text(f"DELETE FROM {table} WHERE id > :low AND id <= :high"),
+                    batch,
+                )
+
+        with _engine().begin() as conn:
+            conn.execute(text(f"DROP TABLE {table}"))
+        merged.append(table)
+    return merged
+
+
+def enable_ledger_autoincrement():
+    inspector = inspect(_engine())
+    if _engine().dialect.name != "sqlite" or not inspector.has_table("ledger"):
+        return False
+    with _engine().connect() as conn:
+        ledger_sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'ledger'")
+        ).scalar()
+    if "AUTOINCREMENT" in ledger_sql.upper():
+        return False
+
+    existing = {column["name"] for column in inspector.get_columns("ledger")}
+    columns = ", ".join(
+        column.name for column in Ledger.__table__.columns if column.name in existing
+    )
+    metadata = MetaData()
+    for foreign_key in Ledger.__table__.foreign_keys:
+        foreign_key.column.table.to_metadata(metadata)
+    rebuild = Ledger.__table__.to_metadata(metadata, name="ledger_rebuild")
+    with _engine().begin() as conn:
+        conn.execute(CreateTable(rebuild))
+        conn.execute(
+            text(f"INSERT INTO ledger_rebuild ({columns}) SELECT {columns} FROM ledger")
+        )
+        conn.execute(text("DROP TABLE ledger"))
+        conn.execute(text("ALTER TABLE ledger_rebuild RENAME TO ledger"))
+        for index in Ledger.__table__.indexes:
+            index.create(conn)
+        reserve_ledger_ids(conn)
+    if inspector.has_table("ledger_fts"):
+        with _engine().begin() as conn:
+            create_name_index(conn)
+    return True
+
+
+def reserve_ledger_ids(conn):
+    # Archived ids must never be handed out again either.
+    highest = [
+        text("SELECT MAX(seq) FROM sqlite_sequence WHERE name = 'ledger'"),
+        text("SELECT MAX(id) FROM ledger"),
+    ]
+    if inspect(conn).has_table(LedgerArchive.__tablename__):
+        highest.append(text("SELECT MAX(id) FROM ledger_archive"))
+    last_id = max(conn.execute(query).scalar() or 0 for query in highest)
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'ledger'"))
+    conn.execute(
+        text("INSERT INTO sqlite_sequence (name, seq) VALUES ('ledger', :seq)"),
+        {"seq": last_id},
+    )
+
+
+def unsharded_tables():
+    inspector = inspect(db.engine)
+    return [
+        name for name in sorted(SHARDED_TABLES | set(LEGACY_LEDGER_TABLES))
+        if inspector.has_table(name)
+    ]
+
+
+def move_rows_to_shards(batch_size=1000):
+    inspector = inspect(db.engine)
+    moved = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in SHARDED_TABLES or not inspector.has_table(table.name):
+            continue
+        columns = [column.name for column in table.columns]
+        column_list = ", ".join(columns)
+        insert = text(
+            f"INSERT INTO {table.name} ({column_list}) "
+            f"VALUES ({', '.join(':' + name for name in columns)})"
+        )
+        count = 0
+        while True:
+            with db.engine.connect() as conn:
+                rows = conn.execute(
+                    text(
+                        f"SELECT rowid, {column_list} FROM {table.name} "
+                        "ORDER BY rowid LIMIT :limit"
+                    ),
+                    {"limit": batch_size},
+                ).all()
+            if not rows:
+                break
+            by_shard = {}
+            for row in rows:
+                values = dict(zip(columns, row[1:]))
+                by_shard.setdefault(shard_for_user(values["user_id"]), []).append(values)
+            for key, values in by_shard.items():
+                try:
+                    with db.engines[key].begin() as conn:
+                        conn.execute(insert, values)
+                        if table.name in ("ledger", "ledger_archive"):
+                            reserve_ledger_ids(conn)
+                except IntegrityError as e:
+                    raise click.ClickException(
+                        f"{key} already holds {table.name} rows that clash with the "
+                        f"main database: {e.orig}"
+                    )
+            # Moved rows leave the main database so an interrupted run resumes.
+            with db.engine.begin() as conn:
+                conn.execute(
+                    text(f"DELETE FROM {table.name} WHERE rowid <= :last"),
+                    {"last": rows[-1][0]},
+                )
+            count += len(rows)
+        moved.append((table.name, count))
+    return moved
+
+
+def drop_unsharded_tables():
+    for table in reversed(db.metadata.sorted_tables):
+        if table.name in SHARDED_TABLES:
+            table.drop(db.engine, checkfirst=True)
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS ledger_fts"))
+
+
+def backfill_savings_balances(batch_size=1000):
+    with _engine().connect() as conn:
+        user_ids = conn.execute(
+            text(
+                "SELECT DISTINCT user_id FROM savings "
+                "WHERE balance IS NULL AND user_id IS NOT NULL"
+            )
+        ).scalars().all()
+
+    for user_id in user_ids:
+        with _engine().connect() as conn:
+            rows = conn.execute(
+                text("SELECT id, amount FROM savings WHERE user_id = :user_id ORDER BY id"),
+                {"user_id": user_id},
+            ).all()
+        balances = []
+        running = 0
+        for row_id, amount in rows:
+            running += amount or 0
+            balances.append({"id": row_id, "balance": running})
+        for start in range(0, len(balances), batch_size):
+            with _engine().begin() as conn:
+                conn.execute(
+                    text("UPDATE savings SET balance = :balance WHERE id = :id"),
+                    balances[start:start + batch_size],
+                )
+    return len(user_ids)
+
+
+def backfill_chat_history(batch_size=1000):
+    with _engine().connect() as conn:
+        max_id = conn.execute(text("SELECT MAX(id) FROM chat_ai")).scalar() or 0
+
+    updated = 0
+    for low in range(0, max_id, batch_size):
+        with _engine().begin() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT id, message, response FROM chat_ai "
+                    "WHERE id > :low AND id <= :high AND conversation_id IS NULL"
+                ),
+                {"low": low, "high": low + batch_size},
+            ).all()
+            if not rows:
+                continue
+            conn.execute(
+                text(
+                    "UPDATE chat_ai SET conversation_id = 1, "
+                    "created_at = COALESCE(created_at, CURRENT_TIMESTAMP), "
+                    "message = :message, response = :response WHERE id = :id"
+                ),
+                [
+                    {
+                        "id": row_id,
+                        "message": _compress_legacy(message),
+                        "response": _compress_legacy(response),
+                    }
+                    for row_id, message, response in rows
+                ],
+            )
+        updated += len(rows)
+    return updated
+
+
+def rollups_missing():
+    if db.session.query(MonthlyRollup.user_id).first() is not None:
+        return False
+    return any(
+        db.session.query(model.id).first() is not None
+        for model in (Ledger, LedgerArchive)
+    )
+
+
+def _compress_legacy(value):
+    if isinstance(value, str):
+        return compress_text(value)
+    return value
+
+
+@database.command("upgrade")
+@click.option("--batch-size", default=1000, show_default=True,
+              help="Rows converted per transaction during data migrations.")
+def upgrade(batch_size):
+    keys = shard_keys()
+    if keys:
+        unsharded = unsharded_tables()
+        if unsharded:
+            click.echo("Upgrading unsharded data in the main database")
+            with without_sharding():
+                upgrade_ledger_database(batch_size)
+            db.session.remove()
+        else:
+            upgrade_schema()
+        for key in keys:
+            click.echo(f"Upgrading {key}")
+            with use_shard(key):
+                upgrade_ledger_database(batch_size)
+            db.session.remove()
+        if unsharded:
+            for name, count in move_rows_to_shards(batch_size):
+                click.echo(f"Moved {count} {name} rows into user shards")
+            drop_unsharded_tables()
+    else:
+        upgrade_ledger_database(batch_size)
+    click.echo("Database is up to date.")
+
+
+def upgrade_schema():
+    create_tables()
+    for name in add_missing_columns():
+        click.echo(f"Added column {name}")
+    for name in create_missing_indexes():
+        click.echo(f"Created index {name}")
+
+
+def upgrade_ledger_database(batch_size):
+    converted = convert_amounts_to_cents(batch_size)
+    for name in converted:
+        click.echo(f"Converted {name} to integer cents")
+    if intern_ledger_types(batch_size):
+        click.echo("Moved ledger types into transaction_type")
+    merged = merge_legacy_ledger_tables(batch_size)
+    for name in merged:
+        click.echo(f"Merged {name} into ledger")
+    if enable_ledger_autoincrement():
+        click.echo("Rebuilt ledger with AUTOINCREMENT ids")
+    upgrade_schema()
+    if ensure_name_index():
+        click.echo("Built the ledger name search index")
+    count = backfill_chat_history(batch_size)
+    if count:
+        click.echo(f"Compressed {count} chat messages")
+    count = backfill_savings_balances(batch_size)
+    if count:
+        click.echo(f"Backfilled savings balances for {count} users")
+    if converted or merged or rollups_missing():
+        count = rebuild_monthly_rollups()
+        click.echo(f"Built {count} monthly rollups")
+
+
+@database.command("rebuild-balances")
+def rebuild_balances():
+    count = for_each_shard(rebuild_user_balances)
+    click.echo(f"Rebuilt balances for {count} users.")
+
+
+@database.command("rebuild-rollups")
+def rebuild_rollups():
+    count = for_each_shard(rebuild_monthly_rollups)
+    click.echo(f"Rebuilt {count} monthly rollups.")
+
+
+@database.command("archive")
+@click.option("--older-than-days", type=int, default=None,
+              help="Archive ledger rows dated before this many days ago.")
+@click.option("--batch-size", default=1000, show_default=True,
+              help="Ledger ids scanned per transaction.")
+def archive(older_than_days, batch_size):
+    if older_than_days is None:
+        older_than_days = current_app.config.get(
+            "ARCHIVE_AFTER_DAYS", ARCHIVE_AFTER_DAYS
+        )
+    count = for_each_shard(lambda: archive_old_rows(older_than_days, batch_size))
+    click.echo(f"Archived {count} ledger rows older than {older_than_days} days.")
+
+
+@database.command("shards")
+def shards():
+    if not shard_keys():
+        click.echo("Sharding is disabled (SHARD_COUNT=0).")
+        return
+    for key in shard_keys():
+        click.echo(f"{key}: {db.engines[key].url.render_as_string(hide_password=True)}")
+
+
+@database.command("export-shard")
+@click.argument("key")
+@click.argument("destination", type=click.Path(dir_okay=False))
+def export_shard(key, destination):
+    if key not in shard_keys():
+        raise click.BadParameter(f"Unknown shard {key!r}.", param_hint="KEY")
+    if path.exists(destination):
+        raise click.BadParameter(f"{destination} already exists.", param_hint="DESTINATION")
+    with db.engines[key].connect() as conn:
+        conn.execute(text("VACUUM INTO :destination"), {"destination": destination})
+    click.echo(f"Exported {key} to {destination}. Point {key.upper()}_URL at it to move the shard.")
@@ -0,0 +1,14 @@
+import zlib
+
+
+def compress_text(value):
+    return zlib.compress(value.encode("utf-8"))
+
+
+def decompress_text(value):
+    if isinstance(value, str):
+        return value
+    try:
+        return zlib.decompress(value).decode("utf-8")
+    except zlib.error:
+        return bytes(value).decode("utf-8")
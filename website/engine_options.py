@@ -0,0 +1,30 @@
+import os
+
+
+def _flag(value):
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+ENGINE_OPTIONS = (
+    ("pool_size", "DB_POOL_SIZE", int),
+    ("max_overflow", "DB_MAX_OVERFLOW", int),
+    ("pool_recycle", "DB_POOL_RECYCLE", int),
+    ("pool_pre_ping", "DB_POOL_PRE_PING", _flag),
+    ("query_cache_size", "DB_STATEMENT_CACHE_SIZE", int),
+)
+
+
+def database_uri_from_env(default):
+    uri = os.getenv("DATABASE_URL") or default
+    if uri.startswith("postgres://"):
+        uri = "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def engine_options_from_env():
+    options = {"pool_pre_ping": True}
+    for option, variable, convert in ENGINE_OPTIONS:
+        value = os.getenv(variable)
+        if value:
+            options[option] = convert(value)
+    return options
@@ -1,39 +1,180 @@
-from .models import Income, Expenses, Planning
+from datetime import date as date_type, datetime
 
+from sqlalchemy import tuple_
 
-def filter_reports(
-    user_id, amount_query=None, name_query=None, date=None, report_type=None
+from . import db
+from .cache import cached_result
+from .models import Ledger, LedgerArchive, INCOME, EXPENSES, PLANNING
+from .money import to_money
+from .projections import report_columns, to_report_rows
+from .search import LEDGER_FTS, MIN_MATCH_LENGTH, has_name_index, match_phrase
+from .finances.ledger_archive import needs_archive
+from .finances.user_balance import get_data_version
+
+REPORT_TYPES = {
+    "Income": INCOME,
+    "Expenses": EXPENSES,
+    "Planning Expenses": PLANNING,
+}
+PAGE_SIZE = 50
+SORT_KEYS = ("date", "amount", "name")
+
+
+def encode_cursor(report, sort="date"):
+    value = getattr(report, sort)
+    if sort == "date":
+        value = value.isoformat()
+    return f"{value}_{report.id}"
+
+
+def decode_cursor(value, sort="date"):
+    if not value:
+        return None
+    try:
+        key, report_id = value.rsplit("_", 1)
+        if sort == "date":
+            key = datetime.strptime(key, "%Y-%m-%d").date()
+        elif sort == "amount":
+            key = to_money(key)
+        return key, int(report_id)
+    except ValueError:
+        return None
+
+
+def _filtered_query(
+    model, user_id, amount_query, name_query, date, report_type,
+    amount_min, amount_max, start_date, end_date
 ):
-    income_query = Income.query.filter_by(user_id=user_id)
-    expenses_query = Expenses.query.filter_by(user_id=user_id)
-    planning_query = Planning.query.filter_by(user_id=user_id)
-
-    if report_type == "Income":
-        expenses_query = expenses_query.filter(Expenses.id == None)
-        planning_query = planning_query.filter(Planning.id == None)
-    elif report_type == "Expenses":
-        income_query = income_query.filter(Income.id == None)
-        planning_query = planning_query.filter(Planning.id == None)
-    elif report_type == "Planning Expenses":
-        income_query = income_query.filter(Income.id == None)
-        expenses_query = expenses_query.filter(Expenses.id == None)
+    query = db.session.query(*report_columns(model)).filter(
+        model.user_id == user_id
+    )
+
+    if report_type in REPORT_TYPES:
+        query = query.filter(model.kind == REPORT_TYPES[report_type])
 
     if name_query:
-        income_query = income_query.filter(Income.name.like(f"%{name_query}%"))
-        expenses_query = expenses_query.filter(Expenses.name.like(f"%{name_query}%"))
-        planning_query = planning_query.filter(Planning.name.like(f"%{name_query}%"))
+        if (
+            model is Ledger
+            and len(name_query) >= MIN_MATCH_LENGTH
+            and has_name_index()
+        ):
+            query = query.join(LEDGER_FTS, LEDGER_FTS.c.rowid == model.id).filter(
+                LEDGER_FTS.c.name.op("MATCH")(match_phrase(name_query))
+            )
+        else:
+            query = query.filter(model.name.ilike(f"%{name_query}%"))
 
     if date:
-        income_query = income_query.filter(Income.date == date)
-        expenses_query = expenses_query.filter(Expenses.date == date)
-        planning_query = planning_query.filter(Planning.date == date)
+        query = query.filter(model.date == date)
 
     if amount_query:
-        income_query = income_query.filter(Income.amount == float(amount_query))
-        expenses_query = expenses_query.filter(Expenses.amount == float(amount_query))
-        planning_query = planning_query.filter(Planning.amount == float(amount_query))
-
-    income = income_query.all()
-    expenses = expenses_query.all()
-    planning = planning_query.all()
-    return {"income": income, "expenses": expenses, "planning": planning}
\ No newline at end of file
+        query = query.filter(model.amount == to_money(amount_query))
+
+    if amount_min:
+        query = query.filter(model.amount >= to_money(amount_min))
+
+    if amount_max:
+        query = query.filter(model.amount <= to_money(amount_max))
+
+    if start_date:
+        query = query.filter(model.date >= start_date)
+
+    if end_date:
+        query = query.filter(model.date <= end_date)
+
+    return query
+
+
+def _page_rows(query, model, sort, descending, after, before, limit):
+    column = getattr(model, sort)
+    key = tuple_(column, model.id)
+    backwards = before is not None
+    cursor = before if backwards else after
+    if descending != backwards:
+        if cursor:
+            query = query.filter(key < cursor)
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        if cursor:
+            query = query.filter(key > cursor)
+        query = query.order_by(column, model.id)
+    return to_report_rows(query.limit(limit))
+
+
+def _earliest_date(date, start_date, end_date):
+    if date:
+        return date
+    if start_date:
+        return start_date
+    if end_date:
+        return date_type.min
+    return None
+
+
+def filter_reports(
+    user_id, amount_query=None, name_query=None, date=None, report_type=None,
+    amount_min=None, amount_max=None, start_date=None, end_date=None,
+    sort="date", descending=True, after=None, before=None,
+    page_size=PAGE_SIZE
+):
+    if sort not in SORT_KEYS:
+        sort = "date"
+    if report_type not in REPORT_TYPES:
+        report_type = None
+    key = (
+        "reports", amount_query or None, name_query or None, date,
+        report_type, amount_min, amount_max, start_date, end_date,
+        sort, bool(descending), after or None, before or None, page_size,
+    )
+    return cached_result(
+        user_id,
+        get_data_version(user_id),
+        key,
+        lambda: _filter_reports(
+            user_id, amount_query, name_query, date, report_type,
+            amount_min, amount_max, start_date, end_date,
+            sort, descending, after, before, page_size,
+        ),
+    )
+
+
+def _filter_reports(
+    user_id, amount_query, name_query, date, report_type,
+    amount_min, amount_max, start_date, end_date,
+    sort, descending, after, before, page_size
+):
+    after = decode_cursor(after, sort)
+    before = decode_cursor(before, sort)
+    filters = (
+        user_id, amount_query, name_query, date, report_type,
+        amount_min, amount_max, start_date, end_date,
+    )
+    page = (sort, descending, after, before, page_size + 1)
+
+    rows = _page_rows(_filtered_query(Ledger, *filters), Ledger, *page)
+    if needs_archive(user_id, _earliest_date(date, start_date, end_date)):
+        rows += _page_rows(
+            _filtered_query(LedgerArchive, *filters), LedgerArchive, *page
+        )
+        rows.sort(
+            key=lambda report: (getattr(report, sort), report.id),
+            reverse=descending != bool(before),
+        )
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if before:
+        rows.reverse()
+
+    next_cursor = None
+    prev_cursor = None
+    if rows and (before or has_more):
+        next_cursor = encode_cursor(rows[-1], sort)
+    if rows and (after or (before and has_more)):
+        prev_cursor = encode_cursor(rows[0], sort)
+
+    return {
+        "reports": rows,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
@@ -3,8 +3,16 @@ from flask import flash
 from ..models import Income as IncomeModel
 from ..models import Expenses as ExpensesModel
 from ..models import Planning as PlanningModel
+from ..models import LedgerArchive, INCOME, EXPENSES, PLANNING
+from .ledger_sync import record_ledger_change
 from .. import db
 
+DELETE_PREFIXES = {
+    INCOME: 'delI',
+    EXPENSES: 'delE',
+    PLANNING: 'delP',
+}
+
 
 def process_delete_request(request, current_user):
     delete = request.form.get('delete')
@@ -14,21 +22,33 @@ def process_delete_request(request, current_user):
         delete_id = delete_parts[1]
 
         report = None
+        kind = None
         if delete_type == 'delI':
+            kind = INCOME
             report = IncomeModel.query.filter_by(
                 id=delete_id, user_id=current_user.id
             ).first()
         elif delete_type == 'delE':
+            kind = EXPENSES
             report = ExpensesModel.query.filter_by(
                 id=delete_id, user_id=current_user.id
             ).first()
         elif delete_type == 'delP':
+            kind = PLANNING
             report = PlanningModel.query.filter_by(
                 id=delete_id, user_id=current_user.id
             ).first()
 
+        if report is None and kind is not None:
+            report = LedgerArchive.query.filter_by(
+                id=delete_id, user_id=current_user.id, kind=kind
+            ).first()
+
         if report:
             db.session.delete(report)
+            record_ledger_change(
+                current_user.id, report.kind, report.date, -report.amount
+            )
             db.session.commit()
             flash('Deleted successfully!', 'success')
         else:
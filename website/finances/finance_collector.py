@@ -1,5 +1,7 @@
 from flask import flash
 
+from ..money import to_money
+
 
 class Savings:
 
@@ -15,7 +17,7 @@ class Savings:
             flash('Amount cannot be empty', 'error')
             return False
         try:
-            self.amount = float(self.amount)
+            self.amount = to_money(self.amount)
         except ValueError:
             flash('Amount must be a valid number', 'error')
             return False
@@ -1,6 +1,8 @@
 from flask import flash
 from datetime import datetime
 
+from ..money import to_money
+
 
 class Income:
 
@@ -16,7 +18,7 @@ class Income:
             flash('Amount cannot be empty', 'error')
             return False
         try:
-            self.amount = float(self.amount)
+            self.amount = to_money(self.amount)
         except ValueError:
             flash('Amount must be a valid number', 'error')
             return False
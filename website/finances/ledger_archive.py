@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+from sqlalchemy import Date, bindparam, func, text
+
+from ..models import LedgerArchive
+from .. import db
+
+ARCHIVE_AFTER_DAYS = 730
+ARCHIVE_COLUMNS = "id, kind, amount, name, date, type_id, user_id"
+
+
+def archive_cutoff(user_id):
+    return (
+        db.session.query(func.max(LedgerArchive.date))
+        .filter(LedgerArchive.user_id == user_id)
+        .scalar()
+    )
+
+
+def needs_archive(user_id, start_date):
+    if start_date is None:
+        return False
+    cutoff = archive_cutoff(user_id)
+    return cutoff is not None and start_date <= cutoff
+
+
+def archive_old_rows(older_than_days=ARCHIVE_AFTER_DAYS, batch_size=1000):
+    cutoff = date.today() - timedelta(days=older_than_days)
+    engine = db.session.get_bind(mapper=LedgerArchive)
+    with engine.connect() as conn:
+        max_id = conn.execute(text("SELECT MAX(id) FROM ledger")).scalar() or 0
+
+    batch_filter = "WHERE id > :low AND id <= :high AND date < :cutoff"
+    move = text(
+        f"INSERT INTO ledger_archive ({ARCHIVE_COLUMNS}) "
+        f"SELECT {ARCHIVE_COLUMNS} FROM ledger {batch_filter}"
+    ).bindparams(bindparam("cutoff", type_=Date))
+    remove = text(f"DELETE FROM ledger {batch_filter}").bindparams(
+        bindparam("cutoff", type_=Date)
+    )
+    # Cached pages keyed on the data version must not outlive the move.
+    bump_versions = text(
+        "UPDATE user_balance SET version = version + 1 WHERE user_id IN "
+        f"(SELECT DISTINCT user_id FROM ledger {batch_filter})"
+    ).bindparams(bindparam("cutoff", type_=Date))
+
+    moved = 0
+    for low in range(0, max_id, batch_size):
+        batch = {"low": low, "high": low + batch_size, "cutoff": cutoff}
+        with engine.begin() as conn:
+            conn.execute(bump_versions, batch)
+            moved += conn.execute(move, batch).rowcount
+            conn.execute(remove, batch)
+    return moved
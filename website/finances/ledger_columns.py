@@ -0,0 +1,121 @@
+from datetime import date
+
+import numpy as np
+from sqlalchemy import Integer, type_coerce
+
+from ..cache import cached_columns, request_cached
+from ..models import Ledger, LedgerArchive, KIND_NAMES, INCOME, EXPENSES
+from ..money import from_cents
+from .. import db
+from .user_balance import get_data_version
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NO_DAY = np.iinfo(np.int32).min
+
+
+def day_number(day):
+    return day.toordinal() - EPOCH_ORDINAL
+
+
+def _day_date(number):
+    return date.fromordinal(int(number) + EPOCH_ORDINAL)
+
+
+def build_ledger_columns(rows):
+    dates, cents, kinds = zip(*rows) if rows else ((), (), ())
+    day = np.fromiter(
+        (NO_DAY if value is None else day_number(value) for value in dates),
+        dtype=np.int32,
+        count=len(dates),
+    )
+    order = np.argsort(day, kind="stable")
+
+    columns = {
+        "day": day[order],
+        "cents": np.array(cents, dtype=np.int64)[order],
+        "kind": np.array(kinds, dtype=np.uint8)[order],
+    }
+    columns["running"] = {}
+    for kind in KIND_NAMES:
+        mask = columns["kind"] == kind
+        columns["running"][kind] = (
+            columns["day"][mask],
+            np.concatenate(([0], np.cumsum(columns["cents"][mask]))),
+        )
+    return columns
+
+
+def _load_ledger_columns(user_id):
+    rows = []
+    for model in (Ledger, LedgerArchive):
+        rows += (
+            db.session.query(
+                model.date, type_coerce(model.amount, Integer), model.kind
+            )
+            .filter(model.user_id == user_id)
+            .all()
+        )
+    return build_ledger_columns(rows)
+
+
+def columns_nbytes(columns):
+    arrays = [columns["day"], columns["cents"], columns["kind"]]
+    for days, running in columns["running"].values():
+        arrays += [days, running]
+    return sum(array.nbytes for array in arrays)
+
+
+def load_ledger_columns(user_id):
+    return request_cached(
+        user_id,
+        "ledger_columns",
+        lambda: cached_columns(
+            user_id,
+            get_data_version(user_id),
+            lambda: _load_ledger_columns(user_id),
+            columns_nbytes,
+        ),
+    )
+
+
+def kind_totals(columns):
+    return {
+        kind: from_cents(int(columns["cents"][columns["kind"] == kind].sum()))
+        for kind in KIND_NAMES
+    }
+
+
+def period_totals(columns, periods):
+    totals = {}
+    for kind, (start_date, end_date) in periods.items():
+        days, running = columns["running"][kind]
+        low = np.searchsorted(days, day_number(start_date), side="left")
+        high = np.searchsorted(days, day_number(end_date), side="right")
+        totals[kind] = from_cents(int(running[max(high, low)] - running[low]))
+    return totals
+
+
+def monthly_totals(columns, kind):
+    mask = (columns["kind"] == kind) & (columns["day"] != NO_DAY)
+    months = columns["day"][mask].astype("datetime64[D]").astype("datetime64[M]")
+    unique, inverse = np.unique(months, return_inverse=True)
+    totals = np.zeros(len(unique), dtype=np.int64)
+    np.add.at(totals, inverse, columns["cents"][mask])
+    return [
+        (month.astype("datetime64[D]").item(), from_cents(int(total)))
+        for month, total in zip(unique, totals)
+    ]
+
+
+def cumulative_balance(columns):
+    mask = columns["day"] != NO_DAY
+    day = columns["day"][mask]
+    cents = columns["cents"][mask]
+    kind = columns["kind"][mask]
+    signed = np.where(kind == INCOME, cents, np.where(kind == EXPENSES, -cents, 0))
+    running = np.cumsum(signed)
+    last_of_day = np.append(day[1:] != day[:-1], True) if len(day) else day.astype(bool)
+    return [
+        (_day_date(number), from_cents(int(total)))
+        for number, total in zip(day[last_of_day], running[last_of_day])
+    ]
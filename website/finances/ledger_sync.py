@@ -0,0 +1,18 @@
+from ..cache import forget_request_cache
+from ..models import KIND_NAMES
+from .monthly_rollup import apply_rollup_change
+from .period_index import record_index_change
+from .user_balance import apply_balance_change
+
+
+def record_ledger_change(user_id, kind, day, amount):
+    version = apply_balance_change(user_id, KIND_NAMES[kind], amount)
+    apply_rollup_change(user_id, kind, day, amount)
+    record_index_change(user_id, version, kind, day, amount)
+    forget_request_cache(user_id)
+
+
+def record_savings_change(user_id, amount):
+    version = apply_balance_change(user_id, "savings", amount)
+    record_index_change(user_id, version)
+    forget_request_cache(user_id)
@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+
+from sqlalchemy import and_, case, delete, extract, func, or_, update
+
+from ..models import Ledger, LedgerArchive, MonthlyRollup
+from .. import db
+from .ledger_archive import needs_archive
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _raw_total(user_id, kind, start_date, end_date):
+    models = [Ledger]
+    if needs_archive(user_id, start_date):
+        models.append(LedgerArchive)
+    total = 0
+    for model in models:
+        total += (
+            db.session.query(func.sum(model.amount))
+            .filter(
+                model.user_id == user_id,
+                model.kind == kind,
+                model.date >= start_date,
+                model.date <= end_date,
+            )
+            .scalar()
+            or 0
+        )
+    return total
+
+
+def apply_rollup_change(user_id, kind, day, amount):
+    month = day.replace(day=1)
+    result = db.session.execute(
+        update(MonthlyRollup)
+        .where(
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.kind == kind,
+            MonthlyRollup.month == month,
+        )
+        .values(total=MonthlyRollup.total + amount)
+    )
+    if result.rowcount == 0:
+        total = _raw_total(user_id, kind, month, _next_month(month) - timedelta(days=1))
+        db.session.add(
+            MonthlyRollup(user_id=user_id, kind=kind, month=month, total=total)
+        )
+
+
+def _split_period(start_date, end_date):
+    full_start = start_date if start_date.day == 1 else _next_month(start_date)
+    full_end = _next_month(end_date)
+    if full_end - timedelta(days=1) != end_date:
+        full_end = end_date.replace(day=1)
+    if full_start >= full_end:
+        return None, [(start_date, end_date)]
+
+    edges = []
+    if start_date < full_start:
+        edges.append((start_date, full_start - timedelta(days=1)))
+    if full_end <= end_date:
+        edges.append((full_end, end_date))
+    return (full_start, full_end), edges
+
+
+def _conditional_totals(model, amount, user_id, conditions):
+    kinds = list(conditions)
+    row = (
+        db.session.query(
+            *(func.sum(case((conditions[kind], amount))) for kind in kinds)
+        )
+        .filter(model.user_id == user_id, or_(*conditions.values()))
+        .one()
+    )
+    return {kind: total or 0 for kind, total in zip(kinds, row)}
+
+
+def get_period_totals_by_kind(user_id, periods):
+    totals = {kind: 0 for kind in periods}
+    months = {}
+    edges = {}
+    for kind, (start_date, end_date) in periods.items():
+        if start_date > end_date:
+            continue
+        span, kind_edges = _split_period(start_date, end_date)
+        if span:
+            months[kind] = span
+        if kind_edges:
+            edges[kind] = kind_edges
+
+    partials = []
+    if months:
+        partials.append(
+            _conditional_totals(
+                MonthlyRollup,
+                MonthlyRollup.total,
+                user_id,
+                {
+                    kind: and_(
+                        MonthlyRollup.kind == kind,
+                        MonthlyRollup.month >= full_start,
+                        MonthlyRollup.month < full_end,
+                    )
+                    for kind, (full_start, full_end) in months.items()
+                },
+            )
+        )
+    if edges:
+        earliest = min(start for ranges in edges.values() for start, _ in ranges)
+        models = [Ledger]
+        if needs_archive(user_id, earliest):
+            models.append(LedgerArchive)
+        for model in models:
+            partials.append(
+                _conditional_totals(
+                    model,
+                    model.amount,
+                    user_id,
+                    {
+                        kind: and_(
+                            model.kind == kind,
+                            or_(*(model.date.between(*edge) for edge in ranges)),
+                        )
+                        for kind, ranges in edges.items()
+                    },
+                )
+            )
+
+    for partial in partials:
+        for kind, total in partial.items():
+            totals[kind] += total
+    return totals
+
+
+def rebuild_monthly_rollups():
+    db.session.execute(delete(MonthlyRollup))
+    totals = {}
+    for model in (Ledger, LedgerArchive):
+        year = extract("year", model.date)
+        month = extract("month", model.date)
+        monthly_totals = (
+            db.session.query(
+                model.user_id, model.kind, year, month, func.sum(model.amount)
+            )
+            .filter(model.date.isnot(None))
+            .group_by(model.user_id, model.kind, year, month)
+        )
+        for user_id, kind, year_value, month_value, total in monthly_totals:
+            key = (user_id, kind, date(int(year_value), int(month_value), 1))
+            totals[key] = totals.get(key, 0) + total
+    for (user_id, kind, month), total in totals.items():
+        db.session.add(
+            MonthlyRollup(user_id=user_id, kind=kind, month=month, total=total)
+        )
+    db.session.commit()
+    return len(totals)
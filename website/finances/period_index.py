@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from ..models import Ledger, LedgerArchive, KIND_NAMES
+from .. import db
+from .user_balance import get_data_version
+
+INDEX_USERS = 128
+HEADROOM_DAYS = 366
+CHANGES_KEY = "period_index_changes"
+
+_indexes = OrderedDict()
+_lock = Lock()
+
+
+def _max_users():
+    return current_app.config.get("PERIOD_INDEX_USERS", INDEX_USERS)
+
+
+def _fenwick_add(tree, position, amount):
+    position += 1
+    while position < len(tree):
+        tree[position] += amount
+        position += position & -position
+
+
+def _fenwick_prefix(tree, position):
+    total = 0
+    while position > 0:
+        total += tree[position]
+        position -= position & -position
+    return total
+
+
+def _fenwick_from(values):
+    tree = [0] + values
+    for position in range(1, len(tree)):
+        parent = position + (position & -position)
+        if parent < len(tree):
+            tree[parent] += tree[position]
+    return tree
+
+
+def _build_index(user_id, version):
+    daily = {}
+    for model in (Ledger, LedgerArchive):
+        day_totals = (
+            db.session.query(model.kind, model.date, func.sum(model.amount))
+            .filter(model.user_id == user_id, model.date.isnot(None))
+            .group_by(model.kind, model.date)
+        )
+        for kind, day, total in day_totals:
+            key = (kind, day.toordinal())
+            daily[key] = daily.get(key, 0) + total
+
+    ordinals = [ordinal for _, ordinal in daily] or [date.today().toordinal()]
+    origin = min(ordinals) - HEADROOM_DAYS
+    size = max(ordinals) + HEADROOM_DAYS - origin + 1
+    trees = {}
+    for kind in KIND_NAMES:
+        values = [0] * size
+        for (total_kind, ordinal), total in daily.items():
+            if total_kind == kind:
+                values[ordinal - origin] = total
+        trees[kind] = _fenwick_from(values)
+    return {"version": version, "origin": origin, "size": size, "trees": trees}
+
+
+def _range_total(index, kind, start_date, end_date):
+    low = max(start_date.toordinal() - index["origin"], 0)
+    high = min(end_date.toordinal() - index["origin"] + 1, index["size"])
+    if low >= high:
+        return 0
+    tree = index["trees"][kind]
+    return _fenwick_prefix(tree, high) - _fenwick_prefix(tree, low)
+
+
+def get_indexed_period_totals(user_id, periods):
+    max_users = _max_users()
+    if max_users <= 0:
+        return None
+
+    version = get_data_version(user_id)
+    with _lock:
+        index = _indexes.get(user_id)
+        if index is not None and index["version"] == version:
+            _indexes.move_to_end(user_id)
+        else:
+            index = None
+    if index is None:
+        index = _build_index(user_id, version)
+        with _lock:
+            _indexes[user_id] = index
+            _indexes.move_to_end(user_id)
+            while len(_indexes) > max_users:
+                _indexes.popitem(last=False)
+
+    with _lock:
+        return {
+            kind: _range_total(index, kind, start_date, end_date)
+            for kind, (start_date, end_date) in periods.items()
+        }
+
+
+def record_index_change(user_id, version, kind=None, day=None, amount=0):
+    changes = db.session.info.setdefault(CHANGES_KEY, {})
+    change = changes.setdefault(
+        user_id, {"first": version, "last": version, "deltas": []}
+    )
+    if version is None or change["first"] is None:
+        change["first"] = None
+    else:
+        change["last"] = version
+    if kind is not None:
+        change["deltas"].append((kind, day, amount))
+
+
+def _apply_changes(user_id, change):
+    index = _indexes.get(user_id)
+    if index is None:
+        return
+    if change["first"] is None or index["version"] != change["first"] - 1:
+        del _indexes[user_id]
+        return
+    for kind, day, amount in change["deltas"]:
+        position = day.toordinal() - index["origin"]
+        if not 0 <= position < index["size"]:
+            del _indexes[user_id]
+            return
+        _fenwick_add(index["trees"][kind], position, amount)
+    index["version"] = change["last"]
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session):
+    changes = session.info.pop(CHANGES_KEY, None)
+    if not changes:
+        return
+    with _lock:
+        for user_id, change in changes.items():
+            _apply_changes(user_id, change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(CHANGES_KEY, None)
+
+
+def clear_period_indexes():
+    with _lock:
+        _indexes.clear()
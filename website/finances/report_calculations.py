@@ -1,23 +1,8 @@
-from ..models import Income as IncomeModel
-from ..models import Expenses as ExpensesModel
-from ..models import Planning as PlanningModel
-from ..models import Savings as SavingsModel
-
-
-def get_financial_data(user_id):
-    income = IncomeModel.query.filter_by(user_id=user_id).all()
-    expenses = ExpensesModel.query.filter_by(user_id=user_id).all()
-    planning = PlanningModel.query.filter_by(user_id=user_id).all()
-    savings = SavingsModel.query.filter_by(user_id=user_id).all()
-    return income, expenses, planning, savings
-
-
-def calculate_totals(income, expenses, planning, savings):
-    total_income = sum(i.amount for i in income)
-    total_expenses = sum(e.amount for e in expenses)
-    total_planning = sum(p.amount for p in planning)
-    total_savings = sum(s.amount for s in savings)
-    return total_income, total_expenses, total_planning, total_savings
+from ..models import INCOME, EXPENSES, PLANNING
+from ..cache import cached_result
+from .monthly_rollup import get_period_totals_by_kind
+from .period_index import get_indexed_period_totals
+from .user_balance import get_data_version
 
 
 def calculate_balance_and_coverage(
@@ -30,35 +15,46 @@ def calculate_balance_and_coverage(
     return balance, cover
 
 
-def get_period_data(
-    income, expenses, planning,
+def get_period_totals(
+    user_id,
     Istart_date, Iend_date,
     Estart_date, Eend_date,
     Pstart_date, Pend_date
 ):
-    period_income = []
+    ranges = (
+        Istart_date, Iend_date,
+        Estart_date, Eend_date,
+        Pstart_date, Pend_date,
+    )
+    if not any(ranges):
+        return 0, 0, 0
+    return cached_result(
+        user_id,
+        get_data_version(user_id),
+        ("period_totals",) + ranges,
+        lambda: _period_totals(user_id, *ranges),
+    )
+
+
+def _period_totals(
+    user_id,
+    Istart_date, Iend_date,
+    Estart_date, Eend_date,
+    Pstart_date, Pend_date
+):
+    periods = {}
     if Istart_date and Iend_date:
-        period_income = [
-            i for i in income if Istart_date <= i.date <= Iend_date
-        ]
-
-    period_expenses = []
+        periods[INCOME] = (Istart_date, Iend_date)
     if Estart_date and Eend_date:
-        period_expenses = [
-            e for e in expenses if Estart_date <= e.date <= Eend_date
-        ]
-
-    period_planning = []
+        periods[EXPENSES] = (Estart_date, Eend_date)
     if Pstart_date and Pend_date:
-        period_planning = [
-            p for p in planning if Pstart_date <= p.date <= Pend_date
-        ]
-
-    return period_income, period_expenses, period_planning
-
-
-def calculate_period_totals(period_income, period_expenses, period_planning):
-    total_period_income = sum(i.amount for i in period_income)
-    total_period_expenses = sum(e.amount for e in period_expenses)
-    total_period_planning = sum(p.amount for p in period_planning)
-    return total_period_income, total_period_expenses, total_period_planning
\ No newline at end of file
+        periods[PLANNING] = (Pstart_date, Pend_date)
+
+    totals = get_indexed_period_totals(user_id, periods)
+    if totals is None:
+        totals = get_period_totals_by_kind(user_id, periods)
+    return (
+        totals.get(INCOME, 0),
+        totals.get(EXPENSES, 0),
+        totals.get(PLANNING, 0),
+    )
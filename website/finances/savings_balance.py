@@ -0,0 +1,34 @@
+from sqlalchemy import func, select
+
+from ..models import Savings as SavingsModel
+from .. import db
+from ..cache import request_cached
+
+
+def _latest_balance(user_id):
+    return (
+        select(SavingsModel.balance)
+        .where(SavingsModel.user_id == user_id)
+        .order_by(SavingsModel.id.desc())
+        .limit(1)
+    )
+
+
+def next_savings_balance(user_id, amount):
+    return func.coalesce(_latest_balance(user_id).scalar_subquery(), 0) + amount
+
+
+def get_savings_balance(user_id):
+    return request_cached(
+        user_id,
+        "savings_balance",
+        lambda: db.session.execute(_latest_balance(user_id)).scalar() or 0,
+    )
+
+
+def get_savings_history(user_id):
+    return db.session.execute(
+        select(SavingsModel.id, SavingsModel.amount, SavingsModel.balance)
+        .where(SavingsModel.user_id == user_id)
+        .order_by(SavingsModel.id)
+    ).all()
@@ -2,10 +2,15 @@ from flask import flash, redirect, url_for
 
 from ..models import Savings as SavingsModel
 from .. import db
+from ..money import to_money
 from .finance_collector import Transfer, Withdraw
+from .ledger_sync import record_savings_change
+from .report_calculations import calculate_balance_and_coverage
+from .savings_balance import get_savings_balance, next_savings_balance
+from .user_balance import get_user_balance
 
 
-def handle_transfer(request, current_user, balance):
+def handle_transfer(request, current_user):
     transfer_amount_str = request.form.get('transfer-amount')
 
     if not transfer_amount_str:
@@ -13,17 +18,27 @@ def handle_transfer(request, current_user, balance):
         return redirect(url_for('report.home'))
 
     try:
-        transfer_amount = abs(float(transfer_amount_str))
+        transfer_amount = abs(to_money(transfer_amount_str))
     except ValueError:
         flash('Invalid transfer amount. Please enter a number.', 'error')
         return redirect(url_for('report.home'))
 
     user_id = current_user.id
+    user_balance = get_user_balance(user_id)
+    balance, _ = calculate_balance_and_coverage(
+        user_balance.income, user_balance.expenses,
+        user_balance.savings, user_balance.planning
+    )
     transfer = Transfer(transfer_amount, user_id, balance)
 
     if transfer.check_input():
-        new_transfer = SavingsModel(amount=transfer.amount, user_id=user_id)
+        new_transfer = SavingsModel(
+            amount=transfer.amount,
+            user_id=user_id,
+            balance=next_savings_balance(user_id, transfer.amount),
+        )
         db.session.add(new_transfer)
+        record_savings_change(user_id, transfer.amount)
         db.session.commit()
         flash('Transfer added successfully!', 'success')
     else:
@@ -32,7 +47,7 @@ def handle_transfer(request, current_user, balance):
     return redirect(url_for('report.home'))
 
 
-def handle_withdraw(request, current_user, total_savings):
+def handle_withdraw(request, current_user):
     transfer_amount_str = request.form.get('transfer-amount')
 
     if not transfer_amount_str:
@@ -40,17 +55,23 @@ def handle_withdraw(request, current_user, total_savings):
         return redirect(url_for('report.home'))
 
     try:
-        transfer_amount = -abs(float(transfer_amount_str))
+        transfer_amount = -abs(to_money(transfer_amount_str))
     except ValueError:
         flash('Invalid withdrawal amount. Please enter a number.', 'error')
         return redirect(url_for('report.home'))
 
     user_id = current_user.id
+    total_savings = get_savings_balance(user_id)
     transfer = Withdraw(transfer_amount, user_id, total_savings)
 
     if transfer.check_input():
-        new_transfer = SavingsModel(amount=transfer.amount, user_id=user_id)
+        new_transfer = SavingsModel(
+            amount=transfer.amount,
+            user_id=user_id,
+            balance=next_savings_balance(user_id, transfer.amount),
+        )
         db.session.add(new_transfer)
+        record_savings_change(user_id, transfer.amount)
         db.session.commit()
         flash('Withdrawal added successfully!', 'success')
     else:
@@ -3,9 +3,11 @@ from flask import flash
 from ..models import Income as IncomeModel
 from ..models import Expenses as ExpensesModel
 from ..models import Planning as PlanningModel
+from ..models import INCOME, EXPENSES, PLANNING
 from .finance_management import Income as IncomeClass
 from .finance_management import Expenses as ExpensesClass
 from .finance_management import Planning as PlanningClass
+from .ledger_sync import record_ledger_change
 from .. import db
 
 
@@ -16,6 +18,7 @@ def process_form_submission(request, current_user):
     name = None
     date = None
     item_type = None
+    kind = None
     ItemClass = None
     ItemModel = None
 
@@ -24,6 +27,7 @@ def process_form_submission(request, current_user):
         name = request.form.get('nameI')
         date = request.form.get('dateI')
         item_type = "Income"
+        kind = INCOME
         ItemClass = IncomeClass
         ItemModel = IncomeModel
     elif submit == 'expenses':
@@ -31,6 +35,7 @@ def process_form_submission(request, current_user):
         name = request.form.get('nameE')
         date = request.form.get('dateE')
         item_type = "Expenses"
+        kind = EXPENSES
         ItemClass = ExpensesClass
         ItemModel = ExpensesModel
     elif submit == 'planning':
@@ -38,6 +43,7 @@ def process_form_submission(request, current_user):
         name = request.form.get('nameP')
         date = request.form.get('dateP')
         item_type = "Planning"
+        kind = PLANNING
         ItemClass = PlanningClass
         ItemModel = PlanningModel
     else:
@@ -54,6 +60,7 @@ def process_form_submission(request, current_user):
             user_id=current_user.id,
         )
         db.session.add(new_item)
+        record_ledger_change(current_user.id, kind, item.date, item.amount)
         db.session.commit()
         flash(f'{item_type} added successfully!', 'success')
     else:
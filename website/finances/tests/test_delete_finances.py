@@ -1,12 +1,18 @@
 import unittest
+import datetime
+from decimal import Decimal
 from unittest.mock import patch, Mock
 
 from website.finances.delete_finances import process_delete_request
+from website.models import INCOME, EXPENSES, PLANNING
 
 
 class MockModelInstance:
-    def __init__(self, id):
+    def __init__(self, id, kind=INCOME, amount=Decimal("10.00")):
         self.id = id
+        self.kind = kind
+        self.amount = amount
+        self.date = datetime.date(2025, 5, 1)
 
 
 class TestDeleteFinances(unittest.TestCase):
@@ -16,6 +22,16 @@ class TestDeleteFinances(unittest.TestCase):
         self.mock_user.id = 1
         self.mock_request = Mock()
         self.mock_request.form = {}
+        self.patcher_balance = patch(
+            'website.finances.delete_finances.record_ledger_change'
+        )
+        self.mock_record_change = self.patcher_balance.start()
+        self.addCleanup(self.patcher_balance.stop)
+        self.patcher_archive = patch(
+            'website.finances.delete_finances.LedgerArchive'
+        )
+        self.MockLedgerArchive = self.patcher_archive.start()
+        self.addCleanup(self.patcher_archive.stop)
 
     @patch('website.finances.delete_finances.flash')
     @patch('website.finances.delete_finances.db')
@@ -28,7 +44,9 @@ class TestDeleteFinances(unittest.TestCase):
     ):
         self.mock_request.form = {'delete': 'delI_10'}
         delete_id = 10
-        mock_income_instance = MockModelInstance(id=delete_id)
+        mock_income_instance = MockModelInstance(
+            id=delete_id, kind=INCOME, amount=Decimal("100.50")
+        )
         MockIncomeModel.query.filter_by.return_value.first.return_value = (
             mock_income_instance
         )
@@ -41,6 +59,9 @@ class TestDeleteFinances(unittest.TestCase):
         MockExpensesModel.query.filter_by.assert_not_called()
         MockPlanningModel.query.filter_by.assert_not_called()
         mock_db.session.delete.assert_called_once_with(mock_income_instance)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, INCOME, datetime.date(2025, 5, 1), Decimal("-100.50")
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Deleted successfully!', 'success'
@@ -57,7 +78,9 @@ class TestDeleteFinances(unittest.TestCase):
     ):
         self.mock_request.form = {'delete': 'delE_25'}
         delete_id = 25
-        mock_expense_instance = MockModelInstance(id=delete_id)
+        mock_expense_instance = MockModelInstance(
+            id=delete_id, kind=EXPENSES, amount=Decimal("25.00")
+        )
         MockExpensesModel.query.filter_by.return_value.first.return_value = (
             mock_expense_instance
         )
@@ -70,6 +93,9 @@ class TestDeleteFinances(unittest.TestCase):
         MockIncomeModel.query.filter_by.assert_not_called()
         MockPlanningModel.query.filter_by.assert_not_called()
         mock_db.session.delete.assert_called_once_with(mock_expense_instance)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, EXPENSES, datetime.date(2025, 5, 1), Decimal("-25.00")
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Deleted successfully!', 'success'
@@ -86,7 +112,9 @@ class TestDeleteFinances(unittest.TestCase):
     ):
         self.mock_request.form = {'delete': 'delP_5'}
         delete_id = 5
-        mock_planning_instance = MockModelInstance(id=delete_id)
+        mock_planning_instance = MockModelInstance(
+            id=delete_id, kind=PLANNING, amount=Decimal("300.00")
+        )
         MockPlanningModel.query.filter_by.return_value.first.return_value = (
             mock_planning_instance
         )
@@ -101,6 +129,9 @@ class TestDeleteFinances(unittest.TestCase):
         mock_db.session.delete.assert_called_once_with(
             mock_planning_instance
         )
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, PLANNING, datetime.date(2025, 5, 1), Decimal("-300.00")
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Deleted successfully!', 'success'
@@ -118,16 +149,47 @@ class TestDeleteFinances(unittest.TestCase):
         self.mock_request.form = {'delete': 'delI_99'}
         delete_id = 99
         MockIncomeModel.query.filter_by.return_value.first.return_value = None
+        self.MockLedgerArchive.query.filter_by.return_value.first.return_value = None
 
         process_delete_request(self.mock_request, self.mock_user)
 
         MockIncomeModel.query.filter_by.assert_called_once_with(
             id=str(delete_id), user_id=self.mock_user.id
         )
+        self.MockLedgerArchive.query.filter_by.assert_called_once_with(
+            id=str(delete_id), user_id=self.mock_user.id, kind=INCOME
+        )
         mock_db.session.delete.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_called_once_with('Failed to delete.', 'error')
 
+    @patch('website.finances.delete_finances.flash')
+    @patch('website.finances.delete_finances.db')
+    @patch('website.finances.delete_finances.PlanningModel')
+    @patch('website.finances.delete_finances.ExpensesModel')
+    @patch('website.finances.delete_finances.IncomeModel')
+    def test_delete_archived_record(
+        self, MockIncomeModel, MockExpensesModel, MockPlanningModel, mock_db,
+        mock_flash
+    ):
+        self.mock_request.form = {'delete': 'delE_4'}
+        archived = MockModelInstance(id=4, kind=EXPENSES, amount=Decimal("8.00"))
+        MockExpensesModel.query.filter_by.return_value.first.return_value = None
+        self.MockLedgerArchive.query.filter_by.return_value.first.return_value = archived
+
+        process_delete_request(self.mock_request, self.mock_user)
+
+        self.MockLedgerArchive.query.filter_by.assert_called_once_with(
+            id='4', user_id=self.mock_user.id, kind=EXPENSES
+        )
+        mock_db.session.delete.assert_called_once_with(archived)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, EXPENSES, archived.date, Decimal("-8.00")
+        )
+        mock_db.session.commit.assert_called_once()
+        mock_flash.assert_called_once_with('Deleted successfully!', 'success')
+
     @patch('website.finances.delete_finances.flash')
     @patch('website.finances.delete_finances.db')
     @patch('website.finances.delete_finances.PlanningModel')
@@ -145,6 +207,7 @@ class TestDeleteFinances(unittest.TestCase):
         MockExpensesModel.query.filter_by.assert_not_called()
         MockPlanningModel.query.filter_by.assert_not_called()
         mock_db.session.delete.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_called_once_with('Failed to delete.', 'error')
 
@@ -165,6 +228,7 @@ class TestDeleteFinances(unittest.TestCase):
         MockExpensesModel.query.filter_by.assert_not_called()
         MockPlanningModel.query.filter_by.assert_not_called()
         mock_db.session.delete.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_not_called()
 
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import patch, Mock
 import datetime
+from decimal import Decimal
 
 from website.finances.finance_management import Income, Expenses, Planning
 
@@ -44,6 +45,24 @@ class TestIncome(unittest.TestCase):
         self.assertEqual(income.date, datetime.date(2025, 5, 1))
         self.mock_flash.assert_not_called()
 
+    def test_check_input_amount_is_exact_cents(self):
+        income = Income(
+            amount="10.05", name="Bonus", date="2025-05-01", type="One-time",
+            user_id=1
+        )
+        self.assertTrue(income.check_input())
+        self.assertEqual(income.amount, Decimal("10.05"))
+
+    def test_check_input_amount_rounds_below_a_cent(self):
+        income = Income(
+            amount="0.001", name="Bonus", date="2025-05-01", type="One-time",
+            user_id=1
+        )
+        self.assertFalse(income.check_input())
+        self.mock_flash.assert_called_once_with(
+            'Amount must be greater than 0', 'error'
+        )
+
     def test_check_input_amount_empty(self):
         income = Income(
             amount="", name="Bonus", date="2025-05-01", type="One-time",
@@ -64,6 +83,18 @@ class TestIncome(unittest.TestCase):
             'Amount must be a valid number', 'error'
         )
 
+    def test_check_input_amount_too_large(self):
+        for amount in ["1e30", "1e18"]:
+            self.mock_flash.reset_mock()
+            income = Income(
+                amount=amount, name="Bonus", date="2025-05-01", type="One-time",
+                user_id=1
+            )
+            self.assertFalse(income.check_input())
+            self.mock_flash.assert_called_once_with(
+                'Amount must be a valid number', 'error'
+            )
+
     def test_check_input_amount_zero(self):
         income = Income(
             amount="0", name="Bonus", date="2025-05-01", type="One-time",
@@ -0,0 +1,117 @@
+import unittest
+import datetime
+from unittest.mock import patch, MagicMock
+
+from website import db
+from website.finances.ledger_archive import (
+    archive_old_rows,
+    needs_archive,
+)
+from website.filters import filter_reports
+from website.models import Expenses, LedgerArchive, UserBalance
+from website.testing import DatabaseTestCase
+
+PATCH_TARGET_DB = 'website.finances.ledger_archive.db'
+PATCH_TARGET_CUTOFF = 'website.finances.ledger_archive.archive_cutoff'
+
+
+class TestNeedsArchive(unittest.TestCase):
+
+    @patch(PATCH_TARGET_CUTOFF)
+    def test_open_range_stays_on_recent_rows(self, mock_cutoff):
+        self.assertFalse(needs_archive(1, None))
+        mock_cutoff.assert_not_called()
+
+    @patch(PATCH_TARGET_CUTOFF)
+    def test_range_starting_before_cutoff(self, mock_cutoff):
+        mock_cutoff.return_value = datetime.date(2022, 6, 30)
+
+        self.assertTrue(needs_archive(1, datetime.date(2022, 6, 30)))
+        self.assertFalse(needs_archive(1, datetime.date(2022, 7, 1)))
+        mock_cutoff.assert_called_with(1)
+
+    @patch(PATCH_TARGET_CUTOFF)
+    def test_user_without_archive(self, mock_cutoff):
+        mock_cutoff.return_value = None
+
+        self.assertFalse(needs_archive(1, datetime.date(2001, 1, 1)))
+
+
+class TestArchiveOldRows(unittest.TestCase):
+
+    @patch('website.finances.ledger_archive.date')
+    @patch(PATCH_TARGET_DB)
+    def test_moves_rows_in_id_batches(self, mock_db, mock_date):
+        mock_date.today.return_value = datetime.date(2025, 1, 31)
+        read_conn = MagicMock()
+        read_conn.execute.return_value.scalar.return_value = 26
+        mock_db.session.get_bind.return_value.connect.return_value.__enter__.return_value = read_conn
+        write_conn = MagicMock()
+        write_conn.execute.return_value.rowcount = 4
+        mock_db.session.get_bind.return_value.begin.return_value.__enter__.return_value = write_conn
+
+        moved = archive_old_rows(older_than_days=30, batch_size=10)
+
+        self.assertEqual(moved, 12)
+        calls = write_conn.execute.call_args_list
+        self.assertEqual(len(calls), 9)
+        self.assertTrue(str(calls[0].args[0]).startswith('UPDATE user_balance'))
+        self.assertTrue(str(calls[1].args[0]).startswith('INSERT INTO ledger_archive'))
+        self.assertTrue(str(calls[2].args[0]).startswith('DELETE FROM ledger'))
+        self.assertEqual(
+            [c.args[1]['high'] for c in calls[::3]], [10, 20, 30]
+        )
+        self.assertEqual(calls[0].args[1]['cutoff'], datetime.date(2025, 1, 1))
+
+    @patch(PATCH_TARGET_DB)
+    def test_empty_ledger(self, mock_db):
+        read_conn = MagicMock()
+        read_conn.execute.return_value.scalar.return_value = None
+        mock_db.session.get_bind.return_value.connect.return_value.__enter__.return_value = read_conn
+
+        self.assertEqual(archive_old_rows(), 0)
+        mock_db.session.get_bind.return_value.begin.assert_not_called()
+
+
+class TestArchivedIdsStayUnique(DatabaseTestCase):
+
+    def _add(self, name, day):
+        row = Expenses(user_id=1, amount=10, name=name, date=day)
+        db.session.add(row)
+        db.session.commit()
+        return row.id
+
+    def test_deleted_newest_row_does_not_free_archived_ids(self):
+        old = datetime.date(2020, 1, 1)
+        self.assertEqual([self._add('Old', old), self._add('Old', old)], [1, 2])
+        newest = self._add('New', datetime.date.today())
+        self.assertEqual(archive_old_rows(older_than_days=30), 2)
+
+        Expenses.query.filter_by(id=newest).delete()
+        db.session.commit()
+        self.assertEqual(self._add('Again', old), 4)
+
+        self.assertEqual(archive_old_rows(older_than_days=30), 1)
+        self.assertEqual(
+            [row.id for row in LedgerArchive.query.order_by(LedgerArchive.id)],
+            [1, 2, 4],
+        )
+
+
+    def test_archiving_bumps_the_owners_data_version(self):
+        self._add('Old', datetime.date(2020, 1, 1))
+        db.session.add_all([UserBalance(user_id=1), UserBalance(user_id=2)])
+        db.session.commit()
+        before = filter_reports(1)
+
+        archive_old_rows(older_than_days=30)
+        db.session.expire_all()
+
+        self.assertEqual(db.session.get(UserBalance, 1).version, 1)
+        self.assertEqual(db.session.get(UserBalance, 2).version, 0)
+        self.assertEqual([report.name for report in before['reports']], ['Old'])
+        self.assertEqual(filter_reports(1)['reports'], [])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,126 @@
+import unittest
+import datetime
+from decimal import Decimal
+
+import numpy as np
+
+from website import cache, db
+from website.finances.ledger_columns import (
+    build_ledger_columns,
+    columns_nbytes,
+    cumulative_balance,
+    kind_totals,
+    load_ledger_columns,
+    monthly_totals,
+    period_totals,
+)
+from website.models import Income, Expenses, LedgerArchive, INCOME, EXPENSES, PLANNING
+from website.testing import DatabaseTestCase
+
+ROWS = [
+    (datetime.date(2025, 2, 3), 5000, EXPENSES),
+    (datetime.date(2025, 1, 5), 300000, INCOME),
+    (datetime.date(2025, 1, 20), 12050, EXPENSES),
+    (datetime.date(2025, 2, 1), 300000, INCOME),
+    (datetime.date(2025, 9, 1), 150000, PLANNING),
+    (None, 700, EXPENSES),
+]
+
+
+class TestLedgerColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = build_ledger_columns(ROWS)
+
+    def test_columns_are_compact_and_sorted_by_day(self):
+        self.assertEqual(self.columns['day'].dtype, np.int32)
+        self.assertEqual(self.columns['cents'].dtype, np.int64)
+        self.assertEqual(self.columns['kind'].dtype, np.uint8)
+        self.assertTrue(np.all(np.diff(self.columns['day'].astype(np.int64)) >= 0))
+
+    def test_kind_totals(self):
+        self.assertEqual(kind_totals(self.columns), {
+            INCOME: Decimal('6000.00'),
+            EXPENSES: Decimal('177.50'),
+            PLANNING: Decimal('1500.00'),
+        })
+
+    def test_period_totals_are_inclusive(self):
+        totals = period_totals(self.columns, {
+            INCOME: (datetime.date(2025, 1, 5), datetime.date(2025, 2, 1)),
+            EXPENSES: (datetime.date(2025, 1, 21), datetime.date(2025, 12, 31)),
+            PLANNING: (datetime.date(2025, 1, 1), datetime.date(2025, 8, 31)),
+        })
+
+        self.assertEqual(totals, {
+            INCOME: Decimal('6000.00'),
+            EXPENSES: Decimal('50.00'),
+            PLANNING: Decimal('0.00'),
+        })
+
+    def test_reversed_period_is_zero(self):
+        totals = period_totals(self.columns, {
+            INCOME: (datetime.date(2025, 3, 1), datetime.date(2025, 1, 1)),
+        })
+
+        self.assertEqual(totals, {INCOME: Decimal('0.00')})
+
+    def test_monthly_totals_skip_undated_rows(self):
+        self.assertEqual(monthly_totals(self.columns, EXPENSES), [
+            (datetime.date(2025, 1, 1), Decimal('120.50')),
+            (datetime.date(2025, 2, 1), Decimal('50.00')),
+        ])
+
+    def test_cumulative_balance_by_day(self):
+        self.assertEqual(cumulative_balance(self.columns), [
+            (datetime.date(2025, 1, 5), Decimal('3000.00')),
+            (datetime.date(2025, 1, 20), Decimal('2879.50')),
+            (datetime.date(2025, 2, 1), Decimal('5879.50')),
+            (datetime.date(2025, 2, 3), Decimal('5829.50')),
+            (datetime.date(2025, 9, 1), Decimal('5829.50')),
+        ])
+
+    def test_empty_ledger(self):
+        columns = build_ledger_columns([])
+
+        self.assertEqual(kind_totals(columns)[INCOME], Decimal('0.00'))
+        self.assertEqual(monthly_totals(columns, INCOME), [])
+        self.assertEqual(cumulative_balance(columns), [])
+
+
+class TestLoadLedgerColumns(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        db.session.add_all([
+            Income(user_id=1, amount=Decimal('10.25'), name='Refund', date=datetime.date(2025, 1, 5)),
+            Expenses(user_id=1, amount=3, name='Coffee', date=datetime.date(2025, 1, 6)),
+            LedgerArchive(
+                user_id=1, kind=INCOME, amount=1, name='Old',
+                date=datetime.date(2022, 1, 1),
+            ),
+            Income(user_id=2, amount=99, name='Salary', date=datetime.date(2025, 1, 5)),
+        ])
+        db.session.commit()
+
+    def test_loads_ledger_and_archive_for_one_user(self):
+        columns = load_ledger_columns(1)
+
+        self.assertEqual(columns['cents'].tolist(), [100, 1025, 300])
+        self.assertEqual(kind_totals(columns)[INCOME], Decimal('11.25'))
+
+    def test_reuses_columns_until_data_changes(self):
+        first = load_ledger_columns(1)
+
+        self.assertIs(load_ledger_columns(1), first)
+
+    def test_columns_stay_out_of_the_report_cache(self):
+        columns = load_ledger_columns(1)
+
+        self.assertEqual(len(cache._entries), 0)
+        self.assertEqual(cache._columns[1][2], columns_nbytes(columns))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,51 @@
+import unittest
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from website.finances.ledger_sync import record_ledger_change, record_savings_change
+from website.models import EXPENSES
+
+PATCH_TARGET_BALANCE = 'website.finances.ledger_sync.apply_balance_change'
+PATCH_TARGET_ROLLUP = 'website.finances.ledger_sync.apply_rollup_change'
+PATCH_TARGET_INDEX = 'website.finances.ledger_sync.record_index_change'
+PATCH_TARGET_FORGET = 'website.finances.ledger_sync.forget_request_cache'
+
+
+class TestLedgerSync(unittest.TestCase):
+
+    @patch(PATCH_TARGET_FORGET)
+    @patch(PATCH_TARGET_INDEX)
+    @patch(PATCH_TARGET_ROLLUP)
+    @patch(PATCH_TARGET_BALANCE)
+    def test_record_ledger_change(
+        self, mock_balance, mock_rollup, mock_index, mock_forget
+    ):
+        mock_balance.return_value = 8
+        day = datetime.date(2025, 5, 3)
+
+        record_ledger_change(5, EXPENSES, day, Decimal('-12.00'))
+
+        mock_balance.assert_called_once_with(5, 'expenses', Decimal('-12.00'))
+        mock_rollup.assert_called_once_with(5, EXPENSES, day, Decimal('-12.00'))
+        mock_index.assert_called_once_with(5, 8, EXPENSES, day, Decimal('-12.00'))
+        mock_forget.assert_called_once_with(5)
+
+    @patch(PATCH_TARGET_FORGET)
+    @patch(PATCH_TARGET_INDEX)
+    @patch(PATCH_TARGET_ROLLUP)
+    @patch(PATCH_TARGET_BALANCE)
+    def test_record_savings_change(
+        self, mock_balance, mock_rollup, mock_index, mock_forget
+    ):
+        mock_balance.return_value = 9
+        record_savings_change(5, Decimal('20.00'))
+
+        mock_balance.assert_called_once_with(5, 'savings', Decimal('20.00'))
+        mock_rollup.assert_not_called()
+        mock_index.assert_called_once_with(5, 9)
+        mock_forget.assert_called_once_with(5)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,219 @@
+import unittest
+import datetime
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+from website import db
+from website.finances.monthly_rollup import (
+    _raw_total,
+    _split_period,
+    apply_rollup_change,
+    get_period_totals_by_kind,
+    rebuild_monthly_rollups,
+)
+from website.models import (
+    Income, Expenses, Planning, LedgerArchive, INCOME, EXPENSES, PLANNING
+)
+from website.testing import DatabaseTestCase
+
+PATCH_TARGET_DB = 'website.finances.monthly_rollup.db'
+PATCH_TARGET_RAW = 'website.finances.monthly_rollup._raw_total'
+PATCH_TARGET_ROLLUP = 'website.finances.monthly_rollup.MonthlyRollup'
+
+
+class TestApplyRollupChange(unittest.TestCase):
+
+    @patch(PATCH_TARGET_RAW)
+    @patch(PATCH_TARGET_DB)
+    def test_updates_existing_month(self, mock_db, mock_raw):
+        mock_db.session.execute.return_value.rowcount = 1
+
+        apply_rollup_change(1, INCOME, datetime.date(2025, 5, 17), Decimal('10.00'))
+
+        compiled = mock_db.session.execute.call_args.args[0].compile()
+        self.assertIn('SET total=(monthly_rollup.total + ', str(compiled))
+        self.assertIn(datetime.date(2025, 5, 1), compiled.params.values())
+        mock_raw.assert_not_called()
+        mock_db.session.add.assert_not_called()
+
+    @patch(PATCH_TARGET_ROLLUP)
+    @patch(PATCH_TARGET_RAW)
+    @patch(PATCH_TARGET_DB)
+    def test_creates_missing_month_from_raw_rows(self, mock_db, mock_raw, MockRollup):
+        mock_db.session.execute.return_value.rowcount = 0
+        mock_raw.return_value = Decimal('42.00')
+
+        with patch('website.finances.monthly_rollup.update'):
+            apply_rollup_change(1, EXPENSES, datetime.date(2024, 2, 10), Decimal('2.00'))
+
+        mock_raw.assert_called_once_with(
+            1, EXPENSES, datetime.date(2024, 2, 1), datetime.date(2024, 2, 29)
+        )
+        MockRollup.assert_called_once_with(
+            user_id=1, kind=EXPENSES, month=datetime.date(2024, 2, 1),
+            total=Decimal('42.00'),
+        )
+        mock_db.session.add.assert_called_once_with(MockRollup.return_value)
+
+
+class TestSplitPeriod(unittest.TestCase):
+
+    def test_range_inside_one_month_is_all_edge(self):
+        start = datetime.date(2025, 5, 3)
+        end = datetime.date(2025, 5, 20)
+
+        self.assertEqual(_split_period(start, end), (None, [(start, end)]))
+
+    def test_whole_months_have_no_edges(self):
+        self.assertEqual(
+            _split_period(datetime.date(2025, 1, 1), datetime.date(2025, 3, 31)),
+            ((datetime.date(2025, 1, 1), datetime.date(2025, 4, 1)), []),
+        )
+
+    def test_partial_months_become_edges(self):
+        self.assertEqual(
+            _split_period(datetime.date(2024, 12, 15), datetime.date(2025, 4, 10)),
+            (
+                (datetime.date(2025, 1, 1), datetime.date(2025, 4, 1)),
+                [
+                    (datetime.date(2024, 12, 15), datetime.date(2024, 12, 31)),
+                    (datetime.date(2025, 4, 1), datetime.date(2025, 4, 10)),
+                ],
+            ),
+        )
+
+    def test_adjacent_partial_months_are_one_edge(self):
+        start = datetime.date(2025, 1, 20)
+        end = datetime.date(2025, 2, 10)
+
+        self.assertEqual(_split_period(start, end), (None, [(start, end)]))
+
+
+class TestGetPeriodTotalsByKind(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        db.session.add_all([
+            Income(user_id=1, amount=100, name='Salary', date=datetime.date(2025, 1, 5)),
+            Income(user_id=1, amount=200, name='Salary', date=datetime.date(2025, 2, 5)),
+            Income(user_id=1, amount=7, name='Refund', date=datetime.date(2025, 3, 20)),
+            Expenses(user_id=1, amount=30, name='Food', date=datetime.date(2025, 1, 10)),
+            Expenses(user_id=1, amount=5, name='Bus', date=datetime.date(2025, 2, 25)),
+            Planning(user_id=1, amount=50, name='Trip', date=datetime.date(2025, 2, 1)),
+            Income(user_id=2, amount=1000, name='Salary', date=datetime.date(2025, 1, 5)),
+        ])
+        db.session.commit()
+        rebuild_monthly_rollups()
+
+    def test_mixed_ranges_for_every_kind(self):
+        with patch('website.finances.monthly_rollup.needs_archive', return_value=False):
+            totals = get_period_totals_by_kind(1, {
+                INCOME: (datetime.date(2025, 1, 1), datetime.date(2025, 3, 25)),
+                EXPENSES: (datetime.date(2025, 1, 15), datetime.date(2025, 2, 28)),
+                PLANNING: (datetime.date(2025, 2, 1), datetime.date(2025, 2, 28)),
+            })
+
+        self.assertEqual(
+            totals,
+            {INCOME: Decimal('307.00'), EXPENSES: Decimal('5.00'), PLANNING: Decimal('50.00')},
+        )
+
+    def test_range_inside_one_month_reads_ledger(self):
+        with patch('website.finances.monthly_rollup.needs_archive', return_value=False):
+            totals = get_period_totals_by_kind(1, {
+                INCOME: (datetime.date(2025, 3, 1), datetime.date(2025, 3, 20)),
+            })
+
+        self.assertEqual(totals, {INCOME: Decimal('7.00')})
+
+    def test_empty_and_reversed_ranges_are_zero(self):
+        totals = get_period_totals_by_kind(1, {
+            INCOME: (datetime.date(2026, 1, 1), datetime.date(2026, 1, 31)),
+            EXPENSES: (datetime.date(2025, 2, 1), datetime.date(2025, 1, 1)),
+        })
+
+        self.assertEqual(totals, {INCOME: 0, EXPENSES: 0})
+
+    def test_old_edges_include_archive(self):
+        db.session.add(LedgerArchive(
+            user_id=1, kind=INCOME, amount=11, name='Old',
+            date=datetime.date(2023, 4, 5),
+        ))
+        db.session.commit()
+
+        totals = get_period_totals_by_kind(1, {
+            INCOME: (datetime.date(2023, 4, 2), datetime.date(2025, 1, 31)),
+        })
+
+        self.assertEqual(totals, {INCOME: Decimal('111.00')})
+
+    def test_no_periods_runs_no_queries(self):
+        with patch(PATCH_TARGET_DB) as mock_db:
+            self.assertEqual(get_period_totals_by_kind(1, {}), {})
+
+        mock_db.session.query.assert_not_called()
+
+
+class TestRawTotal(unittest.TestCase):
+
+    @patch('website.finances.monthly_rollup.needs_archive')
+    @patch(PATCH_TARGET_DB)
+    def test_recent_range_reads_ledger_only(self, mock_db, mock_needs_archive):
+        mock_needs_archive.return_value = False
+        mock_db.session.query.return_value.filter.return_value.scalar.return_value = Decimal('5.00')
+
+        total = _raw_total(1, INCOME, datetime.date(2025, 5, 2), datetime.date(2025, 5, 9))
+
+        self.assertEqual(total, Decimal('5.00'))
+        mock_needs_archive.assert_called_once_with(1, datetime.date(2025, 5, 2))
+        self.assertEqual(mock_db.session.query.call_count, 1)
+
+    @patch('website.finances.monthly_rollup.needs_archive')
+    @patch(PATCH_TARGET_DB)
+    def test_old_range_adds_archive(self, mock_db, mock_needs_archive):
+        mock_needs_archive.return_value = True
+        mock_db.session.query.return_value.filter.return_value.scalar.side_effect = [
+            None, Decimal('7.25'),
+        ]
+
+        total = _raw_total(1, INCOME, datetime.date(2019, 5, 2), datetime.date(2019, 5, 9))
+
+        self.assertEqual(total, Decimal('7.25'))
+        self.assertEqual(mock_db.session.query.call_count, 2)
+
+
+class TestRebuildMonthlyRollups(unittest.TestCase):
+
+    @patch('website.finances.monthly_rollup.delete')
+    @patch(PATCH_TARGET_ROLLUP)
+    @patch(PATCH_TARGET_DB)
+    def test_rebuilds_from_ledger(self, mock_db, MockRollup, mock_delete):
+        ledger_query = MagicMock()
+        ledger_query.filter.return_value.group_by.return_value = [
+            (1, INCOME, 2025, 5, Decimal('100.00')),
+            (2, EXPENSES, 2024, 12, Decimal('1.50')),
+        ]
+        archive_query = MagicMock()
+        archive_query.filter.return_value.group_by.return_value = [
+            (2, EXPENSES, 2024, 12, Decimal('2.00')),
+        ]
+        mock_db.session.query.side_effect = [ledger_query, archive_query]
+
+        count = rebuild_monthly_rollups()
+
+        self.assertEqual(count, 2)
+        mock_db.session.execute.assert_called_once_with(mock_delete.return_value)
+        MockRollup.assert_any_call(
+            user_id=1, kind=INCOME, month=datetime.date(2025, 5, 1),
+            total=Decimal('100.00'),
+        )
+        MockRollup.assert_any_call(
+            user_id=2, kind=EXPENSES, month=datetime.date(2024, 12, 1),
+            total=Decimal('3.50'),
+        )
+        mock_db.session.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
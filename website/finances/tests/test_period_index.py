@@ -0,0 +1,140 @@
+import unittest
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from website import db
+from website.finances import period_index
+from website.finances.ledger_sync import record_ledger_change, record_savings_change
+from website.finances.period_index import (
+    _fenwick_from,
+    _fenwick_prefix,
+    get_indexed_period_totals,
+)
+from website.models import Income, Expenses, LedgerArchive, INCOME, EXPENSES, PLANNING
+from website.testing import DatabaseTestCase
+
+JAN = (datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))
+YEAR = (datetime.date(2025, 1, 1), datetime.date(2025, 12, 31))
+
+
+class TestFenwick(unittest.TestCase):
+
+    def test_prefix_sums_match_list_sums(self):
+        values = [3, 0, 5, 1, 7, 2, 0, 4, 6]
+        tree = _fenwick_from(list(values))
+
+        for position in range(len(values) + 1):
+            self.assertEqual(_fenwick_prefix(tree, position), sum(values[:position]))
+
+
+class TestPeriodIndex(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        db.session.add_all([
+            Income(user_id=1, amount=100, name='Salary', date=datetime.date(2025, 1, 5)),
+            Income(user_id=1, amount=40, name='Bonus', date=datetime.date(2025, 1, 31)),
+            Income(user_id=1, amount=200, name='Salary', date=datetime.date(2025, 2, 5)),
+            Expenses(user_id=1, amount=30, name='Food', date=datetime.date(2025, 1, 10)),
+            LedgerArchive(
+                user_id=1, kind=INCOME, amount=9, name='Old',
+                date=datetime.date(2023, 3, 1),
+            ),
+            Income(user_id=2, amount=1000, name='Salary', date=datetime.date(2025, 1, 5)),
+        ])
+        db.session.commit()
+
+    def _add_expense(self, amount, day):
+        db.session.add(Expenses(user_id=1, amount=amount, name='Taxi', date=day))
+        record_ledger_change(1, EXPENSES, day, Decimal(amount))
+        db.session.commit()
+
+    def test_range_sums_per_kind(self):
+        totals = get_indexed_period_totals(1, {INCOME: JAN, EXPENSES: JAN, PLANNING: JAN})
+
+        self.assertEqual(
+            totals, {INCOME: Decimal('140.00'), EXPENSES: Decimal('30.00'), PLANNING: 0}
+        )
+
+    def test_ranges_include_archive_and_clamp_to_index(self):
+        totals = get_indexed_period_totals(1, {
+            INCOME: (datetime.date(1990, 1, 1), datetime.date(2099, 12, 31)),
+        })
+
+        self.assertEqual(totals, {INCOME: Decimal('349.00')})
+
+    def test_reversed_range_is_zero(self):
+        totals = get_indexed_period_totals(1, {INCOME: (JAN[1], JAN[0])})
+
+        self.assertEqual(totals, {INCOME: 0})
+
+    def test_committed_change_updates_index_in_place(self):
+        get_indexed_period_totals(1, {EXPENSES: JAN})
+
+        self._add_expense('12', datetime.date(2025, 1, 20))
+
+        with patch('website.finances.period_index._build_index') as mock_build:
+            totals = get_indexed_period_totals(1, {EXPENSES: JAN})
+        mock_build.assert_not_called()
+        self.assertEqual(totals, {EXPENSES: Decimal('42.00')})
+
+    def test_savings_change_keeps_index_valid(self):
+        get_indexed_period_totals(1, {INCOME: JAN})
+
+        record_savings_change(1, Decimal('5.00'))
+        db.session.commit()
+
+        with patch('website.finances.period_index._build_index') as mock_build:
+            get_indexed_period_totals(1, {INCOME: JAN})
+        mock_build.assert_not_called()
+
+    def test_rolled_back_change_is_discarded(self):
+        get_indexed_period_totals(1, {EXPENSES: JAN})
+
+        record_ledger_change(1, EXPENSES, datetime.date(2025, 1, 20), Decimal('12.00'))
+        db.session.rollback()
+
+        self.assertEqual(
+            get_indexed_period_totals(1, {EXPENSES: JAN}), {EXPENSES: Decimal('30.00')}
+        )
+
+    def test_change_outside_index_forces_rebuild(self):
+        get_indexed_period_totals(1, {EXPENSES: YEAR})
+
+        self._add_expense('7', datetime.date(2040, 1, 1))
+
+        self.assertNotIn(1, period_index._indexes)
+        totals = get_indexed_period_totals(1, {
+            EXPENSES: (datetime.date(2040, 1, 1), datetime.date(2040, 1, 1)),
+        })
+        self.assertEqual(totals, {EXPENSES: Decimal('7.00')})
+
+    def test_version_from_another_worker_forces_rebuild(self):
+        get_indexed_period_totals(1, {EXPENSES: JAN})
+        period_index._indexes[1]['version'] -= 1
+
+        self._add_expense('12', datetime.date(2025, 1, 20))
+
+        self.assertNotIn(1, period_index._indexes)
+        self.assertEqual(
+            get_indexed_period_totals(1, {EXPENSES: JAN}), {EXPENSES: Decimal('42.00')}
+        )
+
+    def test_least_recently_used_user_is_evicted(self):
+        self.app.config['PERIOD_INDEX_USERS'] = 1
+
+        get_indexed_period_totals(1, {INCOME: JAN})
+        get_indexed_period_totals(2, {INCOME: JAN})
+
+        self.assertEqual(list(period_index._indexes), [2])
+
+    def test_zero_size_disables_index(self):
+        self.app.config['PERIOD_INDEX_USERS'] = 0
+
+        self.assertIsNone(get_indexed_period_totals(1, {INCOME: JAN}))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,60 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from website.finances.savings_balance import (
+    get_savings_balance,
+    get_savings_history,
+    next_savings_balance,
+)
+
+PATCH_TARGET_DB = 'website.finances.savings_balance.db'
+
+
+class TestNextSavingsBalance(unittest.TestCase):
+
+    def test_adds_amount_to_latest_row_balance(self):
+        expression = next_savings_balance(3, Decimal('12.50'))
+
+        compiled = expression.compile()
+        sql = str(compiled)
+        self.assertIn('coalesce((SELECT savings.balance', sql)
+        self.assertIn('ORDER BY savings.id DESC', sql)
+        self.assertIn('LIMIT', sql)
+        self.assertIn(3, compiled.params.values())
+        self.assertIn(Decimal('12.50'), compiled.params.values())
+
+
+class TestGetSavingsBalance(unittest.TestCase):
+
+    @patch(PATCH_TARGET_DB)
+    def test_reads_latest_row(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = Decimal('80.00')
+
+        self.assertEqual(get_savings_balance(3), Decimal('80.00'))
+        sql = str(mock_db.session.execute.call_args.args[0])
+        self.assertIn('ORDER BY savings.id DESC', sql)
+        self.assertNotIn('sum(', sql)
+
+    @patch(PATCH_TARGET_DB)
+    def test_no_savings_rows(self, mock_db):
+        mock_db.session.execute.return_value.scalar.return_value = None
+
+        self.assertEqual(get_savings_balance(3), 0)
+
+
+class TestGetSavingsHistory(unittest.TestCase):
+
+    @patch(PATCH_TARGET_DB)
+    def test_returns_rows_in_insert_order(self, mock_db):
+        rows = [(1, Decimal('10.00'), Decimal('10.00')), (2, Decimal('-4.00'), Decimal('6.00'))]
+        mock_db.session.execute.return_value.all.return_value = rows
+
+        self.assertEqual(get_savings_history(3), rows)
+        sql = str(mock_db.session.execute.call_args.args[0])
+        self.assertIn('savings.balance', sql)
+        self.assertIn('ORDER BY savings.id', sql)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -19,6 +19,29 @@ class TestSavingsHandler(unittest.TestCase):
         self.mock_request.form = {}
         self.mock_user = Mock()
         self.mock_user.id = 99
+        self.patcher_balance = patch(
+            'website.finances.savings_handler.record_savings_change'
+        )
+        self.mock_record_change = self.patcher_balance.start()
+        self.addCleanup(self.patcher_balance.stop)
+        self.patcher_next = patch(
+            'website.finances.savings_handler.next_savings_balance'
+        )
+        self.mock_next_balance = self.patcher_next.start()
+        self.addCleanup(self.patcher_next.stop)
+        self.patcher_savings = patch(
+            'website.finances.savings_handler.get_savings_balance'
+        )
+        self.mock_savings_balance = self.patcher_savings.start()
+        self.addCleanup(self.patcher_savings.stop)
+        self.patcher_user_balance = patch(
+            'website.finances.savings_handler.get_user_balance'
+        )
+        self.mock_user_balance = self.patcher_user_balance.start()
+        self.addCleanup(self.patcher_user_balance.stop)
+        self.mock_user_balance.return_value = Mock(
+            income=1000.0, expenses=400.0, savings=100.0, planning=0.0
+        )
 
     @patch(PATCH_TARGET_URL_FOR)
     @patch(PATCH_TARGET_REDIRECT)
@@ -43,18 +66,25 @@ class TestSavingsHandler(unittest.TestCase):
         mock_new_save_instance = Mock()
         MockSavingsModel.return_value = mock_new_save_instance
 
-        response = handle_transfer(
-            self.mock_request, self.mock_user, current_balance
-        )
+        response = handle_transfer(self.mock_request, self.mock_user)
 
+        self.mock_user_balance.assert_called_once_with(self.mock_user.id)
         MockTransferClass.assert_called_once_with(
             transfer_amount, self.mock_user.id, current_balance
         )
         mock_transfer_instance.check_input.assert_called_once()
+        self.mock_next_balance.assert_called_once_with(
+            self.mock_user.id, transfer_amount
+        )
         MockSavingsModel.assert_called_once_with(
-            amount=transfer_amount, user_id=self.mock_user.id
+            amount=transfer_amount,
+            user_id=self.mock_user.id,
+            balance=self.mock_next_balance.return_value,
         )
         mock_db.session.add.assert_called_once_with(mock_new_save_instance)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, transfer_amount
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Transfer added successfully!', 'success'
@@ -83,16 +113,16 @@ class TestSavingsHandler(unittest.TestCase):
         mock_transfer_instance.amount = transfer_amount
         MockTransferClass.return_value = mock_transfer_instance
 
-        response = handle_transfer(
-            self.mock_request, self.mock_user, current_balance
-        )
+        response = handle_transfer(self.mock_request, self.mock_user)
 
+        self.mock_user_balance.assert_called_once_with(self.mock_user.id)
         MockTransferClass.assert_called_once_with(
             transfer_amount, self.mock_user.id, current_balance
         )
         mock_transfer_instance.check_input.assert_called_once()
         MockSavingsModel.assert_not_called()
         mock_db.session.add.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_called_with(
             'Failed to add transfer. Please check your input.', 'error'
@@ -111,7 +141,7 @@ class TestSavingsHandler(unittest.TestCase):
         self.mock_request.form = {}
         mock_url_for.return_value = '/fake/report/home'
 
-        response = handle_transfer(self.mock_request, self.mock_user, 500.0)
+        response = handle_transfer(self.mock_request, self.mock_user)
 
         MockTransferClass.assert_not_called()
         mock_flash.assert_called_once_with(
@@ -131,7 +161,7 @@ class TestSavingsHandler(unittest.TestCase):
         self.mock_request.form = {'transfer-amount': 'abc'}
         mock_url_for.return_value = '/fake/report/home'
 
-        response = handle_transfer(self.mock_request, self.mock_user, 500.0)
+        response = handle_transfer(self.mock_request, self.mock_user)
 
         MockTransferClass.assert_not_called()
         mock_flash.assert_called_once_with(
@@ -141,6 +171,22 @@ class TestSavingsHandler(unittest.TestCase):
         mock_redirect.assert_called_once_with('/fake/report/home')
         self.assertEqual(response, mock_redirect.return_value)
 
+    @patch(PATCH_TARGET_URL_FOR)
+    @patch(PATCH_TARGET_REDIRECT)
+    @patch(PATCH_TARGET_FLASH)
+    @patch(PATCH_TARGET_TRANSFER)
+    def test_handle_transfer_amount_too_large(
+        self, MockTransferClass, mock_flash, mock_redirect, mock_url_for
+    ):
+        self.mock_request.form = {'transfer-amount': '1e30'}
+
+        handle_transfer(self.mock_request, self.mock_user)
+
+        MockTransferClass.assert_not_called()
+        mock_flash.assert_called_once_with(
+            'Invalid transfer amount. Please enter a number.', 'error'
+        )
+
     @patch(PATCH_TARGET_URL_FOR)
     @patch(PATCH_TARGET_REDIRECT)
     @patch(PATCH_TARGET_FLASH)
@@ -154,6 +200,7 @@ class TestSavingsHandler(unittest.TestCase):
         withdraw_input_amount = 50.25
         expected_processed_amount = -50.25
         current_total_savings = 200.0
+        self.mock_savings_balance.return_value = current_total_savings
         self.mock_request.form = {'transfer-amount': str(withdraw_input_amount)}
         mock_url_for.return_value = '/fake/report/home'
 
@@ -165,19 +212,26 @@ class TestSavingsHandler(unittest.TestCase):
         mock_new_save_instance = Mock()
         MockSavingsModel.return_value = mock_new_save_instance
 
-        response = handle_withdraw(
-            self.mock_request, self.mock_user, current_total_savings
-        )
+        response = handle_withdraw(self.mock_request, self.mock_user)
 
+        self.mock_savings_balance.assert_called_once_with(self.mock_user.id)
         MockWithdrawClass.assert_called_once_with(
             expected_processed_amount, self.mock_user.id,
             current_total_savings
         )
         mock_withdraw_instance.check_input.assert_called_once()
+        self.mock_next_balance.assert_called_once_with(
+            self.mock_user.id, expected_processed_amount
+        )
         MockSavingsModel.assert_called_once_with(
-            amount=expected_processed_amount, user_id=self.mock_user.id
+            amount=expected_processed_amount,
+            user_id=self.mock_user.id,
+            balance=self.mock_next_balance.return_value,
         )
         mock_db.session.add.assert_called_once_with(mock_new_save_instance)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, expected_processed_amount
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Withdrawal added successfully!', 'success'
@@ -199,6 +253,7 @@ class TestSavingsHandler(unittest.TestCase):
         withdraw_input_amount = 50.25
         expected_processed_amount = -50.25
         current_total_savings = 200.0
+        self.mock_savings_balance.return_value = current_total_savings
         self.mock_request.form = {'transfer-amount': str(withdraw_input_amount)}
         mock_url_for.return_value = '/fake/report/home'
 
@@ -207,10 +262,9 @@ class TestSavingsHandler(unittest.TestCase):
         mock_withdraw_instance.amount = expected_processed_amount
         MockWithdrawClass.return_value = mock_withdraw_instance
 
-        response = handle_withdraw(
-            self.mock_request, self.mock_user, current_total_savings
-        )
+        response = handle_withdraw(self.mock_request, self.mock_user)
 
+        self.mock_savings_balance.assert_called_once_with(self.mock_user.id)
         MockWithdrawClass.assert_called_once_with(
             expected_processed_amount, self.mock_user.id,
             current_total_savings
@@ -218,6 +272,7 @@ class TestSavingsHandler(unittest.TestCase):
         mock_withdraw_instance.check_input.assert_called_once()
         MockSavingsModel.assert_not_called()
         mock_db.session.add.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_called_with(
             'Failed to add transfer. Please check your input.', 'error'
@@ -236,7 +291,7 @@ class TestSavingsHandler(unittest.TestCase):
         self.mock_request.form = {}
         mock_url_for.return_value = '/fake/report/home'
 
-        response = handle_withdraw(self.mock_request, self.mock_user, 200.0)
+        response = handle_withdraw(self.mock_request, self.mock_user)
 
         MockWithdrawClass.assert_not_called()
         mock_flash.assert_called_once_with(
@@ -256,7 +311,7 @@ class TestSavingsHandler(unittest.TestCase):
         self.mock_request.form = {'transfer-amount': 'xyz'}
         mock_url_for.return_value = '/fake/report/home'
 
-        response = handle_withdraw(self.mock_request, self.mock_user, 200.0)
+        response = handle_withdraw(self.mock_request, self.mock_user)
 
         MockWithdrawClass.assert_not_called()
         mock_flash.assert_called_once_with(
@@ -3,6 +3,7 @@ import datetime
 from unittest.mock import patch, Mock, MagicMock
 
 from website.finances.submit_finances import process_form_submission
+from website.models import INCOME, EXPENSES, PLANNING
 
 PATCH_TARGET_FLASH = 'website.finances.submit_finances.flash'
 PATCH_TARGET_IM = 'website.finances.submit_finances.IncomeModel'
@@ -21,6 +22,11 @@ class TestSubmitFinances(unittest.TestCase):
         self.mock_request.form = MagicMock()
         self.mock_user = Mock()
         self.mock_user.id = 123
+        self.patcher_balance = patch(
+            'website.finances.submit_finances.record_ledger_change'
+        )
+        self.mock_record_change = self.patcher_balance.start()
+        self.addCleanup(self.patcher_balance.stop)
 
     def test_process_form_invalid_submit_value(self):
         self.mock_request.form.get.return_value = 'unknown'
@@ -75,6 +81,10 @@ class TestSubmitFinances(unittest.TestCase):
             user_id=self.mock_user.id
         )
         mock_db.session.add.assert_called_once_with(mock_model_instance)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, INCOME, mock_item_instance.date,
+            mock_item_instance.amount
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Income added successfully!', 'success'
@@ -108,6 +118,7 @@ class TestSubmitFinances(unittest.TestCase):
         mock_item_instance.check_input.assert_called_once()
         MockIncomeModel.assert_not_called()
         mock_db.session.add.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_called_once_with(
             'Failed to add Income. Please check your input.', 'error'
@@ -154,6 +165,10 @@ class TestSubmitFinances(unittest.TestCase):
             user_id=self.mock_user.id
         )
         mock_db.session.add.assert_called_once_with(mock_model_instance)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, EXPENSES, mock_item_instance.date,
+            mock_item_instance.amount
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Expenses added successfully!', 'success'
@@ -187,6 +202,7 @@ class TestSubmitFinances(unittest.TestCase):
         mock_item_instance.check_input.assert_called_once()
         MockExpensesModel.assert_not_called()
         mock_db.session.add.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_called_once_with(
             'Failed to add Expenses. Please check your input.', 'error'
@@ -233,6 +249,10 @@ class TestSubmitFinances(unittest.TestCase):
             user_id=self.mock_user.id
         )
         mock_db.session.add.assert_called_once_with(mock_model_instance)
+        self.mock_record_change.assert_called_once_with(
+            self.mock_user.id, PLANNING, mock_item_instance.date,
+            mock_item_instance.amount
+        )
         mock_db.session.commit.assert_called_once()
         mock_flash.assert_called_once_with(
             'Planning added successfully!', 'success'
@@ -266,6 +286,7 @@ class TestSubmitFinances(unittest.TestCase):
         mock_item_instance.check_input.assert_called_once()
         MockPlanningModel.assert_not_called()
         mock_db.session.add.assert_not_called()
+        self.mock_record_change.assert_not_called()
         mock_db.session.commit.assert_not_called()
         mock_flash.assert_called_once_with(
             'Failed to add Planning. Please check your input.', 'error'
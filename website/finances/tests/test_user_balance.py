@@ -0,0 +1,175 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import patch, Mock, MagicMock
+
+from website.finances.user_balance import (
+    apply_balance_change,
+    get_data_version,
+    get_user_balance,
+    rebuild_user_balance,
+    rebuild_user_balances,
+)
+from website.models import INCOME, EXPENSES, PLANNING
+
+PATCH_TARGET_DB = 'website.finances.user_balance.db'
+PATCH_TARGET_USER_BALANCE = 'website.finances.user_balance.UserBalance'
+PATCH_TARGET_REBUILD = 'website.finances.user_balance.rebuild_user_balance'
+
+
+class TestApplyBalanceChange(unittest.TestCase):
+
+    @patch(PATCH_TARGET_REBUILD)
+    @patch(PATCH_TARGET_DB)
+    def test_updates_existing_row(self, mock_db, mock_rebuild):
+        mock_db.session.execute.return_value.scalar.return_value = 4
+
+        version = apply_balance_change(7, 'expenses', Decimal('12.34'))
+
+        self.assertEqual(version, 4)
+        mock_db.session.execute.assert_called_once()
+        statement = mock_db.session.execute.call_args.args[0]
+        compiled = statement.compile()
+        self.assertIn('UPDATE user_balance SET expenses=(user_balance.expenses + ', str(compiled))
+        self.assertIn('version=(user_balance.version + ', str(compiled))
+        self.assertIn('RETURNING user_balance.version', str(compiled))
+        self.assertIn(7, compiled.params.values())
+        self.assertIn(Decimal('12.34'), compiled.params.values())
+        mock_rebuild.assert_not_called()
+        mock_db.session.commit.assert_not_called()
+
+    @patch(PATCH_TARGET_REBUILD)
+    @patch(PATCH_TARGET_DB)
+    def test_rebuilds_missing_row(self, mock_db, mock_rebuild):
+        mock_db.session.execute.return_value.scalar.return_value = None
+
+        self.assertIsNone(apply_balance_change(7, 'savings', Decimal('-5.00')))
+        mock_rebuild.assert_called_once_with(7)
+
+
+class TestRebuildUserBalance(unittest.TestCase):
+
+    @patch(PATCH_TARGET_USER_BALANCE)
+    @patch(PATCH_TARGET_DB)
+    def test_sums_ledger_kinds_and_savings(self, mock_db, MockUserBalance):
+        kind_query = MagicMock()
+        kind_query.filter.return_value.group_by.return_value = [
+            (INCOME, Decimal('100.00')), (PLANNING, Decimal('40.00'))
+        ]
+        archive_query = MagicMock()
+        archive_query.filter.return_value.group_by.return_value = [
+            (INCOME, Decimal('20.00'))
+        ]
+        savings_query = MagicMock()
+        savings_query.filter.return_value.scalar.return_value = Decimal('25.00')
+        version_query = MagicMock()
+        version_query.filter.return_value.scalar.return_value = 4
+        mock_db.session.query.side_effect = [
+            kind_query, archive_query, savings_query, version_query
+        ]
+
+        result = rebuild_user_balance(3)
+
+        MockUserBalance.assert_called_once_with(
+            user_id=3,
+            version=5,
+            income=Decimal('120.00'),
+            expenses=0,
+            planning=Decimal('40.00'),
+            savings=Decimal('25.00'),
+        )
+        mock_db.session.merge.assert_called_once_with(MockUserBalance.return_value)
+        self.assertEqual(result, mock_db.session.merge.return_value)
+
+    @patch(PATCH_TARGET_USER_BALANCE)
+    @patch(PATCH_TARGET_DB)
+    def test_no_data_gives_zero_totals(self, mock_db, MockUserBalance):
+        kind_query = MagicMock()
+        kind_query.filter.return_value.group_by.return_value = []
+        savings_query = MagicMock()
+        savings_query.filter.return_value.scalar.return_value = None
+        mock_db.session.query.side_effect = [
+            kind_query, kind_query, savings_query, savings_query
+        ]
+
+        rebuild_user_balance(3)
+
+        MockUserBalance.assert_called_once_with(
+            user_id=3, version=1, income=0, expenses=0, planning=0, savings=0
+        )
+
+
+class TestGetUserBalance(unittest.TestCase):
+
+    @patch(PATCH_TARGET_REBUILD)
+    @patch(PATCH_TARGET_DB)
+    def test_returns_stored_row(self, mock_db, mock_rebuild):
+        stored = Mock()
+        mock_db.session.get.return_value = stored
+
+        self.assertIs(get_user_balance(4), stored)
+        mock_rebuild.assert_not_called()
+        mock_db.session.commit.assert_not_called()
+
+    @patch(PATCH_TARGET_REBUILD)
+    @patch(PATCH_TARGET_DB)
+    def test_rebuilds_and_commits_missing_row(self, mock_db, mock_rebuild):
+        mock_db.session.get.return_value = None
+
+        self.assertIs(get_user_balance(4), mock_rebuild.return_value)
+        mock_rebuild.assert_called_once_with(4)
+        mock_db.session.commit.assert_called_once()
+
+
+class TestGetDataVersion(unittest.TestCase):
+
+    @patch('website.finances.user_balance.get_user_balance')
+    def test_reads_version_from_balance_row(self, mock_get_balance):
+        mock_get_balance.return_value.version = 9
+
+        self.assertEqual(get_data_version(2), 9)
+        mock_get_balance.assert_called_once_with(2)
+
+
+class TestRebuildUserBalances(unittest.TestCase):
+
+    @patch('website.finances.user_balance.delete')
+    @patch(PATCH_TARGET_USER_BALANCE)
+    @patch(PATCH_TARGET_DB)
+    def test_recomputes_every_user(self, mock_db, MockUserBalance, mock_delete):
+        version_query = [(1, 6), (4, 2)]
+        kind_query = MagicMock()
+        kind_query.group_by.return_value = [
+            (1, INCOME, Decimal('10.00')),
+            (1, EXPENSES, Decimal('4.00')),
+            (2, PLANNING, Decimal('7.00')),
+        ]
+        archive_query = MagicMock()
+        archive_query.group_by.return_value = [(1, EXPENSES, Decimal('1.00'))]
+        savings_query = MagicMock()
+        savings_query.group_by.return_value = [(3, Decimal('1.50'))]
+        mock_db.session.query.side_effect = [
+            version_query, kind_query, archive_query, savings_query
+        ]
+
+        count = rebuild_user_balances()
+
+        self.assertEqual(count, 4)
+        mock_delete.assert_called_once_with(MockUserBalance)
+        mock_db.session.execute.assert_called_once_with(mock_delete.return_value)
+        self.assertEqual(mock_db.session.add.call_count, 4)
+        MockUserBalance.assert_any_call(
+            user_id=1, version=7, income=Decimal('10.00'),
+            expenses=Decimal('5.00'), planning=0, savings=0,
+        )
+        MockUserBalance.assert_any_call(
+            user_id=3, version=1, income=0, expenses=0, planning=0,
+            savings=Decimal('1.50'),
+        )
+        MockUserBalance.assert_any_call(
+            user_id=4, version=3, income=0, expenses=0, planning=0, savings=0,
+        )
+        mock_db.session.commit.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,100 @@
+from sqlalchemy import delete, func, update
+
+from ..models import Ledger, LedgerArchive, KIND_NAMES, UserBalance
+from ..models import Savings as SavingsModel
+from .. import db
+from ..cache import request_cached
+
+BALANCE_FIELDS = ("income", "expenses", "planning", "savings")
+
+
+def _empty_totals():
+    return {field: 0 for field in BALANCE_FIELDS}
+
+
+def rebuild_user_balance(user_id):
+    totals = _empty_totals()
+    for model in (Ledger, LedgerArchive):
+        kind_totals = (
+            db.session.query(model.kind, func.sum(model.amount))
+            .filter(model.user_id == user_id)
+            .group_by(model.kind)
+        )
+        for kind, total in kind_totals:
+            totals[KIND_NAMES[kind]] += total
+    totals["savings"] = (
+        db.session.query(func.sum(SavingsModel.amount))
+        .filter(SavingsModel.user_id == user_id)
+        .scalar()
+        or 0
+    )
+    version = (
+        db.session.query(UserBalance.version)
+        .filter(UserBalance.user_id == user_id)
+        .scalar()
+        or 0
+    )
+    return db.session.merge(
+        UserBalance(user_id=user_id, version=version + 1, **totals)
+    )
+
+
+def apply_balance_change(user_id, field, amount):
+    column = getattr(UserBalance, field)
+    result = db.session.execute(
+        update(UserBalance)
+        .where(UserBalance.user_id == user_id)
+        .values(
+            {column: column + amount, UserBalance.version: UserBalance.version + 1}
+        )
+        .returning(UserBalance.version)
+    )
+    version = result.scalar()
+    if version is None:
+        rebuild_user_balance(user_id)
+    return version
+
+
+def _load_user_balance(user_id):
+    balance = db.session.get(UserBalance, user_id)
+    if balance is None:
+        balance = rebuild_user_balance(user_id)
+        db.session.commit()
+    return balance
+
+
+def get_user_balance(user_id):
+    return request_cached(
+        user_id, "user_balance", lambda: _load_user_balance(user_id)
+    )
+
+
+def get_data_version(user_id):
+    return get_user_balance(user_id).version
+
+
+def rebuild_user_balances():
+    versions = dict(db.session.query(UserBalance.user_id, UserBalance.version))
+    db.session.execute(delete(UserBalance))
+    totals = {user_id: _empty_totals() for user_id in versions}
+    for model in (Ledger, LedgerArchive):
+        kind_totals = db.session.query(
+            model.user_id, model.kind, func.sum(model.amount)
+        ).group_by(model.user_id, model.kind)
+        for user_id, kind, total in kind_totals:
+            totals.setdefault(user_id, _empty_totals())[KIND_NAMES[kind]] += total
+    savings_totals = db.session.query(
+        SavingsModel.user_id, func.sum(SavingsModel.amount)
+    ).group_by(SavingsModel.user_id)
+    for user_id, total in savings_totals:
+        totals.setdefault(user_id, _empty_totals())["savings"] = total
+    for user_id, user_totals in totals.items():
+        db.session.add(
+            UserBalance(
+                user_id=user_id,
+                version=versions.get(user_id, 0) + 1,
+                **user_totals,
+            )
+        )
+    db.session.commit()
+    return len(totals)
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from . import db
+from .models import User
+
+IDENTITY_TTL = 300
+IDENTITY_SIZE = 1024
+
+_identities = OrderedDict()
+_lock = Lock()
+
+
+class UserIdentity(UserMixin):
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name == "_record":
+            raise AttributeError(name)
+        record = self.__dict__.get("_record")
+        if record is None:
+            record = db.session.get(User, self.id)
+            self.__dict__["_record"] = record
+        return getattr(record, name)
+
+
+def _ttl():
+    return current_app.config.get("USER_CACHE_TTL", IDENTITY_TTL)
+
+
+def load_identity(user_id):
+    now = monotonic()
+    with _lock:
+        cached = _identities.get(user_id)
+        if cached is not None and cached[0] > now:
+            _identities.move_to_end(user_id)
+            return UserIdentity(*cached[1])
+
+    row = db.session.query(User.id, User.username).filter(User.id == user_id).first()
+    if row is None:
+        forget_identity(user_id)
+        return None
+
+    ttl = _ttl()
+    if ttl > 0:
+        with _lock:
+            _identities[user_id] = (now + ttl, tuple(row))
+            _identities.move_to_end(user_id)
+            while len(_identities) > IDENTITY_SIZE:
+                _identities.popitem(last=False)
+    return UserIdentity(*row)
+
+
+def forget_identity(user_id):
+    with _lock:
+        _identities.pop(user_id, None)
+
+
+def clear_identities():
+    with _lock:
+        _identities.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _forget_changed_user(mapper, connection, target):
+    forget_identity(target.id)
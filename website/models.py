@@ -1,48 +1,171 @@
 from . import db
+from .money import to_cents, from_cents
+from .compression import compress_text, decompress_text
 from flask_login import UserMixin
+from sqlalchemy.orm import declared_attr, has_inherited_table
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
+
+
+class Money(TypeDecorator):
+    impl = db.BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return from_cents(value)
+
+
+class CompressedText(TypeDecorator):
+    impl = db.LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+
+INCOME = 1
+EXPENSES = 2
+PLANNING = 3
+KIND_NAMES = {
+    INCOME: "income",
+    EXPENSES: "expenses",
+    PLANNING: "planning",
+}
+
+
+class TransactionType(db.Model):
+    id = db.Column(
+        db.SmallInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    label = db.Column(db.String(150), unique=True, nullable=False)
 
 
 class Finances:
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float)
+    amount = db.Column(Money)
     name = db.Column(db.String(255))
     date = db.Column(db.Date, default=func.current_date())
-    type = db.Column(db.String(150))
+    type_id = db.Column(db.SmallInteger, db.ForeignKey("transaction_type.id"))
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
 
+    @property
+    def type(self):
+        if self.type_id is None:
+            return self.__dict__.get("_type_label")
+        from .transaction_types import get_type_label
+        return get_type_label(self.type_id)
 
-class Income(Finances, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+    @type.setter
+    def type(self, label):
+        from .transaction_types import cached_type_id
+        self._type_label = label
+        self.type_id = cached_type_id(label)
 
+    @declared_attr
+    def __table_args__(cls):
+        if has_inherited_table(cls):
+            return ()
+        return (
+            db.Index(f"ix_{cls.__tablename__}_user_id_date", "user_id", "date"),
+            db.Index(f"ix_{cls.__tablename__}_user_id_id", "user_id", "id"),
+            {"sqlite_autoincrement": True},
+        )
 
-class Expenses(Finances, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
 
+class Ledger(Finances, db.Model):
+    kind = db.Column(db.SmallInteger, nullable=False)
+
+    __mapper_args__ = {"polymorphic_on": kind}
 
-class Planning(Finances, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+
+db.Index("ix_ledger_user_id_kind_date", Ledger.user_id, Ledger.kind, Ledger.date)
+db.Index("ix_ledger_user_id_amount", Ledger.user_id, Ledger.amount)
+db.Index("ix_ledger_user_id_name", Ledger.user_id, Ledger.name)
+db.Index(
+    "ix_ledger_user_id_kind_amount", Ledger.user_id, Ledger.kind, Ledger.amount
+)
+db.Index("ix_ledger_user_id_kind_name", Ledger.user_id, Ledger.kind, Ledger.name)
+
+
+class Income(Ledger):
+    __mapper_args__ = {"polymorphic_identity": INCOME}
+
+
+class Expenses(Ledger):
+    __mapper_args__ = {"polymorphic_identity": EXPENSES}
+
+
+class Planning(Ledger):
+    __mapper_args__ = {"polymorphic_identity": PLANNING}
+
+
+class LedgerArchive(Finances, db.Model):
+    kind = db.Column(db.SmallInteger, nullable=False)
 
 
 class Savings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float)
+    amount = db.Column(Money)
+    balance = db.Column(Money)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
 
+    __table_args__ = (db.Index("ix_savings_user_id_id", "user_id", "id"),)
+
+
+class UserBalance(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    income = db.Column(Money, nullable=False, default=0)
+    expenses = db.Column(Money, nullable=False, default=0)
+    planning = db.Column(Money, nullable=False, default=0)
+    savings = db.Column(Money, nullable=False, default=0)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+class MonthlyRollup(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    kind = db.Column(db.SmallInteger, primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    total = db.Column(Money, nullable=False, default=0)
+
 
 class ChatAI(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
-    message = db.Column(db.String(10000))
-    response = db.Column(db.String(10000))
+    conversation_id = db.Column(db.Integer, default=1)
+    created_at = db.Column(db.DateTime, default=func.now())
+    message = db.Column(CompressedText)
+    response = db.Column(CompressedText)
+
+    __table_args__ = (
+        db.Index(
+            "ix_chat_ai_user_id_conversation_id_created_at",
+            "user_id",
+            "conversation_id",
+            "created_at",
+        ),
+    )
 
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), unique=True)
     password = db.Column(db.String(150))
-    income = db.relationship("Income")
-    expenses = db.relationship("Expenses")
-    planning = db.relationship("Planning")
-    savings = db.relationship("Savings")
-    chat_ai = db.relationship("ChatAI")
\ No newline at end of file
+    income = db.relationship("Income", lazy="dynamic")
+    expenses = db.relationship("Expenses", lazy="dynamic")
+    planning = db.relationship("Planning", lazy="dynamic")
+    savings = db.relationship("Savings", lazy="dynamic")
+    chat_ai = db.relationship("ChatAI", lazy="dynamic")
\ No newline at end of file
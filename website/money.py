@@ -0,0 +1,31 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
+MIN_CENTS = -2 ** 63
+MAX_CENTS = 2 ** 63 - 1
+
+
+def to_money(value):
+    if isinstance(value, float):
+        value = repr(value)
+    try:
+        money = Decimal(value)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not money.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    try:
+        money = money.quantize(CENT, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f"Amount out of range: {value!r}")
+    if not MIN_CENTS <= money * 100 <= MAX_CENTS:
+        raise ValueError(f"Amount out of range: {value!r}")
+    return money
+
+
+def to_cents(value):
+    return int(to_money(value) * 100)
+
+
+def from_cents(cents):
+    return (Decimal(cents) / 100).quantize(CENT)
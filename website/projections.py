@@ -0,0 +1,18 @@
+from collections import namedtuple
+
+from .transaction_types import get_type_label
+
+ReportRow = namedtuple("ReportRow", ["id", "amount", "name", "date", "type", "kind"])
+
+
+def report_columns(model):
+    return (
+        model.id, model.amount, model.name, model.date, model.type_id, model.kind
+    )
+
+
+def to_report_rows(rows):
+    return [
+        ReportRow(id, amount, name, date, get_type_label(type_id), kind)
+        for id, amount, name, date, type_id, kind in rows
+    ]
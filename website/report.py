@@ -4,13 +4,11 @@ from datetime import datetime
 
 from .finances.submit_finances import process_form_submission
 from .finances.report_calculations import (
-    get_financial_data,
-    calculate_totals,
     calculate_balance_and_coverage,
-    get_period_data,
-    calculate_period_totals,
+    get_period_totals,
 )
 from .finances.savings_handler import handle_transfer, handle_withdraw
+from .finances.user_balance import get_user_balance
 
 report = Blueprint("report", __name__)
 
@@ -18,25 +16,23 @@ report = Blueprint("report", __name__)
 @report.route("/report", methods=["GET", "POST"])
 @login_required
 def home():
-    income, expenses, planning, savings = get_financial_data(current_user.id)
-    (
-        total_income,
-        total_expenses,
-        total_planning,
-        total_savings,
-    ) = calculate_totals(income, expenses, planning, savings)
-    balance, cover = calculate_balance_and_coverage(
-        total_income, total_expenses, total_savings, total_planning
-    )
     if request.method == "POST":
         process_form_submission(request, current_user)
 
         submit = request.form.get("submit")
         if submit == "transfer":
-            return handle_transfer(request, current_user, balance)
+            return handle_transfer(request, current_user)
         elif submit == "withdraw":
-            return handle_withdraw(request, current_user, total_savings)
+            return handle_withdraw(request, current_user)
 
+    user_balance = get_user_balance(current_user.id)
+    total_income = user_balance.income
+    total_expenses = user_balance.expenses
+    total_planning = user_balance.planning
+    total_savings = user_balance.savings
+    balance, cover = calculate_balance_and_coverage(
+        total_income, total_expenses, total_savings, total_planning
+    )
 
     Istart_date_str = request.args.get("Istart_date")
     Iend_date_str = request.args.get("Iend_date")
@@ -76,10 +72,12 @@ def home():
         else None
     )
 
-    period_income, period_expenses, period_planning = get_period_data(
-        income,
-        expenses,
-        planning,
+    (
+        total_period_income,
+        total_period_expenses,
+        total_period_planning,
+    ) = get_period_totals(
+        current_user.id,
         Istart_date,
         Iend_date,
         Estart_date,
@@ -87,11 +85,6 @@ def home():
         Pstart_date,
         Pend_date,
     )
-    (
-        total_period_income,
-        total_period_expenses,
-        total_period_planning,
-    ) = calculate_period_totals(period_income, period_expenses, period_planning)
 
     return render_template(
         "report.html",
@@ -0,0 +1,65 @@
+from sqlalchemy import column, event, inspect, table, text
+from sqlalchemy.exc import OperationalError
+
+from .models import Ledger
+from . import db
+
+LEDGER_FTS = table("ledger_fts", column("rowid"), column("name"), column("rank"))
+MIN_MATCH_LENGTH = 3
+
+NAME_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS ledger_fts USING fts5("
+    "name, content='ledger', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS ledger_fts_insert AFTER INSERT ON ledger BEGIN "
+    "INSERT INTO ledger_fts (rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS ledger_fts_delete AFTER DELETE ON ledger BEGIN "
+    "INSERT INTO ledger_fts (ledger_fts, rowid, name) "
+    "VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS ledger_fts_update AFTER UPDATE OF name ON ledger BEGIN "
+    "INSERT INTO ledger_fts (ledger_fts, rowid, name) "
+    "VALUES ('delete', old.id, old.name); "
+    "INSERT INTO ledger_fts (rowid, name) VALUES (new.id, new.name); END",
+)
+
+_name_index = {}
+
+
+def create_name_index(connection):
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        for statement in NAME_INDEX_DDL:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO ledger_fts (ledger_fts) VALUES ('rebuild')"))
+    except OperationalError as e:
+        print(f"ERROR: Could not create the name search index: {e}")
+        return False
+    _name_index[connection.engine] = True
+    return True
+
+
+def ensure_name_index():
+    with db.session.get_bind(mapper=Ledger).begin() as conn:
+        if inspect(conn).has_table("ledger_fts"):
+            return False
+        return create_name_index(conn)
+
+
+def has_name_index():
+    engine = db.session.get_bind(mapper=Ledger)
+    if engine not in _name_index:
+        _name_index[engine] = inspect(engine).has_table("ledger_fts")
+    return _name_index[engine]
+
+
+def reset_name_index_cache():
+    _name_index.clear()
+
+
+def match_phrase(query):
+    return '"' + query.replace('"', '""') + '"'
+
+
+@event.listens_for(Ledger.__table__, "after_create")
+def _create_name_index(target, connection, **kw):
+    create_name_index(connection)
@@ -0,0 +1,138 @@
+import os
+import zlib
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+from flask import current_app, g, has_app_context, has_request_context
+from flask_login import current_user
+from flask_sqlalchemy.session import Session
+
+SHARD_COUNT = 0
+SHARDED_TABLES = frozenset((
+    "ledger", "ledger_archive", "savings", "user_balance", "monthly_rollup",
+    "chat_ai",
+))
+
+
+def shard_key(shard):
+    return f"shard_{shard:02d}"
+
+
+def shard_binds_from_env(count):
+    return {
+        shard_key(shard): os.getenv(f"{shard_key(shard).upper()}_URL")
+        or f"sqlite:///{shard_key(shard)}.db"
+        for shard in range(count)
+    }
+
+
+def _shard_count():
+    if g.get("unsharded"):
+        return 0
+    return current_app.config.get("SHARD_COUNT", SHARD_COUNT)
+
+
+def shard_keys():
+    return [shard_key(shard) for shard in range(_shard_count())]
+
+
+def shard_for_user(user_id):
+    count = _shard_count()
+    if count <= 0:
+        return None
+    return shard_key(zlib.crc32(str(user_id).encode()) % count)
+
+
+@contextmanager
+def use_shard(key):
+    previous = g.get("shard")
+    g.shard = key
+    try:
+        yield
+    finally:
+        g.shard = previous
+
+
+@contextmanager
+def without_sharding():
+    previous = g.get("unsharded", False)
+    g.unsharded = True
+    try:
+        yield
+    finally:
+        g.unsharded = previous
+
+
+def use_user_shard(user_id):
+    return use_shard(shard_for_user(user_id))
+
+
+def selected_shard():
+    return g.get("shard") if has_app_context() else None
+
+
+def current_shard():
+    key = selected_shard()
+    if key is None and has_request_context() and current_user.is_authenticated:
+        key = shard_for_user(current_user.id)
+    return key
+
+
+def _sharded_table(mapper, clause):
+    table = None
+    if mapper is not None:
+        table = sa.inspect(mapper).local_table
+    elif isinstance(clause, sa.Table):
+        table = clause
+    elif isinstance(clause, sa.UpdateBase) and isinstance(clause.table, sa.Table):
+        table = clause.table
+    if table is not None and table.name in SHARDED_TABLES:
+        return table
+    return None
+
+
+class ShardedSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _shard_count() > 0:
+            table = _sharded_table(mapper, clause)
+            if table is not None:
+                key = current_shard()
+                if key is None:
+                    raise sa_exc.UnboundExecutionError(
+                        f"No user shard is selected for table '{table.name}'."
+                    )
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def database_tables(tables):
+    if not has_app_context() or _shard_count() <= 0:
+        return list(tables)
+    sharded = selected_shard() is not None
+    return [table for table in tables if (table.name in SHARDED_TABLES) == sharded]
+
+
+def create_sharded_tables():
+    from . import db
+
+    db.metadata.create_all(db.engine, tables=database_tables(db.metadata.sorted_tables))
+    for key in shard_keys():
+        with use_shard(key):
+            db.metadata.create_all(
+                db.engines[key], tables=database_tables(db.metadata.sorted_tables)
+            )
+
+
+def for_each_shard(work):
+    from . import db
+
+    keys = shard_keys()
+    if not keys:
+        return work()
+    total = 0
+    for key in keys:
+        with use_shard(key):
+            total += work()
+        db.session.remove()
+    return total
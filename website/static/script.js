@@ -32,6 +32,12 @@ async function applyFilters() {
     const nameQuery = document.getElementById("Fname").value;
     const date = document.getElementById("Fdate").value;
     const reportType = document.getElementById("Ftype").value;
+    const amountMin = document.getElementById("Fmin").value;
+    const amountMax = document.getElementById("Fmax").value;
+    const startDate = document.getElementById("Fstart").value;
+    const endDate = document.getElementById("Fend").value;
+    const sort = document.getElementById("Fsort").value;
+    const order = document.getElementById("Forder").value;
 
     let url = "/?";
     if (amountQuery) {
@@ -46,6 +52,24 @@ async function applyFilters() {
     if (reportType && reportType !== "All") {
         url += `Ftype=${reportType}&`;
     }
+    if (amountMin) {
+        url += `Fmin=${amountMin}&`;
+    }
+    if (amountMax) {
+        url += `Fmax=${amountMax}&`;
+    }
+    if (startDate) {
+        url += `Fstart=${startDate}&`;
+    }
+    if (endDate) {
+        url += `Fend=${endDate}&`;
+    }
+    if (sort && sort !== "date") {
+        url += `Fsort=${sort}&`;
+    }
+    if (order && order !== "desc") {
+        url += `Forder=${order}&`;
+    }
 
     if (url.endsWith("&")) {
         url = url.slice(0, -1);
@@ -0,0 +1,41 @@
+import unittest
+
+from flask import Flask
+
+from . import cache, db
+from .finances.period_index import clear_period_indexes
+from .identity import clear_identities
+from .search import reset_name_index_cache
+from .transaction_types import clear_transaction_types
+
+
+def reset_caches():
+    reset_name_index_cache()
+    cache.clear_cache()
+    clear_period_indexes()
+    clear_identities()
+    clear_transaction_types()
+
+
+def forget_binds():
+    for key in [key for key in db.metadatas if key is not None]:
+        del db.metadatas[key]
+
+
+class DatabaseTestCase(unittest.TestCase):
+    config = {}
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config.update(self.config)
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.addCleanup(self.ctx.pop)
+        self.addCleanup(reset_caches)
+        self.addCleanup(db.session.remove)
+        self.create_tables()
+
+    def create_tables(self):
+        db.create_all()
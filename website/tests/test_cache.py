@@ -0,0 +1,147 @@
+import unittest
+from unittest.mock import Mock
+
+from flask import Flask
+
+from website.cache import (
+    cached_columns,
+    cached_result,
+    clear_cache,
+    forget_request_cache,
+    request_cached,
+)
+
+
+class TestCachedResult(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['REPORT_CACHE_SIZE'] = 2
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.addCleanup(self.ctx.pop)
+        self.addCleanup(clear_cache)
+
+    def test_same_key_and_version_computes_once(self):
+        compute = Mock(return_value=['row'])
+
+        self.assertEqual(cached_result(1, 0, ('reports',), compute), ['row'])
+        self.assertEqual(cached_result(1, 0, ('reports',), compute), ['row'])
+        compute.assert_called_once()
+
+    def test_new_version_recomputes(self):
+        compute = Mock(side_effect=['old', 'new'])
+
+        self.assertEqual(cached_result(1, 0, ('reports',), compute), 'old')
+        self.assertEqual(cached_result(1, 1, ('reports',), compute), 'new')
+
+    def test_users_do_not_share_entries(self):
+        cached_result(1, 0, ('reports',), lambda: 'first user')
+
+        self.assertEqual(
+            cached_result(2, 0, ('reports',), lambda: 'second user'), 'second user'
+        )
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cached_result(1, 0, 'a', lambda: 'a')
+        cached_result(1, 0, 'b', lambda: 'b')
+        cached_result(1, 0, 'a', Mock())
+        cached_result(1, 0, 'c', lambda: 'c')
+
+        self.assertEqual(cached_result(1, 0, 'a', Mock()), 'a')
+        self.assertEqual(cached_result(1, 0, 'c', Mock()), 'c')
+        self.assertEqual(cached_result(1, 0, 'b', lambda: 'b again'), 'b again')
+
+    def test_zero_size_disables_cache(self):
+        self.app.config['REPORT_CACHE_SIZE'] = 0
+        compute = Mock(return_value='row')
+
+        cached_result(1, 0, 'a', compute)
+        cached_result(1, 0, 'a', compute)
+
+        self.assertEqual(compute.call_count, 2)
+
+
+class TestCachedColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['COLUMN_CACHE_BYTES'] = 100
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.addCleanup(self.ctx.pop)
+        self.addCleanup(clear_cache)
+
+    def test_same_version_computes_once(self):
+        compute = Mock(return_value='columns')
+
+        cached_columns(1, 0, compute, lambda result: 10)
+        self.assertEqual(cached_columns(1, 0, compute, len), 'columns')
+        compute.assert_called_once()
+
+    def test_new_version_replaces_entry(self):
+        cached_columns(1, 0, lambda: 'old', lambda result: 60)
+
+        self.assertEqual(cached_columns(1, 1, lambda: 'new', lambda result: 60), 'new')
+        self.assertEqual(cached_columns(1, 1, Mock(), len), 'new')
+
+    def test_least_recently_used_user_is_evicted_by_bytes(self):
+        cached_columns(1, 0, lambda: 'first', lambda result: 40)
+        cached_columns(2, 0, lambda: 'second', lambda result: 40)
+        cached_columns(1, 0, Mock(), len)
+        cached_columns(3, 0, lambda: 'third', lambda result: 40)
+
+        self.assertEqual(cached_columns(1, 0, Mock(), len), 'first')
+        self.assertEqual(cached_columns(3, 0, Mock(), len), 'third')
+        self.assertEqual(
+            cached_columns(2, 0, lambda: 'second again', lambda result: 40),
+            'second again',
+        )
+
+    def test_oversized_result_is_not_kept(self):
+        compute = Mock(return_value='huge')
+
+        cached_columns(1, 0, compute, lambda result: 101)
+        cached_columns(1, 0, compute, lambda result: 101)
+
+        self.assertEqual(compute.call_count, 2)
+
+
+class TestRequestCached(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_computes_once_per_request(self):
+        compute = Mock(return_value='balance')
+
+        with self.app.app_context():
+            self.assertEqual(request_cached(1, 'user_balance', compute), 'balance')
+            self.assertEqual(request_cached(1, 'user_balance', compute), 'balance')
+        with self.app.app_context():
+            request_cached(1, 'user_balance', compute)
+
+        self.assertEqual(compute.call_count, 2)
+
+    def test_forget_drops_only_that_user(self):
+        with self.app.app_context():
+            request_cached(1, 'user_balance', lambda: 'old')
+            request_cached(2, 'user_balance', lambda: 'other')
+
+            forget_request_cache(1)
+
+            self.assertEqual(request_cached(1, 'user_balance', lambda: 'new'), 'new')
+            self.assertEqual(request_cached(2, 'user_balance', Mock()), 'other')
+
+    def test_without_app_context_always_computes(self):
+        compute = Mock(return_value='row')
+
+        request_cached(1, 'user_balance', compute)
+        request_cached(1, 'user_balance', compute)
+        forget_request_cache(1)
+
+        self.assertEqual(compute.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,888 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+import zlib
+from unittest.mock import patch, Mock, MagicMock
+from flask import Flask
+
+from sqlalchemy import inspect, text
+from sqlalchemy.types import Float, Integer
+
+from website import db
+from website.commands import (
+    add_missing_columns,
+    archive,
+    backfill_chat_history,
+    intern_ledger_types,
+    backfill_savings_balances,
+    create_missing_indexes,
+    convert_amounts_to_cents,
+    enable_ledger_autoincrement,
+    merge_legacy_ledger_tables,
+    rebuild_balances,
+    rebuild_rollups,
+    upgrade,
+)
+from website.finances.monthly_rollup import get_period_totals_by_kind
+from website.finances.user_balance import get_user_balance
+from website.models import Expenses, Income, Ledger, INCOME, EXPENSES
+from website.sharding import use_user_shard
+from website.testing import DatabaseTestCase, forget_binds, reset_caches
+
+PATCH_TARGET_DB = 'website.commands.db'
+
+LEGACY_SCHEMA = """
+CREATE TABLE user (id INTEGER NOT NULL PRIMARY KEY, username VARCHAR(150) UNIQUE, password VARCHAR(150));
+CREATE TABLE income (id INTEGER NOT NULL PRIMARY KEY, amount FLOAT, name VARCHAR(255), date DATE, type VARCHAR(150), user_id INTEGER REFERENCES user(id));
+CREATE TABLE expenses (id INTEGER NOT NULL PRIMARY KEY, amount FLOAT, name VARCHAR(255), date DATE, type VARCHAR(150), user_id INTEGER REFERENCES user(id));
+INSERT INTO user VALUES (1, 'alice', 'x');
+"""
+PATCH_TARGET_INSPECT = 'website.commands.inspect'
+
+
+def make_table(name, index_names):
+    table = Mock()
+    table.name = name
+    table.indexes = []
+    for index_name in index_names:
+        index = Mock()
+        index.name = index_name
+        table.indexes.append(index)
+    return table
+
+
+class TestCreateMissingIndexes(unittest.TestCase):
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_creates_only_missing_indexes(self, mock_db, mock_inspect):
+        income = make_table('income', ['ix_income_user_id_date', 'ix_income_user_id_id'])
+        mock_db.metadata.sorted_tables = [income]
+        inspector = mock_inspect.return_value
+        inspector.has_table.return_value = True
+        inspector.get_indexes.return_value = [{'name': 'ix_income_user_id_id'}]
+
+        created = create_missing_indexes()
+
+        self.assertEqual(created, ['ix_income_user_id_date'])
+        income.indexes[0].create.assert_called_once_with(mock_db.engine)
+        income.indexes[1].create.assert_not_called()
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_added_column_keeps_server_default(self, mock_db, mock_inspect):
+        user_balance = make_table('user_balance', [])
+        column = Mock()
+        column.name = 'version'
+        column.type.compile.return_value = 'INTEGER'
+        column.server_default.arg = '0'
+        column.nullable = False
+        user_balance.columns = [column]
+        mock_db.metadata.sorted_tables = [user_balance]
+        inspector = mock_inspect.return_value
+        inspector.has_table.return_value = True
+        inspector.get_columns.return_value = []
+        mock_conn = MagicMock()
+        mock_db.engine.begin.return_value.__enter__.return_value = mock_conn
+
+        self.assertEqual(add_missing_columns(), ['user_balance.version'])
+        self.assertEqual(
+            str(mock_conn.execute.call_args.args[0]),
+            'ALTER TABLE user_balance ADD COLUMN version INTEGER DEFAULT 0 NOT NULL',
+        )
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_skips_tables_that_do_not_exist(self, mock_db, mock_inspect):
+        savings = make_table('savings', ['ix_savings_user_id_id'])
+        mock_db.metadata.sorted_tables = [savings]
+        mock_inspect.return_value.has_table.return_value = False
+
+        created = create_missing_indexes()
+
+        self.assertEqual(created, [])
+        savings.indexes[0].create.assert_not_called()
+        mock_inspect.return_value.get_indexes.assert_not_called()
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_nothing_to_do_when_indexes_exist(self, mock_db, mock_inspect):
+        chat = make_table('chat_ai', ['ix_chat_ai_user_id_id'])
+        mock_db.metadata.sorted_tables = [chat]
+        inspector = mock_inspect.return_value
+        inspector.has_table.return_value = True
+        inspector.get_indexes.return_value = [{'name': 'ix_chat_ai_user_id_id'}]
+
+        self.assertEqual(create_missing_indexes(), [])
+        chat.indexes[0].create.assert_not_called()
+
+
+class TestAddMissingColumns(unittest.TestCase):
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_adds_columns_missing_from_existing_tables(self, mock_db, mock_inspect):
+        savings = make_table('savings', [])
+        columns = []
+        for name in ('id', 'amount', 'balance'):
+            column = Mock()
+            column.name = name
+            column.type.compile.return_value = 'INTEGER'
+            column.server_default = None
+            columns.append(column)
+        savings.columns = columns
+        mock_db.metadata.sorted_tables = [savings]
+        inspector = mock_inspect.return_value
+        inspector.has_table.return_value = True
+        inspector.get_columns.return_value = [{'name': 'id'}, {'name': 'amount'}]
+        mock_conn = MagicMock()
+        mock_db.engine.begin.return_value.__enter__.return_value = mock_conn
+
+        added = add_missing_columns()
+
+        self.assertEqual(added, ['savings.balance'])
+        mock_conn.execute.assert_called_once()
+        self.assertEqual(
+            str(mock_conn.execute.call_args.args[0]),
+            'ALTER TABLE savings ADD COLUMN balance INTEGER',
+        )
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_added_column_keeps_server_default(self, mock_db, mock_inspect):
+        user_balance = make_table('user_balance', [])
+        column = Mock()
+        column.name = 'version'
+        column.type.compile.return_value = 'INTEGER'
+        column.server_default.arg = '0'
+        column.nullable = False
+        user_balance.columns = [column]
+        mock_db.metadata.sorted_tables = [user_balance]
+        inspector = mock_inspect.return_value
+        inspector.has_table.return_value = True
+        inspector.get_columns.return_value = []
+        mock_conn = MagicMock()
+        mock_db.engine.begin.return_value.__enter__.return_value = mock_conn
+
+        self.assertEqual(add_missing_columns(), ['user_balance.version'])
+        self.assertEqual(
+            str(mock_conn.execute.call_args.args[0]),
+            'ALTER TABLE user_balance ADD COLUMN version INTEGER DEFAULT 0 NOT NULL',
+        )
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_skips_tables_that_do_not_exist(self, mock_db, mock_inspect):
+        mock_db.metadata.sorted_tables = [make_table('ledger', [])]
+        mock_inspect.return_value.has_table.return_value = False
+
+        self.assertEqual(add_missing_columns(), [])
+        mock_db.engine.begin.assert_not_called()
+
+
+class TestBackfillSavingsBalances(unittest.TestCase):
+
+    @patch(PATCH_TARGET_DB)
+    def test_writes_running_balance_per_user(self, mock_db):
+        read_conn = MagicMock()
+        read_conn.execute.return_value.scalars.return_value.all.return_value = [4]
+        read_conn.execute.return_value.all.return_value = [(1, 1000), (5, -250), (9, 500)]
+        mock_db.engine.connect.return_value.__enter__.return_value = read_conn
+        write_conn = MagicMock()
+        mock_db.engine.begin.return_value.__enter__.return_value = write_conn
+
+        count = backfill_savings_balances(batch_size=2)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            [c.args[1] for c in write_conn.execute.call_args_list],
+            [
+                [{'id': 1, 'balance': 1000}, {'id': 5, 'balance': 750}],
+                [{'id': 9, 'balance': 1250}],
+            ],
+        )
+
+    @patch(PATCH_TARGET_DB)
+    def test_nothing_to_backfill(self, mock_db):
+        read_conn = MagicMock()
+        read_conn.execute.return_value.scalars.return_value.all.return_value = []
+        mock_db.engine.connect.return_value.__enter__.return_value = read_conn
+
+        self.assertEqual(backfill_savings_balances(), 0)
+        mock_db.engine.begin.assert_not_called()
+
+
+class TestBackfillChatHistory(unittest.TestCase):
+
+    @patch(PATCH_TARGET_DB)
+    def test_compresses_legacy_rows_into_first_conversation(self, mock_db):
+        read_conn = MagicMock()
+        read_conn.execute.return_value.scalar.return_value = 2
+        mock_db.engine.connect.return_value.__enter__.return_value = read_conn
+        write_conn = MagicMock()
+        write_conn.execute.return_value.all.return_value = [
+            (1, 'hi', 'hello there'),
+            (2, b'already', None),
+        ]
+        mock_db.engine.begin.return_value.__enter__.return_value = write_conn
+
+        count = backfill_chat_history()
+
+        self.assertEqual(count, 2)
+        update = write_conn.execute.call_args_list[-1]
+        self.assertIn('SET conversation_id = 1', str(update.args[0]))
+        params = update.args[1]
+        self.assertEqual(zlib.decompress(params[0]['message']), b'hi')
+        self.assertEqual(zlib.decompress(params[0]['response']), b'hello there')
+        self.assertEqual(params[1]['message'], b'already')
+        self.assertIsNone(params[1]['response'])
+
+    @patch(PATCH_TARGET_DB)
+    def test_skips_batches_without_legacy_rows(self, mock_db):
+        read_conn = MagicMock()
+        read_conn.execute.return_value.scalar.return_value = 5
+        mock_db.engine.connect.return_value.__enter__.return_value = read_conn
+        write_conn = MagicMock()
+        write_conn.execute.return_value.all.return_value = []
+        mock_db.engine.begin.return_value.__enter__.return_value = write_conn
+
+        self.assertEqual(backfill_chat_history(), 0)
+        write_conn.execute.assert_called_once()
+
+
+class TestConvertAmountsToCents(unittest.TestCase):
+
+    def _executed_sql(self, mock_conn):
+        return [str(c.args[0]) for c in mock_conn.execute.call_args_list]
+
+    @patch('website.commands._legacy_money_columns')
+    @patch(PATCH_TARGET_DB)
+    def test_converts_in_batches_and_swaps_columns(self, mock_db, mock_legacy):
+        mock_legacy.return_value = [('income', 'amount', False)]
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.scalar.return_value = 25
+        mock_db.engine.begin.return_value.__enter__.return_value = mock_conn
+
+        converted = convert_amounts_to_cents(batch_size=10)
+
+        self.assertEqual(converted, ['income.amount'])
+        statements = self._executed_sql(mock_conn)
+        self.assertEqual(statements[0], 'ALTER TABLE income ADD COLUMN amount_cents INTEGER')
+        updates = [c for c in mock_conn.execute.call_args_list if str(c.args[0]).startswith('UPDATE')]
+        self.assertEqual(
+            [c.args[1] for c in updates],
+            [{'low': 0, 'high': 10}, {'low': 10, 'high': 20}, {'low': 20, 'high': 30}],
+        )
+        self.assertEqual(statements[-2], 'ALTER TABLE income DROP COLUMN amount')
+        self.assertEqual(statements[-1], 'ALTER TABLE income RENAME COLUMN amount_cents TO amount')
+
+    @patch('website.commands._legacy_money_columns')
+    @patch(PATCH_TARGET_DB)
+    def test_resumes_without_adding_column_again(self, mock_db, mock_legacy):
+        mock_legacy.return_value = [('savings', 'amount', True)]
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.scalar.return_value = None
+        mock_db.engine.begin.return_value.__enter__.return_value = mock_conn
+
+        convert_amounts_to_cents()
+
+        statements = self._executed_sql(mock_conn)
+        self.assertNotIn('ALTER TABLE savings ADD COLUMN amount_cents INTEGER', statements)
+        self.assertIn('ALTER TABLE savings DROP COLUMN amount', statements)
+
+    @patch('website.commands._legacy_money_columns')
+    @patch(PATCH_TARGET_DB)
+    def test_nothing_to_convert(self, mock_db, mock_legacy):
+        mock_legacy.return_value = []
+        self.assertEqual(convert_amounts_to_cents(), [])
+        mock_db.engine.begin.assert_not_called()
+
+
+class TestInternLedgerTypes(unittest.TestCase):
+
+    def _setup(self, mock_db, mock_inspect, columns, mock_type=None):
+        if mock_type is not None:
+            mock_type.__table__ = Mock()
+        inspector = mock_inspect.return_value
+        inspector.has_table.return_value = True
+        inspector.get_columns.return_value = [{'name': name} for name in columns]
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.scalar.return_value = 5
+        mock_db.engine.begin.return_value.__enter__.return_value = mock_conn
+        return mock_conn
+
+    @patch('website.commands.TransactionType')
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_moves_type_strings_to_lookup_ids(self, mock_db, mock_inspect, mock_type):
+        mock_conn = self._setup(mock_db, mock_inspect, ['id', 'type'], mock_type)
+
+        self.assertTrue(intern_ledger_types(batch_size=3))
+
+        mock_type.__table__.create.assert_called_once_with(mock_db.engine, checkfirst=True)
+        statements = [str(c.args[0]) for c in mock_conn.execute.call_args_list]
+        self.assertTrue(statements[0].startswith('ALTER TABLE ledger ADD COLUMN type_id SMALLINT'))
+        self.assertTrue(statements[1].startswith('INSERT INTO transaction_type (label)'))
+        updates = [c for c in mock_conn.execute.call_args_list if str(c.args[0]).startswith('UPDATE')]
+        self.assertEqual(
+            [c.args[1] for c in updates],
+            [{'low': 0, 'high': 3}, {'low': 3, 'high': 6}],
+        )
+        self.assertEqual(statements[-1], 'ALTER TABLE ledger DROP COLUMN type')
+
+    @patch('website.commands.TransactionType')
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_resumes_with_existing_type_id_column(self, mock_db, mock_inspect, mock_type):
+        mock_conn = self._setup(mock_db, mock_inspect, ['id', 'type', 'type_id'], mock_type)
+
+        intern_ledger_types()
+
+        statements = [str(c.args[0]) for c in mock_conn.execute.call_args_list]
+        self.assertFalse(any(s.startswith('ALTER TABLE ledger ADD') for s in statements))
+
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_already_interned(self, mock_db, mock_inspect):
+        self._setup(mock_db, mock_inspect, ['id', 'type_id'])
+
+        self.assertFalse(intern_ledger_types())
+        mock_db.engine.begin.assert_not_called()
+
+
+class TestMergeLegacyLedgerTables(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch('website.commands.TransactionType')
+        self.mock_type = patcher.start()
+        self.mock_type.__table__ = Mock()
+        self.addCleanup(patcher.stop)
+
+    def _setup(self, mock_db, mock_inspect, mock_ledger, tables, amount_type):
+        mock_ledger.__table__ = Mock()
+        inspector = mock_inspect.return_value
+        inspector.has_table.side_effect = lambda name: name in tables
+        inspector.get_columns.return_value = [
+            {'name': 'id', 'type': Integer()},
+            {'name': 'amount', 'type': amount_type},
+        ]
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.scalar.return_value = 3
+        mock_db.engine.begin.return_value.__enter__.return_value = mock_conn
+        mock_db.engine.connect.return_value.__enter__.return_value = mock_conn
+        return mock_conn
+
+    @patch('website.commands.Ledger')
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_copies_rows_with_kind_and_drops_table(self, mock_db, mock_inspect, mock_ledger):
+        mock_conn = self._setup(mock_db, mock_inspect, mock_ledger, ['expenses'], Integer())
+
+        merged = merge_legacy_ledger_tables(batch_size=2)
+
+        self.assertEqual(merged, ['expenses'])
+        mock_ledger.__table__.create.assert_called_once_with(mock_db.engine, checkfirst=True)
+        inserts = [c for c in mock_conn.execute.call_args_list if str(c.args[0]).startswith('INSERT INTO ledger')]
+        self.assertEqual(len(inserts), 2)
+        self.assertIn('SELECT :kind, amount, name', str(inserts[0].args[0]))
+        self.assertIn('WHERE transaction_type.label = expenses.type', str(inserts[0].args[0]))
+        interned = [c for c in mock_conn.execute.call_args_list
+                    if str(c.args[0]).startswith('INSERT INTO transaction_type')]
+        self.assertIn('FROM expenses', str(interned[0].args[0]))
+        self.assertEqual(inserts[0].args[1], {'low': 0, 'high': 2, 'kind': 2})
+        self.assertEqual(inserts[1].args[1], {'low': 2, 'high': 4, 'kind': 2})
+        self.assertEqual(str(mock_conn.execute.call_args_list[-1].args[0]), 'DROP TABLE expenses')
+
+    @patch('website.commands.Ledger')
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_converts_float_amounts_while_copying(self, mock_db, mock_inspect, mock_ledger):
+        mock_conn = self._setup(mock_db, mock_inspect, mock_ledger, ['income'], Float())
+
+        merge_legacy_ledger_tables()
+
+        inserts = [c for c in mock_conn.execute.call_args_list if str(c.args[0]).startswith('INSERT INTO ledger')]
+        self.assertIn('CAST(ROUND(amount * 100) AS INTEGER)', str(inserts[0].args[0]))
+
+    @patch('website.commands.Ledger')
+    @patch(PATCH_TARGET_INSPECT)
+    @patch(PATCH_TARGET_DB)
+    def test_no_legacy_tables(self, mock_db, mock_inspect, mock_ledger):
+        self._setup(mock_db, mock_inspect, mock_ledger, [], Integer())
+
+        self.assertEqual(merge_legacy_ledger_tables(), [])
+        mock_ledger.__table__.create.assert_not_called()
+        mock_db.engine.begin.assert_not_called()
+
+
+class TestUpgradeCommand(unittest.TestCase):
+
+    @patch('website.commands.backfill_chat_history')
+    @patch('website.commands.ensure_name_index')
+    @patch('website.commands.intern_ledger_types')
+    @patch('website.commands.backfill_savings_balances')
+    @patch('website.commands.add_missing_columns')
+    @patch('website.commands.rebuild_monthly_rollups')
+    @patch('website.commands.rollups_missing')
+    @patch('website.commands.enable_ledger_autoincrement')
+    @patch('website.commands.merge_legacy_ledger_tables')
+    @patch('website.commands.convert_amounts_to_cents')
+    @patch('website.commands.create_missing_indexes')
+    @patch(PATCH_TARGET_DB)
+    def test_upgrade_creates_tables_and_indexes(
+        self, mock_db, mock_create_indexes, mock_convert, mock_merge,
+        mock_autoincrement, mock_rollups_missing, mock_rebuild_rollups,
+        mock_add_columns, mock_backfill, mock_intern, mock_ensure_name_index,
+        mock_backfill_chat
+    ):
+        mock_autoincrement.return_value = True
+        mock_rollups_missing.return_value = False
+        mock_rebuild_rollups.return_value = 7
+        mock_convert.return_value = ['income.amount']
+        mock_add_columns.return_value = ['savings.balance']
+        mock_intern.return_value = True
+        mock_ensure_name_index.return_value = True
+        mock_backfill_chat.return_value = 3
+        mock_backfill.return_value = 2
+        mock_merge.return_value = ['income']
+        mock_create_indexes.return_value = ['ix_income_user_id_date']
+        app = Flask(__name__)
+
+        result = app.test_cli_runner().invoke(upgrade, ['--batch-size', '500'])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_convert.assert_called_once_with(500)
+        mock_merge.assert_called_once_with(500)
+        mock_db.metadata.create_all.assert_called_once()
+        mock_create_indexes.assert_called_once()
+        self.assertIn('Converted income.amount to integer cents', result.output)
+        self.assertIn('Merged income into ledger', result.output)
+        self.assertIn('Rebuilt ledger with AUTOINCREMENT ids', result.output)
+        mock_intern.assert_called_once_with(500)
+        self.assertIn('Moved ledger types into transaction_type', result.output)
+        self.assertIn('Built the ledger name search index', result.output)
+        mock_backfill_chat.assert_called_once_with(500)
+        self.assertIn('Compressed 3 chat messages', result.output)
+        self.assertIn('Created index ix_income_user_id_date', result.output)
+        self.assertIn('Added column savings.balance', result.output)
+        mock_backfill.assert_called_once_with(500)
+        self.assertIn('Backfilled savings balances for 2 users', result.output)
+        mock_rebuild_rollups.assert_called_once_with()
+        self.assertIn('Built 7 monthly rollups', result.output)
+        self.assertIn('Database is up to date.', result.output)
+
+    @patch('website.commands.backfill_chat_history')
+    @patch('website.commands.ensure_name_index')
+    @patch('website.commands.intern_ledger_types')
+    @patch('website.commands.backfill_savings_balances')
+    @patch('website.commands.add_missing_columns')
+    @patch('website.commands.rebuild_monthly_rollups')
+    @patch('website.commands.rollups_missing')
+    @patch('website.commands.enable_ledger_autoincrement')
+    @patch('website.commands.merge_legacy_ledger_tables')
+    @patch('website.commands.convert_amounts_to_cents')
+    @patch('website.commands.create_missing_indexes')
+    @patch(PATCH_TARGET_DB)
+    def test_upgrade_builds_missing_rollups(
+        self, mock_db, mock_create_indexes, mock_convert, mock_merge,
+        mock_autoincrement, mock_rollups_missing, mock_rebuild_rollups,
+        mock_add_columns, mock_backfill, mock_intern, mock_ensure_name_index,
+        mock_backfill_chat
+    ):
+        mock_convert.return_value = []
+        mock_merge.return_value = []
+        mock_autoincrement.return_value = False
+        mock_rollups_missing.return_value = True
+        mock_add_columns.return_value = []
+        mock_intern.return_value = False
+        mock_ensure_name_index.return_value = False
+        mock_backfill_chat.return_value = 0
+        mock_backfill.return_value = 0
+        mock_rebuild_rollups.return_value = 4
+        app = Flask(__name__)
+
+        result = app.test_cli_runner().invoke(upgrade)
+
+        self.assertEqual(result.exit_code, 0)
+        mock_rebuild_rollups.assert_called_once_with()
+        self.assertIn('Built 4 monthly rollups', result.output)
+        self.assertNotIn('Backfilled', result.output)
+
+    @patch('website.commands.backfill_chat_history')
+    @patch('website.commands.ensure_name_index')
+    @patch('website.commands.intern_ledger_types')
+    @patch('website.commands.backfill_savings_balances')
+    @patch('website.commands.add_missing_columns')
+    @patch('website.commands.rebuild_monthly_rollups')
+    @patch('website.commands.rollups_missing')
+    @patch('website.commands.enable_ledger_autoincrement')
+    @patch('website.commands.merge_legacy_ledger_tables')
+    @patch('website.commands.convert_amounts_to_cents')
+    @patch('website.commands.create_missing_indexes')
+    @patch(PATCH_TARGET_DB)
+    def test_upgrade_keeps_current_rollups(
+        self, mock_db, mock_create_indexes, mock_convert, mock_merge,
+        mock_autoincrement, mock_rollups_missing, mock_rebuild_rollups,
+        mock_add_columns, mock_backfill, mock_intern, mock_ensure_name_index,
+        mock_backfill_chat
+    ):
+        mock_convert.return_value = []
+        mock_merge.return_value = []
+        mock_autoincrement.return_value = False
+        mock_rollups_missing.return_value = False
+        mock_add_columns.return_value = []
+        mock_create_indexes.return_value = []
+        mock_intern.return_value = False
+        mock_ensure_name_index.return_value = False
+        mock_backfill_chat.return_value = 0
+        mock_backfill.return_value = 0
+        app = Flask(__name__)
+
+        result = app.test_cli_runner().invoke(upgrade)
+
+        self.assertEqual(result.exit_code, 0)
+        mock_rebuild_rollups.assert_not_called()
+
+
+class TestEnableLedgerAutoincrement(DatabaseTestCase):
+
+    def create_tables(self):
+        db.create_all()
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP TABLE ledger'))
+            conn.execute(text(
+                'CREATE TABLE ledger (id INTEGER NOT NULL PRIMARY KEY, '
+                'amount BIGINT, name VARCHAR(255), date DATE, type_id SMALLINT, '
+                'user_id INTEGER, kind SMALLINT NOT NULL)'
+            ))
+            conn.execute(text(
+                "INSERT INTO ledger (id, amount, name, kind, user_id) "
+                "VALUES (1, 500, 'Rent', 2, 1), (2, 900, 'Salary', 1, 1)"
+            ))
+            conn.execute(text(
+                "INSERT INTO ledger_archive (id, amount, name, kind, user_id) "
+                "VALUES (5, 100, 'Old', 2, 1)"
+            ))
+
+    def _ledger_sql(self):
+        with db.engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'ledger'"
+            )).scalar()
+
+    def test_rebuilds_ledger_once(self):
+        self.assertTrue(enable_ledger_autoincrement())
+        self.assertFalse(enable_ledger_autoincrement())
+
+        self.assertIn('AUTOINCREMENT', self._ledger_sql())
+        self.assertEqual(
+            [(row.id, row.name) for row in Ledger.query.order_by(Ledger.id)],
+            [(1, 'Rent'), (2, 'Salary')],
+        )
+        indexes = {index['name'] for index in inspect(db.engine).get_indexes('ledger')}
+        self.assertIn('ix_ledger_user_id_kind_date', indexes)
+
+    def test_new_rows_continue_after_archived_ids(self):
+        enable_ledger_autoincrement()
+
+        row = Expenses(user_id=1, amount=10, name='Taxi')
+        db.session.add(row)
+        db.session.commit()
+
+        self.assertEqual(row.id, 6)
+
+
+class TestUpgradeLegacyDatabase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'legacy.db')
+        connection = sqlite3.connect(path)
+        connection.executescript(LEGACY_SCHEMA)
+        for month in range(1, 13):
+            connection.execute(
+                "INSERT INTO income (amount, name, date, type, user_id) "
+                "VALUES (100.5, 'Salary', ?, 'Income', 1)",
+                (f'2024-{month:02d}-05',),
+            )
+            connection.execute(
+                "INSERT INTO expenses (amount, name, date, type, user_id) "
+                "VALUES (10.25, 'Coffee', ?, 'Expenses', 1)",
+                (f'2024-{month:02d}-10',),
+            )
+        connection.commit()
+        connection.close()
+
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+        db.init_app(self.app)
+        self.addCleanup(reset_caches)
+        with self.app.app_context():
+            # create_app() creates any missing tables before upgrade runs.
+            db.create_all()
+            db.engine.dispose()
+
+    def test_upgrade_builds_rollups_for_merged_rows(self):
+        result = self.app.test_cli_runner().invoke(upgrade)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Merged income into ledger', result.output)
+        self.assertIn('Built 24 monthly rollups', result.output)
+        with self.app.app_context():
+            totals = get_period_totals_by_kind(1, {
+                INCOME: (datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)),
+                EXPENSES: (datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)),
+            })
+            db.session.remove()
+            db.engine.dispose()
+
+        self.assertEqual(str(totals[INCOME]), '1206.00')
+        self.assertEqual(str(totals[EXPENSES]), '123.00')
+
+
+class TestUpgradeShardedDatabase(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = {
+            name: os.path.join(directory.name, f'{name}.db')
+            for name in ('catalog', 'shard_00', 'shard_01')
+        }
+        connection = sqlite3.connect(self.paths['shard_01'])
+        connection.execute(
+            "CREATE TABLE ledger (kind SMALLINT NOT NULL, id INTEGER NOT NULL PRIMARY KEY, "
+            "amount INTEGER, name VARCHAR(255), date DATE, type_id SMALLINT, user_id INTEGER)"
+        )
+        connection.executemany(
+            "INSERT INTO ledger (kind, amount, name, date, user_id) VALUES (?, ?, 'Row', ?, 1)",
+            [(INCOME, 300000, '2024-01-05'), (EXPENSES, 1200, '2024-01-10'),
+             (INCOME, 300000, '2024-02-05')],
+        )
+        connection.commit()
+        connection.close()
+
+        self.app = Flask(__name__)
+        self.app.config.update({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.paths['catalog']}",
+            'SHARD_COUNT': 2,
+            'SQLALCHEMY_BINDS': {
+                key: f'sqlite:///{self.paths[key]}' for key in ('shard_00', 'shard_01')
+            },
+        })
+        db.init_app(self.app)
+        self.addCleanup(forget_binds)
+        self.addCleanup(reset_caches)
+
+    def _rows(self, name, sql):
+        connection = sqlite3.connect(self.paths[name])
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def _tables(self, name):
+        return {
+            row[0] for row in self._rows(name, "SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+
+    def test_upgrade_migrates_every_shard(self):
+        result = self.app.test_cli_runner().invoke(upgrade)
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Upgrading shard_00', result.output)
+        self.assertIn('Upgrading shard_01', result.output)
+        self.assertIn('Rebuilt ledger with AUTOINCREMENT ids', result.output)
+        self.assertIn('Built 3 monthly rollups', result.output)
+
+        catalog = self._tables('catalog')
+        self.assertIn('user', catalog)
+        self.assertIn('transaction_type', catalog)
+        self.assertNotIn('ledger', catalog)
+        self.assertNotIn('monthly_rollup', catalog)
+        for key in ('shard_00', 'shard_01'):
+            tables = self._tables(key)
+            self.assertIn('ledger', tables)
+            self.assertIn('ledger_fts', tables)
+            self.assertIn('user_balance', tables)
+            self.assertNotIn('user', tables)
+        self.assertEqual(
+            self._rows('shard_01', 'SELECT COUNT(*) FROM monthly_rollup'), [(3,)]
+        )
+        self.assertEqual(
+            self._rows('shard_01', "SELECT COUNT(*) FROM ledger_fts WHERE ledger_fts MATCH 'row'"),
+            [(3,)],
+        )
+
+    def test_second_upgrade_has_nothing_to_do(self):
+        self.app.test_cli_runner().invoke(upgrade)
+
+        result = self.app.test_cli_runner().invoke(upgrade)
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertNotIn('Built', result.output)
+        self.assertNotIn('Rebuilt', result.output)
+
+
+class TestUpgradeEnablesSharding(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = {
+            name: os.path.join(directory.name, f'{name}.db')
+            for name in ('catalog', 'shard_00', 'shard_01')
+        }
+        connection = sqlite3.connect(self.paths['catalog'])
+        connection.executescript(LEGACY_SCHEMA)
+        connection.execute("INSERT INTO user VALUES (4, 'bob', 'x')")
+        connection.executemany(
+            "INSERT INTO income (amount, name, date, type, user_id) VALUES (?, 'Salary', ?, 'Income', ?)",
+            [(100.5, '2024-01-05', 1), (200, '2024-02-05', 1), (50, '2024-01-05', 4)],
+        )
+        connection.commit()
+        connection.close()
+        self.addCleanup(reset_caches)
+
+        unsharded = Flask(__name__)
+        unsharded.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{self.paths['catalog']}"
+        db.init_app(unsharded)
+        result = unsharded.test_cli_runner().invoke(upgrade)
+        self.assertEqual(result.exit_code, 0, result.output)
+        with unsharded.app_context():
+            db.engine.dispose()
+        connection = sqlite3.connect(self.paths['catalog'])
+        connection.execute(
+            "INSERT INTO ledger_archive (id, kind, amount, name, date, user_id) "
+            "VALUES (10, 1, 700, 'Old', '2020-01-05', 1)"
+        )
+        connection.commit()
+        connection.close()
+
+        self.app = Flask(__name__)
+        self.app.config.update({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.paths['catalog']}",
+            'SHARD_COUNT': 2,
+            'SQLALCHEMY_BINDS': {
+                key: f'sqlite:///{self.paths[key]}' for key in ('shard_00', 'shard_01')
+            },
+        })
+        db.init_app(self.app)
+        self.addCleanup(forget_binds)
+
+    def _upgrade(self):
+        result = self.app.test_cli_runner().invoke(upgrade)
+        with self.app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def _rows(self, name, sql):
+        connection = sqlite3.connect(self.paths[name])
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test_existing_rows_move_into_user_shards(self):
+        output = self._upgrade()
+
+        self.assertIn('Moved 3 ledger rows into user shards', output)
+        self.assertIn('Moved 1 ledger_archive rows into user shards', output)
+        self.assertEqual(
+            self._rows('catalog', "SELECT name FROM sqlite_master WHERE name IN "
+                       "('ledger', 'ledger_fts', 'monthly_rollup', 'savings', 'income')"),
+            [],
+        )
+        self.assertEqual(self._rows('catalog', 'SELECT COUNT(*) FROM user'), [(2,)])
+        self.assertEqual(self._rows('shard_01', 'SELECT user_id, amount FROM ledger ORDER BY id'),
+                         [(1, 10050), (1, 20000)])
+        self.assertEqual(self._rows('shard_00', 'SELECT user_id, amount FROM ledger'), [(4, 5000)])
+        self.assertEqual(
+            self._rows('shard_01', "SELECT COUNT(*) FROM ledger_fts WHERE ledger_fts MATCH 'salary'"),
+            [(2,)],
+        )
+
+        with self.app.app_context():
+            with use_user_shard(1):
+                self.assertEqual(str(get_user_balance(1).income), '307.50')
+                db.session.add(Income(user_id=1, amount=1, name='Tip', date=datetime.date(2024, 3, 1)))
+                db.session.commit()
+                self.assertEqual(Income.query.filter_by(name='Tip').one().id, 11)
+            db.session.remove()
+
+    def test_second_upgrade_moves_nothing(self):
+        self._upgrade()
+
+        output = self._upgrade()
+
+        self.assertNotIn('Moved', output)
+        self.assertNotIn('main database', output)
+
+
+class TestRebuildBalancesCommand(unittest.TestCase):
+
+    @patch('website.commands.rebuild_user_balances')
+    def test_rebuild_balances(self, mock_rebuild):
+        mock_rebuild.return_value = 12
+        app = Flask(__name__)
+
+        result = app.test_cli_runner().invoke(rebuild_balances)
+
+        self.assertEqual(result.exit_code, 0)
+        mock_rebuild.assert_called_once_with()
+        self.assertIn('Rebuilt balances for 12 users.', result.output)
+
+
+class TestArchiveCommand(unittest.TestCase):
+
+    @patch('website.commands.archive_old_rows')
+    def test_uses_configured_horizon(self, mock_archive):
+        mock_archive.return_value = 40
+        app = Flask(__name__)
+        app.config['ARCHIVE_AFTER_DAYS'] = 365
+
+        result = app.test_cli_runner().invoke(archive)
+
+        self.assertEqual(result.exit_code, 0)
+        mock_archive.assert_called_once_with(365, 1000)
+        self.assertIn('Archived 40 ledger rows older than 365 days.', result.output)
+
+    @patch('website.commands.archive_old_rows')
+    def test_horizon_option_overrides_config(self, mock_archive):
+        mock_archive.return_value = 0
+        app = Flask(__name__)
+
+        result = app.test_cli_runner().invoke(
+            archive, ['--older-than-days', '90', '--batch-size', '50']
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        mock_archive.assert_called_once_with(90, 50)
+
+
+class TestRebuildRollupsCommand(unittest.TestCase):
+
+    @patch('website.commands.rebuild_monthly_rollups')
+    def test_rebuild_rollups(self, mock_rebuild):
+        mock_rebuild.return_value = 30
+        app = Flask(__name__)
+
+        result = app.test_cli_runner().invoke(rebuild_rollups)
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Rebuilt 30 monthly rollups.', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,24 @@
+import unittest
+
+from website.compression import compress_text, decompress_text
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_round_trip(self):
+        text = "Budget analysis: spend less on coffee. " * 200 + "€"
+        compressed = compress_text(text)
+
+        self.assertIsInstance(compressed, bytes)
+        self.assertLess(len(compressed), len(text.encode("utf-8")))
+        self.assertEqual(decompress_text(compressed), text)
+
+    def test_legacy_plain_text_is_returned_as_is(self):
+        self.assertEqual(decompress_text("hello there"), "hello there")
+
+    def test_uncompressed_bytes_are_decoded(self):
+        self.assertEqual(decompress_text("plain".encode("utf-8")), "plain")
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
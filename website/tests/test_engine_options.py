@@ -0,0 +1,123 @@
+import os
+import unittest
+import datetime
+from unittest.mock import patch
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql
+
+from website import db
+from website.engine_options import database_uri_from_env, engine_options_from_env
+from website.ai_models.user_finances import get_user_financial_context
+from website.filters import filter_reports
+from website.finances.monthly_rollup import rebuild_monthly_rollups
+from website.finances.report_calculations import get_period_totals
+from website.models import Income, Expenses, Planning, LedgerArchive, UserBalance
+from website.testing import DatabaseTestCase
+
+
+class TestEngineOptions(unittest.TestCase):
+
+    def test_default_uri_when_unset(self):
+        with patch.dict(os.environ, {}, clear=True):
+            uri = database_uri_from_env('sqlite:///database.db')
+
+        self.assertEqual(uri, 'sqlite:///database.db')
+
+    def test_database_url_overrides_default(self):
+        with patch.dict(os.environ, {'DATABASE_URL': 'postgresql://app@db/finance'}):
+            uri = database_uri_from_env('sqlite:///database.db')
+
+        self.assertEqual(uri, 'postgresql://app@db/finance')
+
+    def test_postgres_scheme_is_normalized(self):
+        with patch.dict(os.environ, {'DATABASE_URL': 'postgres://app@db/finance'}):
+            uri = database_uri_from_env('sqlite:///database.db')
+
+        self.assertEqual(uri, 'postgresql://app@db/finance')
+
+    def test_only_set_options_are_passed(self):
+        with patch.dict(os.environ, {}, clear=True):
+            options = engine_options_from_env()
+
+        self.assertEqual(options, {'pool_pre_ping': True})
+
+    def test_pool_options_from_environment(self):
+        environment = {
+            'DB_POOL_SIZE': '10',
+            'DB_MAX_OVERFLOW': '20',
+            'DB_POOL_RECYCLE': '1800',
+            'DB_POOL_PRE_PING': 'false',
+            'DB_STATEMENT_CACHE_SIZE': '1000',
+        }
+        with patch.dict(os.environ, environment, clear=True):
+            options = engine_options_from_env()
+
+        self.assertEqual(options, {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_recycle': 1800,
+            'pool_pre_ping': False,
+            'query_cache_size': 1000,
+        })
+
+
+class TestPostgresQueries(DatabaseTestCase):
+    config = {'PERIOD_INDEX_USERS': 0}
+
+    def setUp(self):
+        super().setUp()
+
+        db.session.add_all([
+            Income(id=1, user_id=1, amount=3000, name='Salary', date=datetime.date(2025, 5, 1)),
+            Expenses(id=2, user_id=1, amount=1200, name='Rent', date=datetime.date(2025, 5, 1)),
+            Planning(id=3, user_id=1, amount=1500, name='Vacation', date=datetime.date(2025, 8, 1)),
+            LedgerArchive(id=4, user_id=1, kind=2, amount=50, name='Old', date=datetime.date(2020, 1, 1)),
+            UserBalance(user_id=1, income=3000, expenses=1250, planning=1500),
+        ])
+        db.session.commit()
+        rebuild_monthly_rollups()
+
+        self.statements = []
+        listener = lambda state: self.statements.append(state.statement)
+        event.listen(db.session, 'do_orm_execute', listener)
+        self.addCleanup(event.remove, db.session, 'do_orm_execute', listener)
+
+    def _compile_for_postgres(self):
+        self.assertTrue(self.statements)
+        return [
+            str(statement.compile(dialect=postgresql.dialect()))
+            for statement in self.statements
+        ]
+
+    @patch('website.filters.has_name_index', return_value=False)
+    def test_filter_queries_compile_for_postgres(self, mock_index):
+        page = filter_reports(
+            1, amount_query='1200', name_query='rent', report_type='Expenses',
+            amount_min=10, amount_max=5000, start_date=datetime.date(2019, 1, 1),
+            end_date=datetime.date(2025, 12, 31), sort='amount',
+        )
+
+        self.assertEqual([report.id for report in page['reports']], [2])
+        compiled = self._compile_for_postgres()
+        self.assertTrue(any('ILIKE' in sql for sql in compiled))
+        self.assertFalse(any('MATCH' in sql for sql in compiled))
+
+    def test_period_total_queries_compile_for_postgres(self):
+        totals = get_period_totals(
+            1,
+            datetime.date(2025, 1, 1), datetime.date(2025, 12, 31),
+            datetime.date(2019, 1, 1), datetime.date(2025, 12, 31),
+            datetime.date(2025, 1, 1), datetime.date(2025, 12, 31),
+        )
+
+        self.assertEqual([str(total) for total in totals], ['3000.00', '1250.00', '1500.00'])
+        compiled = self._compile_for_postgres()
+        self.assertTrue(any('sum(CASE WHEN' in sql for sql in compiled))
+
+    def test_ai_context_queries_compile_for_postgres(self):
+        with patch('website.ai_models.user_finances.flash'):
+            context = get_user_financial_context(1)
+
+        self.assertIn('2025-05', context['monthly_str'])
+        self._compile_for_postgres()
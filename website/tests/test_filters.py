@@ -1,240 +1,233 @@
 import unittest
-from unittest.mock import patch, Mock, MagicMock
 import datetime
+from decimal import Decimal
+from unittest.mock import patch
 
-from website.filters import filter_reports
+from website import db
+from website.filters import decode_cursor, encode_cursor, filter_reports
+from website.models import Income, Expenses, Planning, LedgerArchive, EXPENSES
+from website.testing import DatabaseTestCase
 
-PATCH_TARGET_INCOME = 'website.filters.Income'
-PATCH_TARGET_EXPENSES = 'website.filters.Expenses'
-PATCH_TARGET_PLANNING = 'website.filters.Planning'
 
-
-class TestFilterReports(unittest.TestCase):
+class TestFilterReports(DatabaseTestCase):
 
     def setUp(self):
+        super().setUp()
+
         self.user_id = 1
-        self.mock_income_record = Mock(id=1, name='Salary', amount=3000.0, date=datetime.date(2025, 5, 1),
-                                        type='Monthly')
-        self.mock_expense_record = Mock(id=2, name='Rent', amount=1200.0, date=datetime.date(2025, 5, 1),
-                                         type='Housing')
-        self.mock_planning_record = Mock(id=3, name='Vacation', amount=1500.0, date=datetime.date(2025, 8, 1),
-                                          type='Travel')  # type might differ
-
-    def _setup_mock_queries(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query = MagicMock(name='IncomeQuery')
-        mock_expenses_query = MagicMock(name='ExpensesQuery')
-        mock_planning_query = MagicMock(name='PlanningQuery')
-
-        mock_income.query.filter_by.return_value = mock_income_query
-        mock_expenses.query.filter_by.return_value = mock_expenses_query
-        mock_planning.query.filter_by.return_value = mock_planning_query
-
-        mock_income_query.filter.return_value = mock_income_query
-        mock_expenses_query.filter.return_value = mock_expenses_query
-        mock_planning_query.filter.return_value = mock_planning_query
-
-        # Mock column comparators used in filters
-        for model_mock in [mock_income, mock_expenses, mock_planning]:
-            model_mock.id = MagicMock(name=f'{model_mock._extract_mock_name()}.id')
-            model_mock.id.__eq__ = Mock(
-                return_value=f"{model_mock._extract_mock_name()}.id == None")  # Return value is just for identification in asserts
-            model_mock.name = MagicMock(name=f'{model_mock._extract_mock_name()}.name')
-            model_mock.name.like = Mock(return_value=f"{model_mock._extract_mock_name()}.name LIKE %query%")
-            model_mock.date = MagicMock(name=f'{model_mock._extract_mock_name()}.date')
-            model_mock.date.__eq__ = Mock(return_value=f"{model_mock._extract_mock_name()}.date == date")
-            model_mock.amount = MagicMock(name=f'{model_mock._extract_mock_name()}.amount')
-            model_mock.amount.__eq__ = Mock(return_value=f"{model_mock._extract_mock_name()}.amount == amount")
-
-        return mock_income_query, mock_expenses_query, mock_planning_query
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_no_filters(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+        db.session.add_all([
+            Income(id=1, user_id=1, amount=3000, name='Salary', date=datetime.date(2025, 5, 1)),
+            Expenses(id=2, user_id=1, amount=1200, name='Rent', date=datetime.date(2025, 5, 1)),
+            Planning(id=3, user_id=1, amount=1500, name='Vacation', date=datetime.date(2025, 8, 1)),
+            Expenses(id=4, user_id=1, amount=Decimal('123.45'), name='Salad bar', date=datetime.date(2025, 5, 10)),
+            Income(id=5, user_id=2, amount=10, name='Salary', date=datetime.date(2025, 5, 1)),
+        ])
+        db.session.commit()
+
+    def _add_expense(self, id, amount, name, day):
+        from website.finances.ledger_sync import record_ledger_change
+        db.session.add(
+            Expenses(id=id, user_id=1, amount=amount, name=name, date=day)
         )
-        mock_income_query.all.return_value = [self.mock_income_record]
-        mock_expenses_query.all.return_value = [self.mock_expense_record]
-        mock_planning_query.all.return_value = [self.mock_planning_record]
-
-        result = filter_reports(self.user_id)
-
-        mock_income.query.filter_by.assert_called_once_with(user_id=self.user_id)
-        mock_expenses.query.filter_by.assert_called_once_with(user_id=self.user_id)
-        mock_planning.query.filter_by.assert_called_once_with(user_id=self.user_id)
-
-        mock_income_query.filter.assert_not_called()
-        mock_expenses_query.filter.assert_not_called()
-        mock_planning_query.filter.assert_not_called()
-
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
-
-        self.assertEqual(result['income'], [self.mock_income_record])
-        self.assertEqual(result['expenses'], [self.mock_expense_record])
-        self.assertEqual(result['planning'], [self.mock_planning_record])
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_report_type_income(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+        record_ledger_change(1, EXPENSES, day, amount)
+        db.session.commit()
+
+    def _ids(self, page):
+        return [report.id for report in page['reports']]
+
+    def test_no_filters_newest_first(self):
+        page = filter_reports(self.user_id)
+
+        self.assertEqual(self._ids(page), [3, 4, 2, 1])
+        self.assertIsNone(page['next_cursor'])
+        self.assertIsNone(page['prev_cursor'])
+
+    def test_repeated_call_is_served_from_cache(self):
+        first = filter_reports(self.user_id, name_query='Salad')
+
+        with patch('website.filters._filter_reports') as mock_filter:
+            second = filter_reports(self.user_id, name_query='Salad')
+
+        mock_filter.assert_not_called()
+        self.assertIs(second, first)
+
+    def test_write_invalidates_cached_results(self):
+        self.assertEqual(self._ids(filter_reports(self.user_id)), [3, 4, 2, 1])
+
+        self._add_expense(6, 20, 'Taxi', datetime.date(2025, 6, 1))
+
+        self.assertEqual(self._ids(filter_reports(self.user_id)), [3, 6, 4, 2, 1])
+
+    def test_no_results(self):
+        page = filter_reports(99)
+
+        self.assertEqual(page, {'reports': [], 'next_cursor': None, 'prev_cursor': None})
+
+    def test_report_type(self):
+        self.assertEqual(self._ids(filter_reports(self.user_id, report_type='Income')), [1])
+        self.assertEqual(self._ids(filter_reports(self.user_id, report_type='Expenses')), [4, 2])
+        self.assertEqual(
+            self._ids(filter_reports(self.user_id, report_type='Planning Expenses')), [3]
         )
-        result = filter_reports(self.user_id, report_type="Income")
-
-        mock_income_query.filter.assert_not_called()
-        mock_expenses_query.filter.assert_called_once_with(mock_expenses.id.__eq__(None))
-        mock_planning_query.filter.assert_called_once_with(mock_planning.id.__eq__(None))
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_report_type_expenses(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+
+    def test_report_type_unknown_is_ignored(self):
+        self.assertEqual(self._ids(filter_reports(self.user_id, report_type='All')), [3, 4, 2, 1])
+
+    def test_name_query_uses_search_index(self):
+        page = filter_reports(self.user_id, name_query='ala')
+
+        self.assertEqual(self._ids(page), [4, 1])
+
+    def test_short_name_query_falls_back_to_like(self):
+        with patch('website.filters.has_name_index') as mock_has_name_index:
+            page = filter_reports(self.user_id, name_query='Re')
+
+        mock_has_name_index.assert_not_called()
+        self.assertEqual(self._ids(page), [2])
+
+    def test_name_query_without_search_index(self):
+        with patch('website.filters.has_name_index', return_value=False):
+            page = filter_reports(self.user_id, name_query='Sal')
+
+        self.assertEqual(self._ids(page), [4, 1])
+
+    def test_date_query(self):
+        page = filter_reports(self.user_id, date=datetime.date(2025, 5, 1))
+
+        self.assertEqual(self._ids(page), [2, 1])
+
+    def test_amount_query(self):
+        self.assertEqual(self._ids(filter_reports(self.user_id, amount_query='123.45')), [4])
+
+    def test_amount_range(self):
+        self.assertEqual(self._ids(filter_reports(self.user_id, amount_min='1200')), [3, 2, 1])
+        self.assertEqual(self._ids(filter_reports(self.user_id, amount_max='1500')), [3, 4, 2])
+        self.assertEqual(
+            self._ids(filter_reports(self.user_id, amount_min='100', amount_max='1200')), [4, 2]
         )
-        result = filter_reports(self.user_id, report_type="Expenses")
-
-        mock_income_query.filter.assert_called_once_with(mock_income.id.__eq__(None))
-        mock_expenses_query.filter.assert_not_called()
-        mock_planning_query.filter.assert_called_once_with(mock_planning.id.__eq__(None))
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_report_type_planning(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+
+    def test_date_range(self):
+        page = filter_reports(
+            self.user_id,
+            start_date=datetime.date(2025, 5, 2),
+            end_date=datetime.date(2025, 8, 1),
         )
-        result = filter_reports(self.user_id, report_type="Planning Expenses")
-
-        mock_income_query.filter.assert_called_once_with(mock_income.id.__eq__(None))
-        mock_expenses_query.filter.assert_called_once_with(mock_expenses.id.__eq__(None))
-        mock_planning_query.filter.assert_not_called()
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_name_query(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+        self.assertEqual(self._ids(page), [3, 4])
+        self.assertEqual(
+            self._ids(filter_reports(self.user_id, end_date=datetime.date(2025, 5, 1))), [2, 1]
         )
-        name_q = "Sal"
-        result = filter_reports(self.user_id, name_query=name_q)
-
-        mock_income.name.like.assert_called_once_with(f"%{name_q}%")
-        mock_expenses.name.like.assert_called_once_with(f"%{name_q}%")
-        mock_planning.name.like.assert_called_once_with(f"%{name_q}%")
-
-        mock_income_query.filter.assert_called_once_with(mock_income.name.like.return_value)
-        mock_expenses_query.filter.assert_called_once_with(mock_expenses.name.like.return_value)
-        mock_planning_query.filter.assert_called_once_with(mock_planning.name.like.return_value)
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_date_query(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+
+    def test_expenses_over_amount_in_quarter(self):
+        page = filter_reports(
+            self.user_id,
+            report_type='Expenses',
+            amount_min='100',
+            start_date=datetime.date(2025, 4, 1),
+            end_date=datetime.date(2025, 6, 30),
         )
-        date_q = datetime.date(2025, 5, 10)
-        result = filter_reports(self.user_id, date=date_q)
-
-        mock_income.date.__eq__.assert_called_once_with(date_q)
-        mock_expenses.date.__eq__.assert_called_once_with(date_q)
-        mock_planning.date.__eq__.assert_called_once_with(date_q)
-
-        mock_income_query.filter.assert_called_once_with(mock_income.date.__eq__.return_value)
-        mock_expenses_query.filter.assert_called_once_with(mock_expenses.date.__eq__.return_value)
-        mock_planning_query.filter.assert_called_once_with(mock_planning.date.__eq__.return_value)
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_amount_query(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+
+        self.assertEqual(self._ids(page), [4, 2])
+
+    def test_multiple_filters_and_type(self):
+        page = filter_reports(
+            self.user_id,
+            name_query='Rent',
+            date=datetime.date(2025, 5, 1),
+            report_type='Expenses',
         )
-        amount_q_str = "123.45"
-        amount_q_float = 123.45
-        result = filter_reports(self.user_id, amount_query=amount_q_str)
-
-        mock_income.amount.__eq__.assert_called_once_with(amount_q_float)
-        mock_expenses.amount.__eq__.assert_called_once_with(amount_q_float)
-        mock_planning.amount.__eq__.assert_called_once_with(amount_q_float)
-
-        mock_income_query.filter.assert_called_once_with(mock_income.amount.__eq__.return_value)
-        mock_expenses_query.filter.assert_called_once_with(mock_expenses.amount.__eq__.return_value)
-        mock_planning_query.filter.assert_called_once_with(mock_planning.amount.__eq__.return_value)
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
-
-    @patch(PATCH_TARGET_PLANNING)
-    @patch(PATCH_TARGET_EXPENSES)
-    @patch(PATCH_TARGET_INCOME)
-    def test_multiple_filters_and_type(self, mock_income, mock_expenses, mock_planning):
-        mock_income_query, mock_expenses_query, mock_planning_query = self._setup_mock_queries(
-            mock_income, mock_expenses, mock_planning
+
+        self.assertEqual(self._ids(page), [2])
+
+    def test_pages_forward_and_back(self):
+        first = filter_reports(self.user_id, page_size=3)
+        self.assertEqual(self._ids(first), [3, 4, 2])
+        self.assertEqual(first['next_cursor'], '2025-05-01_2')
+        self.assertIsNone(first['prev_cursor'])
+
+        second = filter_reports(self.user_id, after=first['next_cursor'], page_size=3)
+        self.assertEqual(self._ids(second), [1])
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(second['prev_cursor'], '2025-05-01_1')
+
+        back = filter_reports(self.user_id, before=second['prev_cursor'], page_size=3)
+        self.assertEqual(self._ids(back), [3, 4, 2])
+        self.assertIsNone(back['prev_cursor'])
+        self.assertEqual(back['next_cursor'], '2025-05-01_2')
+
+    def test_page_back_with_more_before(self):
+        page = filter_reports(self.user_id, before='2025-05-01_1', page_size=2)
+
+        self.assertEqual(self._ids(page), [4, 2])
+        self.assertEqual(page['prev_cursor'], '2025-05-10_4')
+        self.assertEqual(page['next_cursor'], '2025-05-01_2')
+
+    def test_sort_by_amount(self):
+        page = filter_reports(self.user_id, sort='amount', descending=False)
+        self.assertEqual(self._ids(page), [4, 2, 3, 1])
+        page = filter_reports(self.user_id, sort='amount')
+        self.assertEqual(self._ids(page), [1, 3, 2, 4])
+
+    def test_sort_by_name_pages_with_cursor(self):
+        db.session.add(Expenses(id=8, user_id=1, amount=5, name='Rent_extra', date=datetime.date(2025, 5, 2)))
+        db.session.commit()
+
+        first = filter_reports(self.user_id, sort='name', descending=False, page_size=2)
+        self.assertEqual(self._ids(first), [2, 8])
+        self.assertEqual(first['next_cursor'], 'Rent_extra_8')
+
+        second = filter_reports(
+            self.user_id, sort='name', descending=False, after=first['next_cursor'], page_size=2
         )
-        name_q = "Rent"
-        date_q = datetime.date(2025, 5, 1)
+        self.assertEqual(self._ids(second), [4, 1])
 
-        result = filter_reports(
-            self.user_id,
-            name_query=name_q,
-            date=date_q,
-            report_type="Expenses"
+        back = filter_reports(
+            self.user_id, sort='name', descending=False, before=second['prev_cursor'], page_size=2
         )
+        self.assertEqual(self._ids(back), [2, 8])
+
+    def test_sort_by_amount_pages_with_cursor(self):
+        first = filter_reports(self.user_id, sort='amount', page_size=3)
+        self.assertEqual(first['next_cursor'], '1200.00_2')
+
+        second = filter_reports(self.user_id, sort='amount', after=first['next_cursor'], page_size=3)
+        self.assertEqual(self._ids(second), [4])
+
+    def test_unknown_sort_falls_back_to_date(self):
+        self.assertEqual(self._ids(filter_reports(self.user_id, sort='type')), [3, 4, 2, 1])
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        page = filter_reports(self.user_id, after='nonsense', page_size=2)
+
+        self.assertEqual(self._ids(page), [3, 4])
+
+    def test_old_date_includes_archive(self):
+        db.session.add(LedgerArchive(
+            id=6, kind=EXPENSES, user_id=1, amount=40, name='Old rent',
+            date=datetime.date(2019, 1, 4),
+        ))
+        db.session.commit()
+
+        self.assertEqual(self._ids(filter_reports(self.user_id)), [3, 4, 2, 1])
+        page = filter_reports(self.user_id, date=datetime.date(2019, 1, 4))
+        self.assertEqual(self._ids(page), [6])
+        page = filter_reports(self.user_id, end_date=datetime.date(2025, 5, 1))
+        self.assertEqual(self._ids(page), [2, 1, 6])
+        page = filter_reports(self.user_id, start_date=datetime.date(2025, 1, 1))
+        self.assertEqual(self._ids(page), [3, 4, 2, 1])
+        page = filter_reports(
+            self.user_id, end_date=datetime.date(2025, 5, 1), sort='amount', descending=False
+        )
+        self.assertEqual(self._ids(page), [6, 2, 1])
+
+    def test_cursor_round_trip(self):
+        report = Income(id=7, date=datetime.date(2024, 2, 29))
 
-        # Assertions for Income query
-        self.assertEqual(mock_income_query.filter.call_count, 3)
-        mock_income.id.__eq__.assert_called_once_with(None)
-        mock_income.name.like.assert_called_once_with(f"%{name_q}%")
-        mock_income.date.__eq__.assert_called_once_with(date_q)
-        mock_income_query.filter.assert_any_call(mock_income.id.__eq__.return_value)
-        mock_income_query.filter.assert_any_call(mock_income.name.like.return_value)
-        mock_income_query.filter.assert_any_call(mock_income.date.__eq__.return_value)
-
-        # Assertions for Planning query
-        self.assertEqual(mock_planning_query.filter.call_count, 3)
-        mock_planning.id.__eq__.assert_called_once_with(None)
-        mock_planning.name.like.assert_called_once_with(f"%{name_q}%")
-        mock_planning.date.__eq__.assert_called_once_with(date_q)
-        mock_planning_query.filter.assert_any_call(mock_planning.id.__eq__.return_value)
-        mock_planning_query.filter.assert_any_call(mock_planning.name.like.return_value)
-        mock_planning_query.filter.assert_any_call(mock_planning.date.__eq__.return_value)
-
-        # Assertions for Expenses query
-        self.assertEqual(mock_expenses_query.filter.call_count, 2)
-        mock_expenses.name.like.assert_called_once_with(f"%{name_q}%")
-        mock_expenses.date.__eq__.assert_called_once_with(date_q)
-        mock_expenses_query.filter.assert_any_call(mock_expenses.name.like.return_value)
-        mock_expenses_query.filter.assert_any_call(mock_expenses.date.__eq__.return_value)
-        mock_expenses.id.__eq__.assert_not_called()  # Important: ID filter NOT applied
-
-        mock_income_query.all.assert_called_once()
-        mock_expenses_query.all.assert_called_once()
-        mock_planning_query.all.assert_called_once()
+        self.assertEqual(decode_cursor(encode_cursor(report)), (datetime.date(2024, 2, 29), 7))
+        self.assertIsNone(decode_cursor(None))
+        self.assertIsNone(decode_cursor('2024-13-01_1'))
+        self.assertEqual(decode_cursor('12.5_3', 'amount'), (Decimal('12.50'), 3))
+        self.assertEqual(decode_cursor('a_b_9', 'name'), ('a_b', 9))
 
 
 if __name__ == '__main__':
-    unittest.main(argv=['first-arg-is-ignored'], exit=False)
\ No newline at end of file
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+
+from website import db, identity
+from website.identity import UserIdentity, forget_identity, load_identity
+from website.models import User, Income
+from website.testing import DatabaseTestCase
+
+
+class TestLoadIdentity(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(User(id=1, username='alice', password='hash'))
+        db.session.commit()
+
+    def test_returns_lightweight_identity(self):
+        user = load_identity(1)
+
+        self.assertIsInstance(user, UserIdentity)
+        self.assertEqual((user.id, user.username), (1, 'alice'))
+        self.assertTrue(user.is_authenticated)
+        self.assertEqual(user.get_id(), '1')
+
+    def test_second_load_skips_database(self):
+        load_identity(1)
+
+        with patch.object(identity.db, 'session') as mock_session:
+            user = load_identity(1)
+
+        mock_session.query.assert_not_called()
+        self.assertEqual(user.username, 'alice')
+
+    def test_expired_entry_is_reloaded(self):
+        with patch('website.identity.monotonic', return_value=1000.0):
+            load_identity(1)
+        db.session.execute(db.update(User).values(username='bob'))
+        db.session.commit()
+
+        with patch('website.identity.monotonic', return_value=1000.0 + identity.IDENTITY_TTL + 1):
+            self.assertEqual(load_identity(1).username, 'bob')
+
+    def test_account_change_invalidates_entry(self):
+        load_identity(1)
+
+        db.session.get(User, 1).username = 'alice2'
+        db.session.commit()
+
+        self.assertEqual(load_identity(1).username, 'alice2')
+
+    def test_missing_user_is_none(self):
+        self.assertIsNone(load_identity(99))
+
+    def test_deleted_user_is_forgotten(self):
+        load_identity(1)
+
+        db.session.delete(db.session.get(User, 1))
+        db.session.commit()
+
+        self.assertIsNone(load_identity(1))
+
+    def test_relationships_load_full_user_on_demand(self):
+        db.session.add(Income(user_id=1, amount=5, name='Refund'))
+        db.session.commit()
+        user = load_identity(1)
+
+        self.assertNotIn('_record', user.__dict__)
+        self.assertEqual([income.name for income in user.income], ['Refund'])
+        self.assertIn('_record', user.__dict__)
+
+    def test_zero_ttl_disables_cache(self):
+        self.app.config['USER_CACHE_TTL'] = 0
+        load_identity(1)
+
+        self.assertNotIn(1, identity._identities)
+
+    def test_forget_identity(self):
+        load_identity(1)
+
+        forget_identity(1)
+
+        self.assertNotIn(1, identity._identities)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -1,8 +1,15 @@
 import unittest
 import datetime
+from decimal import Decimal
 from unittest.mock import Mock
 
-from website.models import User, Income, Expenses, Planning, Savings, ChatAI
+from website import db
+from website.models import (
+    User, Ledger, Income, Expenses, Planning, Savings, ChatAI, Money,
+    CompressedText,
+    INCOME, EXPENSES, PLANNING,
+)
+from website.testing import DatabaseTestCase
 
 
 class TestModels(unittest.TestCase):
@@ -88,6 +95,14 @@ class TestModels(unittest.TestCase):
         self.assertEqual(chat.message, message)
         self.assertEqual(chat.response, response)
 
+    def test_ledger_kinds_share_one_table(self):
+        self.assertIs(Income.__table__, Ledger.__table__)
+        self.assertIs(Expenses.__table__, Ledger.__table__)
+        self.assertIs(Planning.__table__, Ledger.__table__)
+        self.assertEqual(Income(amount=1).kind, INCOME)
+        self.assertEqual(Expenses(amount=1).kind, EXPENSES)
+        self.assertEqual(Planning(amount=1).kind, PLANNING)
+
     def test_user_creation(self):
         username = "testuser1"
         password_hash = "hashed_password_string"
@@ -110,5 +125,100 @@ class TestModels(unittest.TestCase):
         self.assertTrue(hasattr(user, 'get_id'))
 
 
+class TestMoneyType(unittest.TestCase):
+
+    def setUp(self):
+        self.money = Money()
+        self.dialect = Mock()
+
+    def test_bind_converts_to_integer_cents(self):
+        self.assertEqual(self.money.process_bind_param(Decimal("150.75"), self.dialect), 15075)
+        self.assertEqual(self.money.process_bind_param(10.05, self.dialect), 1005)
+        self.assertEqual(self.money.process_bind_param("20", self.dialect), 2000)
+
+    def test_result_converts_to_decimal(self):
+        self.assertEqual(self.money.process_result_value(15075, self.dialect), Decimal("150.75"))
+
+    def test_none_passes_through(self):
+        self.assertIsNone(self.money.process_bind_param(None, self.dialect))
+        self.assertIsNone(self.money.process_result_value(None, self.dialect))
+
+    def test_amount_columns_use_money(self):
+        for model in (Ledger, Savings):
+            self.assertIsInstance(model.__table__.c.amount.type, Money)
+
+
+class TestCompressedTextType(unittest.TestCase):
+
+    def setUp(self):
+        self.compressed = CompressedText()
+        self.dialect = Mock()
+
+    def test_round_trip(self):
+        text = "Save 20% of your income. " * 100
+        stored = self.compressed.process_bind_param(text, self.dialect)
+
+        self.assertIsInstance(stored, bytes)
+        self.assertLess(len(stored), len(text))
+        self.assertEqual(self.compressed.process_result_value(stored, self.dialect), text)
+
+    def test_reads_legacy_plain_text(self):
+        self.assertEqual(
+            self.compressed.process_result_value("hello", self.dialect), "hello"
+        )
+
+    def test_none_passes_through(self):
+        self.assertIsNone(self.compressed.process_bind_param(None, self.dialect))
+        self.assertIsNone(self.compressed.process_result_value(None, self.dialect))
+
+    def test_chat_payloads_are_compressed(self):
+        for column in ("message", "response"):
+            self.assertIsInstance(ChatAI.__table__.c[column].type, CompressedText)
+        index = next(iter(ChatAI.__table__.indexes))
+        self.assertEqual(
+            [c.name for c in index.columns],
+            ["user_id", "conversation_id", "created_at"],
+        )
+
+
+class TestUserRelationships(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db = db
+
+        db.session.add(User(id=1, username='alice', password='hash'))
+        db.session.add_all([
+            Expenses(user_id=1, amount=index, name=f'Expense {index}',
+                     date=datetime.date(2025, 1, 1 + index))
+            for index in range(1, 6)
+        ])
+        db.session.add(Income(user_id=1, amount=100, name='Salary'))
+        db.session.commit()
+
+    def test_collections_are_queries_not_loaded_lists(self):
+        user = self.db.session.get(User, 1)
+
+        for name in ('income', 'expenses', 'planning', 'savings', 'chat_ai'):
+            self.assertNotIsInstance(getattr(user, name), list)
+        self.assertNotIn('expenses', user.__dict__)
+
+    def test_collections_filter_and_limit_in_sql(self):
+        user = self.db.session.get(User, 1)
+
+        latest = user.expenses.order_by(Expenses.date.desc()).limit(2).all()
+
+        self.assertEqual([expense.name for expense in latest], ['Expense 5', 'Expense 4'])
+        self.assertEqual(user.expenses.filter(Expenses.amount > 3).count(), 2)
+        self.assertEqual(user.income.count(), 1)
+
+    def test_collections_stream(self):
+        user = self.db.session.get(User, 1)
+
+        names = [expense.name for expense in user.expenses.yield_per(2)]
+
+        self.assertEqual(len(names), 5)
+
+
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
\ No newline at end of file
@@ -0,0 +1,49 @@
+import unittest
+from decimal import Decimal
+
+from website.money import to_money, to_cents, from_cents
+
+
+class TestMoney(unittest.TestCase):
+
+    def test_to_money_from_string(self):
+        self.assertEqual(to_money("150.75"), Decimal("150.75"))
+        self.assertEqual(to_money("100"), Decimal("100.00"))
+
+    def test_to_money_from_float_has_no_binary_noise(self):
+        self.assertEqual(to_money(10.05), Decimal("10.05"))
+        self.assertEqual(to_money(0.1 + 0.2), Decimal("0.30"))
+
+    def test_to_money_rounds_half_up_to_cents(self):
+        self.assertEqual(to_money("1.005"), Decimal("1.01"))
+        self.assertEqual(to_money("1.004"), Decimal("1.00"))
+
+    def test_to_money_invalid_values(self):
+        for value in ["abc", "", "100,50", None, "nan", "inf", "-inf"]:
+            with self.assertRaises(ValueError):
+                to_money(value)
+
+    def test_to_money_rejects_amounts_beyond_bigint_cents(self):
+        for value in ["1e30", "1e18", "-1e18", 1e30]:
+            with self.assertRaises(ValueError):
+                to_money(value)
+        self.assertEqual(to_cents("92233720368547758.07"), 2 ** 63 - 1)
+
+    def test_to_cents(self):
+        self.assertEqual(to_cents("100.50"), 10050)
+        self.assertEqual(to_cents(-30.5), -3050)
+        self.assertEqual(to_cents(0), 0)
+        self.assertIsInstance(to_cents("1.99"), int)
+
+    def test_from_cents(self):
+        self.assertEqual(from_cents(10050), Decimal("100.50"))
+        self.assertEqual(from_cents(-5), Decimal("-0.05"))
+        self.assertEqual(str(from_cents(100)), "1.00")
+
+    def test_round_trip_is_exact(self):
+        total = sum(from_cents(to_cents("0.10")) for _ in range(3))
+        self.assertEqual(total, Decimal("0.30"))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,31 @@
+import unittest
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from website.models import Ledger
+from website.projections import ReportRow, report_columns, to_report_rows
+
+
+class TestProjections(unittest.TestCase):
+
+    def test_report_columns_select_listing_fields_only(self):
+        names = [column.key for column in report_columns(Ledger)]
+
+        self.assertEqual(names, ['id', 'amount', 'name', 'date', 'type_id', 'kind'])
+
+    @patch('website.projections.get_type_label')
+    def test_rows_resolve_type_labels(self, mock_type_label):
+        mock_type_label.return_value = 'Expenses'
+        day = datetime.date(2025, 1, 2)
+
+        rows = to_report_rows([(7, Decimal('3.50'), 'Bus', day, 2, 2)])
+
+        mock_type_label.assert_called_once_with(2)
+        self.assertEqual(rows, [ReportRow(7, Decimal('3.50'), 'Bus', day, 'Expenses', 2)])
+        self.assertEqual(rows[0].type, 'Expenses')
+        self.assertFalse(hasattr(rows[0], '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from sqlalchemy import create_engine, text
+
+from website.search import (
+    create_name_index,
+    ensure_name_index,
+    has_name_index,
+    match_phrase,
+    reset_name_index_cache,
+)
+
+PATCH_TARGET_DB = 'website.search.db'
+
+
+class TestCreateNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        with self.engine.begin() as conn:
+            conn.execute(text('CREATE TABLE ledger (id INTEGER PRIMARY KEY, name VARCHAR(255))'))
+            conn.execute(text("INSERT INTO ledger (name) VALUES ('Salary'), ('Coffee beans')"))
+        self.addCleanup(reset_name_index_cache)
+
+    def _match(self, conn, query):
+        return conn.execute(
+            text('SELECT rowid FROM ledger_fts WHERE ledger_fts MATCH :q ORDER BY rowid'),
+            {'q': match_phrase(query)},
+        ).scalars().all()
+
+    def test_indexes_existing_rows(self):
+        with self.engine.begin() as conn:
+            self.assertTrue(create_name_index(conn))
+            self.assertEqual(self._match(conn, 'alar'), [1])
+            self.assertEqual(self._match(conn, 'BEAN'), [2])
+
+    def test_triggers_keep_index_in_sync(self):
+        with self.engine.begin() as conn:
+            create_name_index(conn)
+            conn.execute(text("INSERT INTO ledger (name) VALUES ('Bean bag')"))
+            conn.execute(text("UPDATE ledger SET name = 'Wages' WHERE id = 1"))
+            conn.execute(text('DELETE FROM ledger WHERE id = 2'))
+
+            self.assertEqual(self._match(conn, 'bean'), [3])
+            self.assertEqual(self._match(conn, 'salary'), [])
+            self.assertEqual(self._match(conn, 'wage'), [1])
+
+    def test_skips_other_dialects(self):
+        conn = MagicMock()
+        conn.dialect.name = 'postgresql'
+
+        self.assertFalse(create_name_index(conn))
+        conn.execute.assert_not_called()
+
+
+class TestNameIndexLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(reset_name_index_cache)
+
+    @patch(PATCH_TARGET_DB)
+    def test_has_name_index_is_cached_per_engine(self, mock_db):
+        mock_db.engine = create_engine('sqlite://')
+        mock_db.session.get_bind.return_value = mock_db.engine
+
+        self.assertFalse(has_name_index())
+        with mock_db.engine.begin() as conn:
+            conn.execute(text('CREATE TABLE ledger_fts (name VARCHAR(255))'))
+        self.assertFalse(has_name_index())
+        reset_name_index_cache()
+        self.assertTrue(has_name_index())
+
+    @patch(PATCH_TARGET_DB)
+    def test_ensure_builds_index_once(self, mock_db):
+        mock_db.engine = create_engine('sqlite://')
+        with mock_db.engine.begin() as conn:
+            conn.execute(text('CREATE TABLE ledger (id INTEGER PRIMARY KEY, name VARCHAR(255))'))
+
+        mock_db.session.get_bind.return_value = mock_db.engine
+
+        self.assertTrue(ensure_name_index())
+        self.assertFalse(ensure_name_index())
+        self.assertTrue(has_name_index())
+
+    def test_match_phrase_quotes_input(self):
+        self.assertEqual(match_phrase('say "hi"'), '"say ""hi"""')
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
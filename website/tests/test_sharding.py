@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import datetime
+from unittest.mock import patch
+
+from flask import Flask
+from flask_login import LoginManager, login_user
+from sqlalchemy.exc import UnboundExecutionError
+
+from website import db
+from website.finances.ledger_sync import record_ledger_change
+from website.finances.user_balance import get_user_balance, rebuild_user_balances
+from website.identity import UserIdentity
+from website.models import Income, Expenses, User, INCOME, EXPENSES
+from website.sharding import (
+    create_sharded_tables,
+    current_shard,
+    for_each_shard,
+    shard_binds_from_env,
+    shard_for_user,
+    use_user_shard,
+)
+from website.testing import DatabaseTestCase, forget_binds
+from website.transaction_types import load_transaction_types
+
+
+class TestShardConfig(unittest.TestCase):
+
+    def test_default_shard_files(self):
+        with patch.dict(os.environ, {}, clear=True):
+            binds = shard_binds_from_env(2)
+
+        self.assertEqual(binds, {
+            'shard_00': 'sqlite:///shard_00.db',
+            'shard_01': 'sqlite:///shard_01.db',
+        })
+
+    def test_shard_url_can_point_elsewhere(self):
+        with patch.dict(os.environ, {'SHARD_01_URL': 'sqlite:////mnt/host2/shard_01.db'}):
+            binds = shard_binds_from_env(2)
+
+        self.assertEqual(binds['shard_01'], 'sqlite:////mnt/host2/shard_01.db')
+
+    def test_user_shard_is_stable(self):
+        app = Flask(__name__)
+        app.config['SHARD_COUNT'] = 2
+        with app.app_context():
+            self.assertEqual(shard_for_user(1), 'shard_01')
+            self.assertEqual(shard_for_user(4), 'shard_00')
+            self.assertEqual(shard_for_user(4), shard_for_user(4))
+
+    def test_disabled_without_shard_count(self):
+        with Flask(__name__).app_context():
+            self.assertIsNone(shard_for_user(1))
+
+
+class TestShardedStorage(DatabaseTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = {
+            name: os.path.join(directory.name, f'{name}.db')
+            for name in ('catalog', 'shard_00', 'shard_01')
+        }
+        self.config = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{self.paths['catalog']}",
+            'SHARD_COUNT': 2,
+            'SQLALCHEMY_BINDS': {
+                key: f'sqlite:///{self.paths[key]}' for key in ('shard_00', 'shard_01')
+            },
+        }
+        super().setUp()
+        self.addCleanup(forget_binds)
+        self.addCleanup(load_transaction_types)
+
+        db.session.add_all([User(id=1, username='ann'), User(id=4, username='bob')])
+        db.session.commit()
+
+    def create_tables(self):
+        create_sharded_tables()
+
+    def _add(self, user_id, model, kind, amount, label):
+        with use_user_shard(user_id):
+            day = datetime.date(2025, 5, 1)
+            db.session.add(
+                model(user_id=user_id, amount=amount, name='Row', date=day, type=label)
+            )
+            record_ledger_change(user_id, kind, day, amount)
+            db.session.commit()
+
+    def _rows(self, name, sql):
+        connection = sqlite3.connect(self.paths[name])
+        try:
+            return connection.execute(sql).fetchall()
+        finally:
+            connection.close()
+
+    def test_ledger_rows_land_in_the_user_shard(self):
+        self._add(1, Income, INCOME, 3000, 'Bonus')
+        self._add(4, Expenses, EXPENSES, 1200, 'Rent')
+
+        self.assertEqual(self._rows('shard_01', 'SELECT user_id FROM ledger'), [(1,)])
+        self.assertEqual(self._rows('shard_00', 'SELECT user_id FROM ledger'), [(4,)])
+        self.assertEqual(
+            self._rows('catalog', "SELECT name FROM sqlite_master WHERE name = 'ledger'"),
+            [],
+        )
+        self.assertEqual(
+            self._rows('catalog', 'SELECT label FROM transaction_type ORDER BY label'),
+            [('Bonus',), ('Rent',)],
+        )
+
+    def test_reads_follow_the_user_shard(self):
+        self._add(1, Income, INCOME, 3000, 'Salary')
+
+        with use_user_shard(1):
+            self.assertEqual(str(get_user_balance(1).income), '3000.00')
+            self.assertEqual(Income.query.one().type, 'Salary')
+        db.session.remove()
+        with use_user_shard(4):
+            self.assertEqual(Income.query.count(), 0)
+
+    def test_sharded_table_without_a_user_is_refused(self):
+        with self.assertRaises(UnboundExecutionError):
+            Income.query.count()
+
+        self.assertEqual(User.query.count(), 2)
+
+    def test_request_routes_by_logged_in_user(self):
+        self.app.config['SECRET_KEY'] = 'test'
+        login_manager = LoginManager()
+        login_manager.init_app(self.app)
+        login_manager.user_loader(lambda id: UserIdentity(int(id), 'ann'))
+
+        with self.app.test_request_context():
+            login_user(UserIdentity(1, 'ann'))
+            self.assertEqual(current_shard(), 'shard_01')
+
+    def test_maintenance_runs_on_every_shard(self):
+        self._add(1, Income, INCOME, 3000, 'Salary')
+        self._add(4, Expenses, EXPENSES, 1200, 'Rent')
+
+        self.assertEqual(for_each_shard(rebuild_user_balances), 2)
+        self.assertEqual(
+            self._rows('shard_00', 'SELECT user_id, expenses FROM user_balance'),
+            [(4, 120000)],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import text
+
+from website import db
+from website.sqlite_profile import (
+    SQLITE_PRAGMAS,
+    configure_sqlite,
+    sqlite_pragmas_from_env,
+)
+
+
+class TestSqliteProfile(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = (
+            f"sqlite:///{os.path.join(directory.name, 'test.db')}"
+        )
+
+    def _pragma(self, name):
+        with self.app.app_context():
+            value = db.session.execute(text(f"PRAGMA {name}")).scalar()
+            db.session.remove()
+            db.engine.dispose()
+        return value
+
+    def test_every_connection_gets_the_profile(self):
+        self.app.config['SQLITE_PRAGMAS'] = SQLITE_PRAGMAS
+        db.init_app(self.app)
+        configure_sqlite(self.app)
+
+        self.assertEqual(self._pragma('journal_mode'), 'wal')
+        self.assertEqual(self._pragma('synchronous'), 1)
+        self.assertEqual(self._pragma('cache_size'), -65536)
+        self.assertEqual(self._pragma('temp_store'), 2)
+        self.assertEqual(self._pragma('busy_timeout'), 5000)
+        self.assertEqual(self._pragma('mmap_size'), 268435456)
+
+    def test_empty_profile_leaves_defaults(self):
+        self.app.config['SQLITE_PRAGMAS'] = {}
+        db.init_app(self.app)
+        configure_sqlite(self.app)
+
+        self.assertEqual(self._pragma('journal_mode'), 'delete')
+
+    def test_environment_overrides_defaults(self):
+        with patch.dict(os.environ, {'SQLITE_SYNCHRONOUS': 'FULL'}):
+            pragmas = sqlite_pragmas_from_env()
+
+        self.assertEqual(pragmas['synchronous'], 'FULL')
+        self.assertEqual(pragmas['journal_mode'], 'WAL')
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import patch, Mock, MagicMock
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+
+from website import db, transaction_types
+from website.transaction_types import (
+    _resolve_type_id,
+    cached_type_id,
+    clear_transaction_types,
+    get_type_id,
+    get_type_label,
+    load_transaction_types,
+)
+from website.models import Income, TransactionType, User
+from website.testing import DatabaseTestCase
+
+PATCH_TARGET_DB = 'website.transaction_types.db'
+
+
+class TestTransactionTypeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(clear_transaction_types)
+
+    @patch(PATCH_TARGET_DB)
+    def test_load_fills_both_directions(self, mock_db):
+        mock_db.session.execute.return_value = [(1, 'Income'), (2, 'Expenses')]
+
+        load_transaction_types()
+
+        self.assertEqual(cached_type_id('Expenses'), 2)
+        self.assertEqual(get_type_label(1), 'Income')
+        mock_db.session.execute.assert_called_once()
+
+    @patch(PATCH_TARGET_DB)
+    def test_label_lookup_hits_cache(self, mock_db):
+        transaction_types._labels[3] = 'Planning'
+
+        self.assertEqual(get_type_label(3), 'Planning')
+        mock_db.session.execute.assert_not_called()
+
+    @patch(PATCH_TARGET_DB)
+    def test_unknown_label_is_inserted(self, mock_db):
+        mock_db.session.execute.side_effect = [
+            [(1, 'Income')],
+            Mock(inserted_primary_key=(7,)),
+        ]
+
+        self.assertEqual(get_type_id('Groceries'), 7)
+        insert_sql = str(mock_db.session.execute.call_args_list[1].args[0])
+        self.assertIn('INSERT INTO transaction_type', insert_sql)
+
+    @patch(PATCH_TARGET_DB)
+    def test_reload_swaps_in_new_dicts(self, mock_db):
+        mock_db.session.execute.return_value = [(1, 'Income')]
+        load_transaction_types()
+        labels = transaction_types._labels
+
+        mock_db.session.execute.return_value = [(1, 'Income'), (2, 'Expenses')]
+        load_transaction_types()
+
+        self.assertEqual(labels, {1: 'Income'})
+        self.assertEqual(get_type_label(2), 'Expenses')
+
+    @patch(PATCH_TARGET_DB)
+    def test_label_inserted_elsewhere_is_reread(self, mock_db):
+        mock_db.session.execute.side_effect = [
+            [(1, 'Income')],
+            IntegrityError('INSERT', {}, Exception('UNIQUE constraint failed')),
+            [(1, 'Income'), (7, 'Groceries')],
+        ]
+
+        self.assertEqual(get_type_id('Groceries'), 7)
+        self.assertEqual(cached_type_id('Groceries'), 7)
+
+    def test_none_label(self):
+        self.assertIsNone(get_type_id(None))
+
+    @patch(PATCH_TARGET_DB)
+    def test_none_type_id_skips_reload(self, mock_db):
+        self.assertIsNone(get_type_label(None))
+        mock_db.session.execute.assert_not_called()
+
+
+class TestTypeProperty(unittest.TestCase):
+
+    def setUp(self):
+        self.addCleanup(clear_transaction_types)
+
+    def test_known_label_sets_type_id(self):
+        transaction_types._ids['Income'] = 1
+        transaction_types._labels[1] = 'Income'
+
+        income = Income(type='Income')
+
+        self.assertEqual(income.type_id, 1)
+        self.assertEqual(income.type, 'Income')
+
+    def test_unknown_label_resolved_before_insert(self):
+        income = Income(type='Bonus')
+        self.assertIsNone(income.type_id)
+        self.assertEqual(income.type, 'Bonus')
+        connection = MagicMock()
+
+        with patch('website.transaction_types.get_type_id', return_value=9) as mock_get:
+            _resolve_type_id(None, connection, income)
+
+        mock_get.assert_called_once_with('Bonus', connection)
+        self.assertEqual(income.type_id, 9)
+
+
+class TestConcurrentLabelInsert(DatabaseTestCase):
+
+    def test_duplicate_label_reuses_existing_row(self):
+        db.session.add(User(id=1, username='ann'))
+        db.session.execute(insert(TransactionType).values(label='Rent'))
+        db.session.commit()
+        real_load = transaction_types.load_transaction_types
+        calls = []
+
+        def stale_then_real(connection=None):
+            # The first load misses a label another worker has just added.
+            calls.append(connection)
+            if len(calls) > 1:
+                real_load(connection)
+
+        with patch('website.transaction_types.load_transaction_types', side_effect=stale_then_real):
+            db.session.add(Income(user_id=1, amount=5, name='Flat', type='Rent'))
+            db.session.commit()
+
+        self.assertEqual(len(calls), 2)
+        rent_id = db.session.query(TransactionType.id).filter_by(label='Rent').scalar()
+        self.assertEqual(db.session.query(func.count(TransactionType.id)).scalar(), 1)
+        self.assertEqual(Income.query.one().type_id, rent_id)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,77 @@
+from threading import Lock
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_session
+
+from .models import Ledger, TransactionType
+from . import db
+
+_labels = {}
+_ids = {}
+_lock = Lock()
+
+
+def load_transaction_types(connection=None):
+    global _labels, _ids
+    rows = list(
+        (connection or db.session).execute(
+            select(TransactionType.id, TransactionType.label)
+        )
+    )
+    labels = {type_id: label for type_id, label in rows}
+    ids = {label: type_id for type_id, label in rows}
+    # Readers keep using the old dicts until both new ones are complete.
+    with _lock:
+        _labels, _ids = labels, ids
+
+
+def clear_transaction_types():
+    global _labels, _ids
+    with _lock:
+        _labels, _ids = {}, {}
+
+
+def cached_type_id(label):
+    return _ids.get(label)
+
+
+def get_type_label(type_id):
+    if type_id is None:
+        return None
+    if type_id not in _labels:
+        load_transaction_types()
+    return _labels.get(type_id)
+
+
+def get_type_id(label, connection=None):
+    if label is None:
+        return None
+    if label not in _ids:
+        load_transaction_types(connection)
+    if label not in _ids:
+        return _insert_type(label, connection)
+    return _ids[label]
+
+
+def _insert_type(label, connection=None):
+    executor = connection or db.session
+    try:
+        with executor.begin_nested():
+            result = executor.execute(insert(TransactionType).values(label=label))
+    except IntegrityError:
+        # Another worker added the same label after our cache was loaded.
+        load_transaction_types(connection)
+        return _ids.get(label)
+    return result.inserted_primary_key[0]
+
+
+@event.listens_for(Ledger, "before_insert", propagate=True)
+@event.listens_for(Ledger, "before_update", propagate=True)
+def _resolve_type_id(mapper, connection, target):
+    label = target.__dict__.get("_type_label")
+    if label is not None and target.type_id is None:
+        session = object_session(target)
+        if session is not None:
+            connection = session.connection(bind_arguments={"mapper": TransactionType})
+        target.type_id = get_type_id(label, connection)
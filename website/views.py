@@ -1,14 +1,48 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, current_app, flash, render_template, request, url_for
 from flask_login import login_required, current_user
 from datetime import datetime
 
-from .filters import filter_reports
+from .filters import PAGE_SIZE, filter_reports
+from .models import KIND_NAMES
+from .money import to_money
 from .finances.submit_finances import process_form_submission
-from .finances.delete_finances import process_delete_request
+from .finances.delete_finances import DELETE_PREFIXES, process_delete_request
 
 views = Blueprint("views", __name__)
 
 
+def _page_url(**cursor):
+    args = {
+        key: value
+        for key, value in request.args.items()
+        if key not in ("after", "before")
+    }
+    args.update(cursor)
+    return url_for("views.home", **args)
+
+
+def _filter_date(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        flash(f'Ignored invalid date filter: {value}', 'error')
+        return None
+
+
+def _filter_amount(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return to_money(value)
+    except ValueError:
+        flash(f'Ignored invalid amount filter: {value}', 'error')
+        return None
+
+
 @views.route("/", methods=["GET", "POST"])
 @login_required
 def home():
@@ -16,24 +50,34 @@ def home():
         process_form_submission(request, current_user)
         process_delete_request(request, current_user)
 
-    amount_query = request.args.get("Fprice")
     name_query = request.args.get("Fname")
-    date_str = request.args.get("Fdate")
     report_type = request.args.get("Ftype")
-    date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else None
 
     filtered_reports = filter_reports(
         user_id=current_user.id,
-        amount_query=amount_query,
+        amount_query=_filter_amount("Fprice"),
         name_query=name_query,
-        date=date,
+        date=_filter_date("Fdate"),
         report_type=report_type,
+        amount_min=_filter_amount("Fmin"),
+        amount_max=_filter_amount("Fmax"),
+        start_date=_filter_date("Fstart"),
+        end_date=_filter_date("Fend"),
+        sort=request.args.get("Fsort", "date"),
+        descending=request.args.get("Forder", "desc") != "asc",
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        page_size=current_app.config.get("REPORTS_PAGE_SIZE", PAGE_SIZE),
     )
+    next_cursor = filtered_reports["next_cursor"]
+    prev_cursor = filtered_reports["prev_cursor"]
 
     return render_template(
         "index.html",
         user=current_user,
-        income=filtered_reports["income"],
-        expenses=filtered_reports["expenses"],
-        planning=filtered_reports["planning"],
+        reports=filtered_reports["reports"],
+        kind_names=KIND_NAMES,
+        delete_prefixes=DELETE_PREFIXES,
+        next_url=_page_url(after=next_cursor) if next_cursor else None,
+        prev_url=_page_url(before=prev_cursor) if prev_cursor else None,
     )
\ No newline at end of file